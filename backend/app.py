@@ -1,26 +1,114 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response, stream_with_context, g
 from flask_cors import CORS
 import os
+import io
+import json
+import uuid
+import time
 from dotenv import load_dotenv
 
-from chatbot.chatbot_engine import chatbot_response
-from utils.image_utils import predict_image, generate_gradcam
-from utils.text_utils import predict_text
-from utils.speech_utils import speech_to_text
-from utils.report_utils import generate_patient_report
-from utils.chest_utils import is_chest_xray
+from utils.report_utils import create_report, update_report, report_id_from_path, load_report_spec, get_report_pdf
+from utils.recommendation import generate_medical_recommendation
+from utils.decoded_xray import DecodedXray, ImageTooLarge
+from utils.model_registry import ModelRegistry, ModelNotReady
+from utils.batching import batching_metrics
+from utils.result_cache import create_result_cache
+from utils.validation_token import issue_token, verify_token
+from utils.jobs import create_job_queue
+from utils.execution import RequestGraph, DEBUG_TIMINGS
+from utils import batch_diagnosis
+from utils.artifact_store import get_artifact_store, content_type_for
+from chatbot.stream_client import UpstreamBusy
+from utils import model_server
+from utils import telemetry
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
 app = Flask(__name__, static_folder="static")
 CORS(app)
 
+# Whole request body (image + audio, or a batch archive); single images
+# are further limited by MAX_UPLOAD_BYTES / MAX_IMAGE_PIXELS
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", str(100 * 1024 * 1024)))
+
 # -------------------------
 # Ensure required directories exist
 # -------------------------
-os.makedirs("static/gradcam", exist_ok=True)
 os.makedirs("reports", exist_ok=True)
 
+# Grad-CAM overlays + PDF reports (ARTIFACT_STORE=memory|disk|s3)
+artifact_store = get_artifact_store()
+
+# Image-branch results keyed by upload hash + model version
+result_cache = create_result_cache()
+
+# Grad-CAM runs in the background unless ASYNC_ARTIFACTS=0
+ASYNC_ARTIFACTS = os.getenv("ASYNC_ARTIFACTS", "1") == "1"
+jobs = create_job_queue()
+
+# PDF reports render on first download; a request arriving before its
+# Grad-CAM job finishes waits up to this long for the overlay
+REPORT_WAIT_SECONDS = float(os.getenv("REPORT_WAIT_SECONDS", "10"))
+
+# -------------------------
+# Model Registry
+# -------------------------
+# Models load concurrently in the background (MODEL_LOADING=background)
+# or on first use (MODEL_LOADING=lazy); endpoints only wait for the
+# models they need.
+#
+# MODEL_SERVER=unix: the models live in a separate `model_server.py`
+# process and this worker only holds thin proxies (see
+# utils/model_server.py).
+models = ModelRegistry()
+if model_server.MODEL_SERVER == "unix":
+    remote = model_server.ModelServerClient()
+    models.register("validator", lambda: model_server.RemoteValidator(remote))
+    models.register("classifier", lambda: model_server.RemoteClassifier(remote))
+    models.register("text", lambda: model_server.RemoteText(remote))
+    models.register("speech", lambda: model_server.RemoteSpeech(remote))
+else:
+    models.register("validator", "utils.chest_utils")
+    models.register("classifier", "utils.image_utils")
+    models.register("text", "utils.text_utils")
+    models.register("speech", "utils.speech_utils")
+models.register("chatbot", "chatbot.chatbot_engine")
+models.start()
+
+@app.errorhandler(ModelNotReady)
+def model_not_ready(e):
+    return jsonify({
+        "error": "Service is starting up. Please retry shortly.",
+        "model": e.name,
+        "state": e.state
+    }), 503
+
+@app.errorhandler(ImageTooLarge)
+def image_too_large(e):
+    return jsonify({"error": str(e)}), 413
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({
+        "error": f"Upload exceeds the {app.config['MAX_CONTENT_LENGTH']} byte limit"
+    }), 413
+
+# -------------------------
+# Request Telemetry (Server-Timing + request metrics)
+# -------------------------
+@app.before_request
+def start_request_trace():
+    g.trace = telemetry.RequestTrace(request.endpoint, request.method, request.path)
+
+@app.after_request
+def finish_request_trace(response):
+    trace = g.pop("trace", None)
+    if trace is not None:
+        total = trace.finish(response.status_code)
+        if telemetry.SERVER_TIMING:
+            response.headers["Server-Timing"] = trace.server_timing(total)
+    return response
+
 # -------------------------
 # Health Check
 # -------------------------
@@ -29,42 +117,191 @@ def health():
     return jsonify({"status": "Backend running on localhost:5000"})
 
 # -------------------------
-# Multimodal Recommendation
+# Readiness (per-model load state)
 # -------------------------
-def generate_medical_recommendation(
-    image_prediction,
-    image_confidence,
-    text_prediction=None
-):
-    if image_prediction == "NORMAL" and text_prediction and text_prediction != "NORMAL":
-        return (
-            "The chest X-ray does not show radiological evidence of pneumonia; "
-            "however, the reported symptoms suggest a possible respiratory condition. "
-            "Clinical consultation is recommended."
-        )
+@app.route("/ready", methods=["GET"])
+def ready():
+    names = [n for n in request.args.get("models", "").split(",") if n]
+    unknown = models.unknown(names)
+    if unknown:
+        return jsonify({
+            "error": "Unknown model name(s)",
+            "unknown": unknown,
+            "models": sorted(models.status())
+        }), 400
 
-    if image_prediction == "NORMAL":
-        return (
-            "No radiological evidence of pneumonia detected. "
-            "Routine clinical observation is recommended."
-        )
+    is_ready = models.is_ready(*names)
+
+    return jsonify({
+        "ready": is_ready,
+        "mode": models.mode,
+        "models": models.status()
+    }), 200 if is_ready else 503
+
+# -------------------------
+# Micro-batching Metrics
+# -------------------------
+@app.route("/metrics/batching", methods=["GET"])
+def batching_metrics_api():
+    return jsonify(batching_metrics())
+
+@app.route("/metrics/cache", methods=["GET"])
+def cache_metrics_api():
+    return jsonify(result_cache.stats())
+
+@app.route("/metrics/chatbot", methods=["GET"])
+def chatbot_metrics_api():
+    return jsonify(models.get("chatbot").chatbot_metrics())
+
+# -------------------------
+# Prometheus Metrics
+# -------------------------
+# Stage/request histograms are recorded by utils/telemetry.py; the
+# gauges below are read from the registry, caches and batchers at
+# scrape time.
+def _model_gauge(field):
+    def read():
+        return {
+            name: (s["state"] == "ready") if field == "ready" else s["load_seconds"]
+            for name, s in models.status().items()
+        }
+    return read
+
+def _cache_stats():
+    stats = {"result": result_cache.stats()}
+    # Never trigger (or wait for) a chatbot load from a scrape
+    if models.is_ready("chatbot"):
+        chat = models.get("chatbot").chatbot_metrics()["cache"]
+        if chat is not None:
+            stats["chatbot"] = chat
+    return stats
+
+def _cache_gauge(field):
+    return lambda: {name: s[field] for name, s in _cache_stats().items()}
+
+telemetry.REGISTRY.gauge(
+    "healthai_model_load_seconds", "Model load time", _model_gauge("load_seconds"), ["model"]
+)
+telemetry.REGISTRY.gauge(
+    "healthai_model_ready", "1 once the model is loaded", _model_gauge("ready"), ["model"]
+)
+for _field in ("hits", "misses", "hit_rate"):
+    telemetry.REGISTRY.gauge(
+        f"healthai_cache_{_field}", f"Cache {_field.replace('_', ' ')}", _cache_gauge(_field), ["cache"]
+    )
+telemetry.REGISTRY.gauge(
+    "healthai_batch_queue_depth", "Requests waiting in a micro-batcher",
+    lambda: {name: m["queue_depth"] for name, m in batching_metrics().items()}, ["batcher"]
+)
 
-    if image_confidence >= 0.80:
-        return (
-            "High likelihood of pneumonia detected. "
-            "Physician consultation is strongly recommended."
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics_api():
+    return Response(telemetry.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+# -------------------------
+# Image Branch (validator + classifier)
+# -------------------------
+def analyze_xray(xray, validated_score=None, graph=None, on_valid=None):
+    """
+    Runs the image branch for a DecodedXray, or returns the cached
+    result when the same bytes were analysed before.
+
+    validated_score comes from a verified /validate-image token; when
+    given, the validator is not run again. graph (RequestGraph) records
+    per-stage timings. on_valid() is called as soon as the image is known
+    to be a chest X-ray, before classification.
+    """
+    graph = graph or RequestGraph()
+
+    cached = result_cache.get(xray.content_hash)
+    if cached:
+        # Grad-CAM artifacts can be evicted behind the cache's back
+        gradcam_path = cached.get("gradcam_image")
+        if gradcam_path and not artifact_store.exists(gradcam_path):
+            cached = {k: v for k, v in cached.items() if k != "gradcam_image"}
+        if cached["is_valid"] and on_valid is not None:
+            on_valid()
+        return cached
+
+    if validated_score is not None:
+        is_valid, validator_conf = True, validated_score
+    else:
+        is_valid, validator_conf = graph.timed(
+            "validator", models.get("validator").is_chest_xray, xray
         )
 
-    if image_confidence >= 0.60:
-        return (
-            "Moderate likelihood of pneumonia detected. "
-            "Clinical correlation and follow-up assessment may be considered."
+    result = {
+        "is_valid": bool(is_valid),
+        "validator_confidence": float(validator_conf)
+    }
+
+    if is_valid:
+        if on_valid is not None:
+            on_valid()
+        image_prediction, image_confidence = graph.timed(
+            "predict_image", models.get("classifier").predict_image, xray
         )
+        result["image_prediction"] = image_prediction
+        result["image_confidence"] = float(image_confidence)
+
+    result_cache.put(xray.content_hash, result)
+    return result
+
+# -------------------------
+# Artifacts (Grad-CAM)
+# -------------------------
+def build_gradcam(xray, image_result, report_path=None):
+    """
+    Grad-CAM overlay for a PNEUMONIA result, added to the report spec.
+    Runs as a background job by default; see /jobs/<job_id>.
+    """
+    try:
+        png = models.get("classifier").generate_gradcam_batch([xray], output="png")[0]
+        gradcam_path = artifact_store.save("gradcam", ".png", png, "image/png")
+    except Exception:
+        if report_path:
+            # Let the report render without the overlay
+            update_report(report_path, gradcam_pending=False)
+        raise
+
+    result_cache.put(xray.content_hash, dict(image_result, gradcam_image=gradcam_path))
+
+    if report_path:
+        update_report(report_path, gradcam_image=gradcam_path, gradcam_pending=False)
+
+    return {"gradcam_image": gradcam_path, "report_path": report_path}
+
+# -------------------------
+# Clinical Branch (speech → text)
+# -------------------------
+def classify_clinical_text(text):
+    """Text classification step of the clinical branch (text pool)."""
+    text_prediction, text_probabilities = models.get("text").predict_text_batch([text])[0]
+    return {
+        "transcription": None,
+        "text_prediction": text_prediction,
+        "text_probabilities": text_probabilities,
+    }
 
-    return (
-        "Low confidence indication of pneumonia. "
-        "Monitoring and clinical assessment are advised."
+
+def analyze_clinical(graph, audio_bytes):
+    """
+    Speech transcription on the speech pool, then text classification
+    handed to the text pool so it never runs on a speech worker.
+    Independent of the image branch, so it runs alongside it.
+    """
+    transcription = graph.timed(
+        "speech_to_text", models.get("speech").speech_to_text, audio_bytes
     )
+    result = {"transcription": transcription, "text_prediction": None}
+
+    if transcription:
+        result.update(
+            graph.submit("text", "predict_text", classify_clinical_text, transcription).result()
+        )
+        result["transcription"] = transcription
+
+    return result
 
 # -------------------------
 # Chest X-ray Validation API
@@ -79,8 +316,15 @@ def validate_image():
             "message": "No image received"
         }), 400
 
-    is_valid, confidence = is_chest_xray(image)
-    image.seek(0)
+    with telemetry.span("upload_read"):
+        xray = DecodedXray.from_file(image)
+
+    cached = result_cache.get(xray.content_hash)
+    if cached:
+        is_valid, confidence = cached["is_valid"], cached["validator_confidence"]
+    else:
+        with telemetry.span("validator"):
+            is_valid, confidence = models.get("validator").is_chest_xray(xray)
 
     if not is_valid:
         return jsonify({
@@ -96,7 +340,9 @@ def validate_image():
     return jsonify({
         "valid": True,
         "confidence": round(float(confidence), 4),
-        "message": "Valid Chest X-ray detected"
+        "message": "Valid Chest X-ray detected",
+        # Lets /diagnose skip the validator for these exact bytes
+        "validation_token": issue_token(xray.content_hash, confidence)
     })
 
 # -------------------------
@@ -113,13 +359,46 @@ def diagnose():
             "error": "Chest X-ray image is required"
         }), 400
 
+    graph = RequestGraph()
+
+    # Decode the upload once; validator, classifier and Grad-CAM share it
+    xray = graph.timed("upload_read", DecodedXray.from_file, image)
+    audio_bytes = audio.read() if audio else None
+
+    # -------------------------
+    # 2️⃣ Clinical Text / Speech (runs alongside the classifier)
+    # -------------------------
+    # Only started once the image passed validation, so a rejected upload
+    # never ties up the speech / text workers
+    clinical_branch = {}
+
+    def start_clinical():
+        if audio_bytes:
+            clinical_branch["future"] = graph.submit(
+                "speech", "clinical_branch", analyze_clinical, graph, audio_bytes
+            )
+        elif text:
+            clinical_branch["future"] = graph.submit(
+                "text", "predict_text", classify_clinical_text, text
+            )
+
     # -------------------------
     # 0️⃣ STRICT Chest X-ray Validation
+    # 1️⃣ Pneumonia Image Prediction
     # -------------------------
-    is_valid, validator_conf = is_chest_xray(image)
-    image.seek(0)
+    # A valid token from /validate-image for these bytes skips the
+    # validator; missing/expired/mismatched tokens fall back to it
+    validated_score = verify_token(
+        request.form.get("validation_token"),
+        xray.content_hash
+    )
 
-    if not is_valid:
+    image_result = graph.submit(
+        "image", "image_branch", analyze_xray, xray, validated_score, graph, start_clinical
+    ).result()
+    validator_conf = image_result["validator_confidence"]
+
+    if not image_result["is_valid"]:
         return jsonify({
             "error": "Uploaded image is not a Chest X-ray.",
             "validator_confidence": round(float(validator_conf), 3),
@@ -130,39 +409,29 @@ def diagnose():
             )
         }), 400
 
-    # -------------------------
-    # 1️⃣ Pneumonia Image Prediction
-    # -------------------------
-    image_prediction, image_confidence = predict_image(image)
+    image_prediction = image_result["image_prediction"]
+    image_confidence = image_result["image_confidence"]
 
     response = {
         "image_prediction": image_prediction,
         "image_confidence": round(float(image_confidence), 4)
     }
 
-    # -------------------------
-    # 2️⃣ Clinical Text / Speech
-    # -------------------------
-    clinical_text = None
+    # Join the clinical branch
     text_prediction = None
+    if "future" in clinical_branch:
+        clinical = clinical_branch["future"].result()
+        text_prediction = clinical["text_prediction"]
 
-    if audio:
-        clinical_text = speech_to_text(audio)
-        response["transcription"] = clinical_text
-    elif text:
-        clinical_text = text
-
-    if clinical_text:
-        text_prediction = predict_text(clinical_text)
+        if clinical["transcription"] is not None:
+            response["transcription"] = clinical["transcription"]
+        if text_prediction:
+            response["text_probabilities"] = clinical["text_probabilities"]
 
     # -------------------------
-    # 3️⃣ Grad-CAM (If Pneumonia)
+    # 3️⃣ Pneumonia Type
     # -------------------------
     if image_prediction == "PNEUMONIA":
-        image.seek(0)
-        gradcam_path = generate_gradcam(image)
-        response["gradcam_image"] = gradcam_path
-
         response["pneumonia_type"] = (
             text_prediction if text_prediction
             else "Undetermined (image-based)"
@@ -178,19 +447,185 @@ def diagnose():
     )
 
     # -------------------------
-    # 5️⃣ Report Generation
+    # 5️⃣ Grad-CAM + Report
     # -------------------------
-    report_path = generate_patient_report(response)
-    response["report_path"] = report_path
+    # The report is only recorded here and rendered on first download.
+    # Grad-CAM is the one artifact worth computing ahead of time; it
+    # follows via /jobs/<id> unless it is already cached.
+    gradcam_path = image_result.get("gradcam_image")
+    needs_gradcam = image_prediction == "PNEUMONIA" and gradcam_path is None
+
+    if needs_gradcam and not ASYNC_ARTIFACTS:
+        gradcam_path = graph.timed("generate_gradcam", build_gradcam, xray, image_result)["gradcam_image"]
+        needs_gradcam = False
+
+    if gradcam_path and image_prediction == "PNEUMONIA":
+        response["gradcam_image"] = gradcam_path
+
+    response["report_path"] = create_report(response, gradcam_pending=needs_gradcam)
+
+    if needs_gradcam:
+        job_id = jobs.submit(
+            "gradcam", telemetry.traced("generate_gradcam", build_gradcam),
+            xray, image_result, response["report_path"]
+        )
+        response["job_id"] = job_id
+        response["job_url"] = f"/jobs/{job_id}"
+
+    if DEBUG_TIMINGS:
+        response["timings_ms"] = graph.timings
 
     return jsonify(response)
 
 # -------------------------
-# Serve Reports
+# Bulk Diagnosis API (zip archive or multiple images)
+# -------------------------
+def run_batch_diagnosis(upload_path, output_path, with_reports):
+    writer = batch_diagnosis.ResultWriter(output_path)
+    try:
+        return batch_diagnosis.diagnose_batch(
+            batch_diagnosis.iter_zip(upload_path),
+            validator=models.get("validator"),
+            classifier=models.get("classifier"),
+            writer=writer,
+            with_reports=with_reports
+        )
+    finally:
+        writer.close()
+        os.remove(upload_path)
+
+@app.route("/diagnose/batch", methods=["POST"])
+def diagnose_batch_api():
+    archive = request.files.get("archive")
+    images = request.files.getlist("images")
+
+    if archive is None and not images:
+        return jsonify({
+            "error": "Upload a zip archive ('archive') or one or more images ('images')"
+        }), 400
+
+    fmt = request.form.get("format", "jsonl")
+    if fmt not in ("jsonl", "csv"):
+        return jsonify({"error": "format must be 'jsonl' or 'csv'"}), 400
+
+    # The uploads are spooled to disk and processed as a background job;
+    # poll job_url for the summary, then fetch the result file
+    batch_diagnosis.sweep_results("reports")
+    batch_id = uuid.uuid4().hex
+    upload_path = batch_diagnosis.spool_uploads(
+        archive, images, os.path.join("reports", f"batch_{batch_id}.upload.zip")
+    )
+
+    job_id = jobs.submit(
+        "diagnose_batch", telemetry.traced("diagnose_batch", run_batch_diagnosis),
+        upload_path, os.path.join("reports", f"batch_{batch_id}.{fmt}"),
+        request.form.get("reports") == "1"
+    )
+
+    return jsonify({"job_id": job_id, "job_url": f"/jobs/{job_id}"}), 202
+
+# -------------------------
+# Streaming Transcription (SSE)
+# -------------------------
+def sse_event(payload, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+@app.route("/transcribe/stream", methods=["POST"])
+def transcribe_stream_api():
+    audio = request.files.get("audio")
+
+    if audio is None:
+        return jsonify({"error": "Audio file is required"}), 400
+
+    speech = models.get("speech")
+    audio_bytes = audio.read()
+
+    def generate():
+        parts = []
+        try:
+            for i, text in enumerate(speech.transcribe_stream(audio_bytes)):
+                parts.append(text)
+                yield sse_event({"chunk": i, "text": text, "partial": " ".join(parts)})
+        except Exception as e:
+            yield sse_event({"error": str(e)}, event="error")
+            return
+
+        yield sse_event({"text": " ".join(parts)}, event="done")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# -------------------------
+# Background Jobs
+# -------------------------
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    if job["status"] == "failed":
+        return jsonify({"status": "failed", "error": job["error"]}), 500
+
+    if job["status"] != "done":
+        return jsonify({"status": job["status"]}), 202
+
+    return jsonify(job["result"])
+
+# -------------------------
+# Serve Artifacts (Grad-CAM + reports)
+# -------------------------
+@app.route("/artifacts/<path:key>")
+def download_artifact(key):
+    data = artifact_store.get(key)
+    if data is None:
+        return jsonify({"error": "Artifact not found or expired"}), 404
+
+    return send_file(
+        io.BytesIO(data),
+        mimetype=content_type_for(key),
+        as_attachment=key.endswith(".pdf"),
+        download_name=os.path.basename(key)
+    )
+
+# -------------------------
+# Serve Reports (on-demand PDFs + batch result files)
 # -------------------------
 @app.route("/reports/<path:filename>")
 def download_report(filename):
-    return send_from_directory("reports", filename, as_attachment=True)
+    report_id = report_id_from_path(filename)
+    if report_id is None:
+        return send_from_directory("reports", filename, as_attachment=True)
+
+    # Give a still-running Grad-CAM job a chance to land in the report
+    deadline = time.monotonic() + REPORT_WAIT_SECONDS
+    spec = load_report_spec(report_id)
+    while spec and spec.get("gradcam_pending") and time.monotonic() < deadline:
+        time.sleep(0.1)
+        spec = load_report_spec(report_id)
+
+    pdf = get_report_pdf(report_id)
+    if pdf is None:
+        return jsonify({"error": "Report not found or expired"}), 404
+
+    return send_file(
+        io.BytesIO(pdf),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"{report_id}.pdf"
+    )
 
 # -------------------------
 # Chatbot API
@@ -204,9 +639,12 @@ def chatbot_api():
         if not user_message:
             return jsonify({"reply": "Please enter a valid question."})
 
-        reply = chatbot_response(user_message)
+        reply = models.get("chatbot").chatbot_response(user_message)
         return jsonify({"reply": reply})
 
+    except ModelNotReady:
+        raise
+
     except Exception as e:
         import traceback
         print("❌ Chatbot API error:", repr(e))
@@ -216,6 +654,41 @@ def chatbot_api():
             "reply": "Assistant temporarily unavailable."
         }), 500
 
+@app.route("/chatbot/stream", methods=["POST"])
+def chatbot_stream_api():
+    data = request.get_json(silent=True) or {}
+    user_message = data.get("message", "").strip()
+
+    if not user_message:
+        return jsonify({"reply": "Please enter a valid question."})
+
+    chatbot = models.get("chatbot")
+
+    # Tokens are forwarded as the LLM produces them; the upstream call
+    # runs on the chatbot's async client, bounded by LLM_MAX_CONCURRENCY
+    # (keep that below the gthread --threads count, see stream_client)
+    def generate():
+        parts = []
+        try:
+            for token in chatbot.chatbot_stream(user_message):
+                parts.append(token)
+                yield sse_event({"token": token})
+        except UpstreamBusy:
+            yield sse_event({"error": "Assistant is busy. Please retry shortly."}, event="error")
+            return
+        except Exception as e:
+            print("❌ Chatbot stream error:", repr(e))
+            yield sse_event({"error": "Assistant temporarily unavailable."}, event="error")
+            return
+
+        yield sse_event({"reply": "".join(parts).strip()}, event="done")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # -------------------------
 # Run Server
 # -------------------------
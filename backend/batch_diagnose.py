@@ -0,0 +1,54 @@
+"""
+Diagnose a whole folder (or zip export) of chest X-rays in batches.
+
+Usage (from backend/):
+    python batch_diagnose.py /data/studies --output results/night.jsonl
+    python batch_diagnose.py export.zip --output results/night.csv --reports
+
+Images stream through the validator and classifier in batches of
+--batch-size; Grad-CAM runs only for PNEUMONIA results. One record per
+study is written to --output (.jsonl or .csv), plus a per-study PDF with
+--reports. Prints a throughput summary (images/sec).
+"""
+
+import os
+import json
+import argparse
+
+from utils import batch_diagnosis
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch chest X-ray diagnosis")
+    parser.add_argument("input", help="Directory of images or a .zip archive")
+    parser.add_argument("--output", default=os.path.join("reports", "batch_results.jsonl"))
+    parser.add_argument("--batch-size", type=int, default=batch_diagnosis.BATCH_SIZE)
+    parser.add_argument("--reports", action="store_true", help="Also write a PDF per study")
+    args = parser.parse_args()
+
+    # Models load on import
+    from utils import chest_utils, image_utils
+
+    if args.input.lower().endswith(".zip"):
+        source = open(args.input, "rb")
+        items = batch_diagnosis.iter_zip(source)
+    else:
+        source = None
+        items = batch_diagnosis.iter_directory(args.input)
+
+    writer = batch_diagnosis.ResultWriter(args.output)
+    try:
+        summary = batch_diagnosis.diagnose_batch(
+            items,
+            validator=chest_utils,
+            classifier=image_utils,
+            writer=writer,
+            batch_size=args.batch_size,
+            with_reports=args.reports
+        )
+    finally:
+        writer.close()
+        if source is not None:
+            source.close()
+
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,14 @@
+"""
+Benchmarks and load tests for the Smart HealthAI backend.
+
+Usage (from backend/):
+    python -m benchmarks                                # everything, Flask test client
+    python -m benchmarks --only stages                  # per-stage microbenchmarks
+    python -m benchmarks --only decode                  # full vs draft JPEG decode per image
+    python -m benchmarks --only load --concurrency 8 --requests 200
+    python -m benchmarks --mode http --url http://127.0.0.1:5000
+    python -m benchmarks --output bench/today.json --compare bench/yesterday.json
+
+Results are written as JSON; --compare flags stages and endpoints whose
+p50 latency regressed by more than --tolerance.
+"""
@@ -0,0 +1,100 @@
+import os
+import json
+import argparse
+
+from benchmarks.stats import environment, peak_rss_mb
+from benchmarks.stages import STAGES
+from benchmarks.load import SCENARIOS
+
+# Offline, cache-free defaults so runs measure real work and are comparable
+BENCH_ENV = {
+    "LLM_BACKEND": "fake",
+    "RESULT_CACHE_BACKEND": "off",
+    "CHAT_CACHE": "0",
+    "ARTIFACT_STORE": "memory",
+}
+
+
+def compare(current, baseline, tolerance):
+    """
+    [(section, name, baseline p50, current p50)] for regressions.
+    """
+    regressions = []
+    for section in ("stages", "load"):
+        for name, result in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name, {})
+            if "p50_ms" in result and old.get("p50_ms"):
+                if result["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+                    regressions.append((section, name, old["p50_ms"], result["p50_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Smart HealthAI benchmarks")
+    parser.add_argument("--only", choices=["stages", "decode", "load", "cold-start"], action="append",
+                        help="Run only these parts (repeatable); default: all")
+    parser.add_argument("--mode", choices=["client", "http"], default="client",
+                        help="Load test through the Flask test client or real HTTP")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per stage")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", action="store_true", help="Keep result / chat caches on")
+    parser.add_argument("--output", default=os.path.join("bench", "results.json"))
+    parser.add_argument("--compare", help="Previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    parts = args.only or ["stages", "decode", "load", "cold-start"]
+    env = {k: v for k, v in BENCH_ENV.items() if not (args.cache and "CACHE" in k)}
+    for key, value in env.items():
+        os.environ.setdefault(key, value)
+
+    results = {"environment": environment(), "config": vars(args), "env": env}
+
+    if "cold-start" in parts:
+        from benchmarks.startup import cold_start
+        print("🧊 cold start ...", flush=True)
+        results["cold_start"] = cold_start(env)
+
+    if "stages" in parts:
+        from benchmarks.stages import run_stages
+        results["stages"] = run_stages(args.stages.split(","), args.repeat)
+
+    if "decode" in parts:
+        from benchmarks.decode import compare_decode
+        results["decode"] = compare_decode(args.repeat)
+
+    if "load" in parts:
+        from benchmarks.load import ClientDriver, HttpDriver, run_load
+
+        if args.mode == "http":
+            driver = HttpDriver(args.url)
+        else:
+            import app as flask_app
+            driver = ClientDriver(flask_app.app)
+
+        results["load"] = run_load(driver, args.scenarios.split(","), args.requests, args.concurrency)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for section, name, old, new in regressions:
+            print(f"⚠️ {section}/{name}: p50 {old:.1f} ms → {new:.1f} ms")
+        if regressions:
+            raise SystemExit(1)
+        print("✅ no p50 regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import subprocess
+
+# =========================================================
+# DECODE: FULL vs DRAFT (PER IMAGE)
+# =========================================================
+# Each (image, mode) pair runs in a fresh interpreter so the peak RSS
+# it reports belongs to that decode alone. "decode" builds the model
+# inputs (validator + classifier tensors); "overlay" adds the Grad-CAM
+# base, which is what a PNEUMONIA result pays on top. "input_drift" is
+# how far draft tensors are from the native-resolution preprocessing.
+
+DECODE_MODES = ["full", "draft"]
+
+_CHILD = r"""
+import json
+import numpy as np
+from benchmarks.fixtures import sample_images, large_xray
+from benchmarks.stats import summarize, time_calls, rss_mb, peak_rss_mb
+from utils.decoded_xray import DecodedXray
+
+images = dict(sample_images(), **{{"large_3000x2500.jpeg": large_xray()}})
+data = images[{name!r}]
+draft = {draft}
+
+def inputs():
+    xray = DecodedXray(data, draft=draft)
+    xray.grayscale_tensor(224)
+    xray.rgb_tensor(224)
+    return xray
+
+def overlay():
+    inputs().bgr_overlay_base(224)
+
+def drift():
+    # Mean absolute difference of the model inputs against a native decode
+    full, ours = DecodedXray(data, draft=False), DecodedXray(data, draft=draft)
+    return {{
+        "grayscale": round(float(np.abs(full.grayscale_tensor(224) - ours.grayscale_tensor(224)).mean()), 5),
+        "rgb": round(float(np.abs(full.rgb_tensor(224) - ours.rgb_tensor(224)).mean()), 5),
+    }}
+
+baseline = rss_mb()
+decode = summarize(time_calls(inputs, {repeat}))
+peak = peak_rss_mb()
+with_overlay = summarize(time_calls(overlay, {repeat}))
+
+print("__RESULT__" + json.dumps({{
+    "decoded_size": list(inputs().decoded(224).size),
+    "decode": decode,
+    "decode_peak_mb": round(peak - baseline, 1),
+    "overlay": with_overlay,
+    "overlay_peak_mb": round(peak_rss_mb() - baseline, 1),
+    "input_drift": drift(),
+}}))
+"""
+
+
+def _run_child(name, mode, repeat, timeout=600):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(name=name, draft=mode == "draft", repeat=repeat)],
+        cwd=backend,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    return {"error": (proc.stderr or proc.stdout).strip()[-2000:]}
+
+
+def compare_decode(repeat=20):
+    """
+    {image: {"full": {...}, "draft": {...}, "speedup": x}} with decode
+    latency and peak memory per image for both decode modes.
+    """
+    from benchmarks.fixtures import sample_images
+
+    names = [name for name, _ in sample_images()] + ["large_3000x2500.jpeg"]
+    results = {}
+
+    for name in names:
+        print(f"🖼  decode {name} ...", flush=True)
+        result = {mode: _run_child(name, mode, repeat) for mode in DECODE_MODES}
+
+        full, draft = result["full"], result["draft"]
+        if "decode" in full and "decode" in draft and draft["decode"]["p50_ms"]:
+            result["speedup"] = round(full["decode"]["p50_ms"] / draft["decode"]["p50_ms"], 2)
+            result["peak_mb_saved"] = round(full["decode_peak_mb"] - draft["decode_peak_mb"], 1)
+        results[name] = result
+
+    return results
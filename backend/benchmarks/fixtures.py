@@ -0,0 +1,85 @@
+import io
+import os
+import math
+import wave
+import glob
+import random
+import struct
+
+# =========================================================
+# INPUTS
+# =========================================================
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CLINICAL_TEXTS = [
+    "High fever with productive cough and chills for three days",
+    "Dry cough, mild fever and fatigue after a viral infection",
+    "Sudden high fever, chest pain when breathing and rust coloured sputum",
+    "Patient reports shortness of breath and low oxygen saturation",
+    "Persistent cough with night sweats and weight loss",
+    "Child with fast breathing, wheezing and poor feeding",
+]
+
+CHAT_QUESTIONS = [
+    "What is pneumonia?",
+    "Is pneumonia contagious?",
+    "What does Grad-CAM highlight?",
+    "How does the system detect pneumonia?",
+    "What are common symptoms of pneumonia?",
+    "How long does pneumonia treatment take?",
+]
+
+
+def sample_images():
+    """
+    [(name, bytes)] for the sample X-rays in the repository root.
+    """
+    paths = sorted(glob.glob(os.path.join(REPO_ROOT, "sample_img*.jpeg")))
+    if not paths:
+        raise FileNotFoundError(f"No sample_img*.jpeg found in {REPO_ROOT}")
+
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def large_xray(size=(3000, 2500), quality=90):
+    """
+    JPEG bytes of a sample X-ray upscaled to a typical full-size export,
+    where reduced-resolution decoding matters most.
+    """
+    from PIL import Image
+
+    _, data = sample_images()[0]
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(data)).resize(size, Image.BICUBIC).save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def synthetic_audio(seconds=5.0, sr=16000, seed=0):
+    """
+    Mono 16-bit WAV bytes: a few voiced-like harmonic tones with noise,
+    so the audio path (ffmpeg decode + speech model) does real work.
+    """
+    rng = random.Random(seed)
+    frames = bytearray()
+    n = int(seconds * sr)
+
+    for i in range(n):
+        t = i / sr
+        pitch = 120 + 40 * math.sin(2 * math.pi * 0.5 * t)
+        envelope = 0.5 * (1 + math.sin(2 * math.pi * 2 * t))
+        sample = envelope * sum(math.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3))
+        sample = 0.3 * sample + 0.02 * rng.uniform(-1, 1)
+        frames += struct.pack("<h", int(max(-1.0, min(1.0, sample)) * 32767))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(bytes(frames))
+    return buffer.getvalue()
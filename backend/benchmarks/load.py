@@ -0,0 +1,207 @@
+import io
+import json
+import time
+import uuid
+import itertools
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import CHAT_QUESTIONS, CLINICAL_TEXTS, sample_images, synthetic_audio
+from benchmarks.stats import summarize
+
+# =========================================================
+# DRIVERS
+# =========================================================
+# Both drivers expose request(method, path, files=None, form=None,
+# json_body=None) → (status, body bytes).
+
+class ClientDriver:
+    """
+    In-process Flask test client (one per thread).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def request(self, method, path, files=None, form=None, json_body=None):
+        kwargs = {}
+        if files or form:
+            data = dict(form or {})
+            for field, (name, content) in (files or {}).items():
+                data[field] = (io.BytesIO(content), name)
+            kwargs.update(data=data, content_type="multipart/form-data")
+        elif json_body is not None:
+            kwargs["json"] = json_body
+
+        resp = self._client().open(path, method=method, **kwargs)
+        return resp.status_code, resp.get_data()
+
+
+def _multipart(files, form):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for key, value in (form or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for field, (name, content) in (files or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class HttpDriver:
+    """
+    Real HTTP against a running server (gunicorn, dev server, remote).
+    """
+
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method, path, files=None, form=None, json_body=None):
+        headers, data = {}, None
+        if files or form:
+            data, headers["Content-Type"] = _multipart(files, form)
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+
+        req = urllib.request.Request(f"{self.base_url}{path}", data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# =========================================================
+# SCENARIOS
+# =========================================================
+# A scenario returns a callable taking the request index; the callable
+# performs (and times) exactly one request and returns its status.
+
+def _json(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return {}
+
+
+def build_scenarios(driver):
+    images = sample_images()
+    audio = synthetic_audio()
+
+    def image(i):
+        return images[i % len(images)]
+
+    def validate(i):
+        return driver.request("POST", "/validate-image", files={"image": image(i)})
+
+    def diagnose_image(i):
+        return driver.request("POST", "/diagnose", files={"image": image(i)})
+
+    def diagnose_text(i):
+        return driver.request(
+            "POST", "/diagnose", files={"image": image(i)},
+            form={"text": CLINICAL_TEXTS[i % len(CLINICAL_TEXTS)]}
+        )
+
+    def diagnose_audio(i):
+        return driver.request(
+            "POST", "/diagnose", files={"image": image(i), "audio": ("speech.wav", audio)}
+        )
+
+    def chatbot(i):
+        return driver.request(
+            "POST", "/chatbot", json_body={"message": CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]}
+        )
+
+    def report(i):
+        # Only the report download is timed; see run_scenario(prepare=...)
+        return driver.request("GET", "/" + report.paths[i % len(report.paths)])
+
+    def prepare_report(n):
+        paths = []
+        for i in range(min(n, 8)):
+            status, body = diagnose_image(i)
+            path = _json(body).get("report_path")
+            if status == 200 and path:
+                paths.append(path)
+        if not paths:
+            raise RuntimeError("No report_path returned by /diagnose")
+        report.paths = paths
+
+    return {
+        "validate": (validate, None),
+        "diagnose_image": (diagnose_image, None),
+        "diagnose_text": (diagnose_text, None),
+        "diagnose_audio": (diagnose_audio, None),
+        "chatbot": (chatbot, None),
+        "report": (report, prepare_report),
+    }
+
+
+SCENARIOS = ["validate", "diagnose_image", "diagnose_text", "diagnose_audio", "chatbot", "report"]
+
+
+def run_scenario(call, requests, concurrency, warmup=2, prepare=None):
+    if prepare is not None:
+        prepare(requests)
+    for i in range(warmup):
+        call(i)
+
+    counter = itertools.count()
+    durations, statuses = [], []
+    lock = threading.Lock()
+
+    def one(_):
+        i = next(counter)
+        start = time.perf_counter()
+        status, _ = call(i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            durations.append(elapsed)
+            statuses.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    errors = sum(1 for s in statuses if s >= 400)
+    return dict(
+        summarize(durations),
+        concurrency=concurrency,
+        seconds=round(wall, 3),
+        throughput_rps=round(len(durations) / wall, 2) if wall else 0.0,
+        errors=errors,
+        statuses={str(s): statuses.count(s) for s in sorted(set(statuses))},
+    )
+
+
+def run_load(driver, scenarios=SCENARIOS, requests=50, concurrency=4):
+    available = build_scenarios(driver)
+    results = {}
+
+    for name in scenarios:
+        print(f"🚀 load {name} ({requests} requests, concurrency {concurrency}) ...", flush=True)
+        call, prepare = available[name]
+        try:
+            results[name] = run_scenario(call, requests, concurrency, prepare=prepare)
+        except Exception as e:
+            results[name] = {"error": repr(e)}
+
+    return results
@@ -0,0 +1,129 @@
+import io
+import itertools
+import traceback
+
+from benchmarks.fixtures import CLINICAL_TEXTS, sample_images, synthetic_audio
+from benchmarks.stats import summarize, time_calls, rss_mb
+
+# =========================================================
+# PER-STAGE MICROBENCHMARKS (IN-PROCESS)
+# =========================================================
+# Each stage times the model call alone on preprocessed input, so
+# regressions can be pinned to one stage. Stages whose dependencies are
+# missing are reported with an error instead of aborting the run.
+
+STAGES = ["decode", "validator", "classifier", "gradcam", "text", "speech", "pdf"]
+
+
+def _stage_decode(images):
+    from utils.decoded_xray import DecodedXray
+
+    cycle = itertools.cycle(images)
+
+    def run():
+        _, data = next(cycle)
+        xray = DecodedXray(data)
+        xray.grayscale_tensor(224)
+        xray.rgb_tensor(224)
+    return run
+
+
+def _stage_validator(images):
+    import numpy as np
+    from utils import chest_utils
+    from utils.decoded_xray import DecodedXray
+
+    batch = np.concatenate([DecodedXray(d).grayscale_tensor(chest_utils.IMG_SIZE) for _, d in images])
+    return lambda: chest_utils.engine.predict(batch[:1])
+
+
+def _stage_classifier(images):
+    import numpy as np
+    from utils import image_utils
+    from utils.decoded_xray import DecodedXray
+
+    batch = np.concatenate([DecodedXray(d).rgb_tensor(image_utils.IMG_SIZE) for _, d in images])
+    return lambda: image_utils._run_classifier_batch(batch[:1])
+
+
+def _stage_gradcam(images):
+    import numpy as np
+    from utils import image_utils
+    from utils.decoded_xray import DecodedXray
+
+    xray = DecodedXray(images[0][1])
+    arr = xray.rgb_tensor(image_utils.IMG_SIZE)
+    base = np.stack([xray.bgr_overlay_base(image_utils.IMG_SIZE)])
+
+    def run():
+        image_utils._encode_png(image_utils.gradcam_overlays(arr, base)[0])
+    return run
+
+
+def _stage_text(images):
+    from utils import text_utils
+
+    # Unique texts so the label / token caches never answer
+    counter = itertools.count()
+
+    def run():
+        i = next(counter)
+        text_utils.predict_text_batch([f"{CLINICAL_TEXTS[i % len(CLINICAL_TEXTS)]} (case {i})"])
+    return run
+
+
+def _stage_speech(images):
+    from utils import speech_utils
+    from utils.audio import decode_audio
+
+    audio = decode_audio(synthetic_audio())
+    return lambda: speech_utils.speech_backend.transcribe(audio)
+
+
+def _stage_pdf(images):
+    from PIL import Image
+    from utils.report_utils import render_patient_report
+
+    png = io.BytesIO()
+    Image.open(io.BytesIO(images[0][1])).convert("RGB").resize((224, 224)).save(png, "PNG")
+    png = png.getvalue()
+
+    response = {
+        "image_prediction": "PNEUMONIA",
+        "image_confidence": 0.93,
+        "pneumonia_type": "Bacterial Pneumonia",
+        "recommendation": "High likelihood of pneumonia detected. " * 4,
+        "gradcam_image": "artifacts/gradcam/benchmark.png",
+    }
+    return lambda: render_patient_report(response, png)
+
+
+STAGE_BUILDERS = {
+    "decode": _stage_decode,
+    "validator": _stage_validator,
+    "classifier": _stage_classifier,
+    "gradcam": _stage_gradcam,
+    "text": _stage_text,
+    "speech": _stage_speech,
+    "pdf": _stage_pdf,
+}
+
+# Slow stages get fewer repetitions
+STAGE_REPEAT_CAP = {"speech": 5}
+
+
+def run_stages(stages=STAGES, repeat=20):
+    images = sample_images()
+    results = {}
+
+    for name in stages:
+        print(f"⏱  stage {name} ...", flush=True)
+        try:
+            run = STAGE_BUILDERS[name](images)
+            durations = time_calls(run, min(repeat, STAGE_REPEAT_CAP.get(name, repeat)))
+            results[name] = dict(summarize(durations), rss_mb=rss_mb())
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {"error": repr(e)}
+
+    return results
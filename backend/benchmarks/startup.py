@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import subprocess
+
+# =========================================================
+# COLD START
+# =========================================================
+# Measured in a fresh interpreter: time to import app (Flask up) and
+# time until every registered model reports ready.
+
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+imported = time.perf_counter() - t0
+
+deadline = time.monotonic() + {timeout}
+while not app.models.is_ready() and time.monotonic() < deadline:
+    if any(s["state"] == "failed" for s in app.models.status().values()):
+        break
+    time.sleep(0.05)
+
+from benchmarks.stats import rss_mb, peak_rss_mb
+print("__RESULT__" + json.dumps({{
+    "import_seconds": round(imported, 3),
+    "ready_seconds": round(time.perf_counter() - t0, 3),
+    "all_ready": app.models.is_ready(),
+    "models": app.models.status(),
+    "rss_mb": rss_mb(),
+    "peak_rss_mb": peak_rss_mb(),
+}}))
+"""
+
+
+def cold_start(env=None, timeout=600):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(timeout=timeout)],
+        cwd=backend,
+        env=dict(os.environ, **(env or {})),
+        capture_output=True,
+        text=True,
+        timeout=timeout + 60,
+    )
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    return {"error": (proc.stderr or proc.stdout).strip()[-2000:]}
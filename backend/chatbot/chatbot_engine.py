@@ -1,11 +1,28 @@
-import os
 import re
-from groq import Groq
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from chatbot.llm_client import create_llm_client
+from chatbot.stream_client import create_stream_client
+from chatbot.response_cache import create_response_cache
+from chatbot import retrieval
+
+# LLM_BACKEND=groq | local (OpenAI-compatible server) | fake.
+# Both /chatbot and /chatbot/stream share one pooled async client with
+# bounded upstream concurrency (LLM_ASYNC_POOL=0 for the plain SDK client).
+client = create_stream_client() or create_llm_client()
+
+# Repeated FAQ-style questions skip the upstream call
+response_cache = create_response_cache()
+
+# Project docs: answer close matches directly, ground the rest
+retrieval_index = retrieval.load_index() if retrieval.RETRIEVAL_ENABLED else None
+
+# In-scope questions vs. those answered without an upstream call
+_counts = {"questions": 0, "cache": 0, "retrieval": 0}
+_counts_lock = threading.Lock()
 
 # ✅ Allowed healthcare keywords (expand as needed)
 HEALTH_KEYWORDS = [
@@ -51,9 +68,14 @@ def is_emergency(msg: str) -> bool:
     msg = normalize(msg)
     return any(k in msg for k in EMERGENCY_KEYWORDS)
 
-def chatbot_response(user_message: str) -> str:
+def prepare_reply(user_message: str):
+    """
+    Everything short of the LLM call: returns (reply, None) when the
+    question is answered locally (validation, emergency, scope filter,
+    cache, project docs), else (None, messages) to send upstream.
+    """
     if not user_message or not user_message.strip():
-        return "Please enter a valid healthcare-related question."
+        return "Please enter a valid healthcare-related question.", None
 
     msg = normalize(user_message)
 
@@ -62,28 +84,93 @@ def chatbot_response(user_message: str) -> str:
         return (
             "⚠️ This may be an emergency. Please seek urgent medical care immediately "
             "or contact local emergency services."
-        )
+        ), None
+
+    matches = retrieval_index.search(msg) if retrieval_index is not None else []
+    passage = retrieval.direct_answer(msg, matches)
 
-    # ✅ Strict healthcare-only filter
-    if not is_health_query(msg):
+    # ✅ Strict healthcare-only filter (questions about this system pass
+    # when they match the project docs closely)
+    if not is_health_query(msg) and passage is None:
         return (
             "I can help only with healthcare-related questions (pneumonia, chest X-rays, "
             "symptoms, precautions, diagnosis explanation). Please ask a medical question."
-        )
+        ), None
 
-    # ✅ Call Groq model
-    try:
-        chat = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.3,
-            max_tokens=250
-        )
-        return chat.choices[0].message.content.strip()
+    _count("questions")
+
+    if response_cache is not None:
+        cached = response_cache.get(msg)
+        if cached is not None:
+            _count("cache")
+            return cached, None
+
+    # ✅ Answered straight from the project docs
+    if passage is not None:
+        _count("retrieval")
+        return passage, None
 
+    return None, build_messages(user_message, matches)
+
+def chatbot_response(user_message: str) -> str:
+    reply, messages = prepare_reply(user_message)
+    if reply is not None:
+        return reply
+
+    # ✅ Call LLM
+    try:
+        reply = client.complete(messages)
     except Exception as e:
-        print("Groq Chatbot Error:", repr(e))
+        print(f"{client.name} Chatbot Error:", repr(e))
         return "Assistant temporarily unavailable. Please try again later."
+
+    if response_cache is not None:
+        response_cache.put(normalize(user_message), reply)
+    return reply
+
+def chatbot_stream(user_message: str):
+    """
+    Yields the reply in pieces as the LLM produces them; local answers
+    come as a single piece. Upstream errors propagate to the caller.
+    """
+    reply, messages = prepare_reply(user_message)
+    if reply is not None:
+        yield reply
+        return
+
+    parts = []
+    for token in client.stream(messages):
+        parts.append(token)
+        yield token
+
+    reply = "".join(parts).strip()
+    if response_cache is not None and reply:
+        response_cache.put(normalize(user_message), reply)
+
+def build_messages(user_message, matches=()):
+    system = SYSTEM_PROMPT
+    context = retrieval.context_block(matches)
+    if context:
+        system = f"{SYSTEM_PROMPT}\n{context}"
+
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user_message}
+    ]
+
+def _count(name):
+    with _counts_lock:
+        _counts[name] += 1
+
+def chatbot_metrics():
+    questions = _counts["questions"]
+    local = _counts["cache"] + _counts["retrieval"]
+    return {
+        "llm": client.metrics(),
+        "cache": response_cache.stats() if response_cache is not None else None,
+        "retrieval": retrieval_index.metrics() if retrieval_index is not None else None,
+        "questions": questions,
+        "answered_from_cache": _counts["cache"],
+        "answered_from_docs": _counts["retrieval"],
+        "answered_locally_rate": round(local / questions, 4) if questions else 0.0,
+    }
@@ -0,0 +1,113 @@
+"""
+Minimal OpenAI-compatible chat completions server for tests, benchmarks
+and offline development.
+
+Usage (from backend/):
+    python -m chatbot.fake_llm_server --port 8080 --token-delay 0.05
+    LLM_BACKEND=local LLM_BASE_URL=http://127.0.0.1:8080/v1 python app.py
+
+Replies are deterministic (same as chatbot.llm_client.FakeClient) and,
+with "stream": true, are sent word by word as SSE chunks with
+--token-delay seconds between them.
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chatbot.llm_client import FakeClient
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        server.requests += 1
+
+        if server.first_token_delay:
+            time.sleep(server.first_token_delay)
+
+        reply_tokens = list(server.fake.stream(body["messages"]))
+
+        if not body.get("stream"):
+            payload = json.dumps({
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(reply_tokens)},
+                    "finish_reason": "stop",
+                }],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        try:
+            for token in reply_tokens:
+                chunk = {
+                    "object": "chat.completion.chunk",
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                if server.token_delay:
+                    time.sleep(server.token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+def start_fake_server(host="127.0.0.1", port=0, token_delay=0.0, first_token_delay=0.0):
+    """
+    Serves in a daemon thread; returns (server, base_url).
+    Call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.fake = FakeClient()
+    server.token_delay = token_delay
+    server.first_token_delay = first_token_delay
+    server.requests = 0
+
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, url = start_fake_server(args.host, args.port, args.token_delay, args.first_token_delay)
+    print(f"Fake LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
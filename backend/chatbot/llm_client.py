@@ -0,0 +1,161 @@
+import os
+import time
+import hashlib
+import threading
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")   # groq | local | fake
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "250"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+
+# Any OpenAI-compatible server (llama.cpp, vLLM, Ollama, LM Studio)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://127.0.0.1:8080/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "not-needed")
+
+
+# =========================================================
+# CLIENTS
+# =========================================================
+
+class LLMClient:
+    """
+    Chat completion client. Backends implement _complete(messages,
+    temperature, max_tokens) → reply text; complete() adds latency and
+    error counters around it.
+    """
+
+    name = "base"
+
+    def __init__(self, model=LLM_MODEL):
+        self.model = model
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def complete(self, messages, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        start = time.perf_counter()
+        try:
+            return self._complete(messages, temperature, max_tokens)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.calls += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def _complete(self, messages, temperature, max_tokens):
+        raise NotImplementedError
+
+    def stream(self, messages, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        """
+        Yields the reply in pieces. Backends without streaming yield it
+        whole; see chatbot/stream_client.py for the streaming client.
+        """
+        yield self.complete(messages, temperature, max_tokens)
+
+    def metrics(self):
+        return {
+            "backend": self.name,
+            "model": self.model,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_latency_ms": round(1000 * self.total_seconds / self.calls, 2) if self.calls else 0.0,
+            "max_latency_ms": round(1000 * self.max_seconds, 2),
+        }
+
+
+class GroqClient(LLMClient):
+    name = "groq"
+
+    def __init__(self, model=LLM_MODEL, api_key=None, timeout=LLM_TIMEOUT_SECONDS):
+        super().__init__(model)
+        from groq import Groq
+        self.client = Groq(api_key=api_key or os.getenv("GROQ_API_KEY"), timeout=timeout)
+
+    def _complete(self, messages, temperature, max_tokens):
+        chat = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return chat.choices[0].message.content.strip()
+
+
+class LocalClient(LLMClient):
+    """
+    OpenAI-compatible HTTP server on the local network, for offline
+    development and load tests without Groq rate limits or cost.
+    """
+
+    name = "local"
+
+    def __init__(self, model=LLM_MODEL, base_url=LLM_BASE_URL, api_key=LLM_API_KEY,
+                 timeout=LLM_TIMEOUT_SECONDS):
+        super().__init__(model)
+        from openai import OpenAI
+        self.base_url = base_url
+        self.client = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout)
+
+    def _complete(self, messages, temperature, max_tokens):
+        chat = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return chat.choices[0].message.content.strip()
+
+
+class FakeClient(LLMClient):
+    """
+    Deterministic replies for tests and benchmarks: the same messages
+    always give the same text. `latency` simulates upstream delay.
+    """
+
+    name = "fake"
+
+    def __init__(self, model="fake", latency=0.0, replies=None):
+        super().__init__(model)
+        self.latency = latency
+        self.replies = replies or {}
+        self.requests = []
+
+    def _complete(self, messages, temperature, max_tokens):
+        self.requests.append(messages)
+        if self.latency:
+            time.sleep(self.latency)
+
+        question = messages[-1]["content"]
+        if question in self.replies:
+            return self.replies[question]
+
+        digest = hashlib.sha256(repr(messages).encode()).hexdigest()[:8]
+        return f"[fake:{digest}] {question}"
+
+    def stream(self, messages, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        words = self.complete(messages, temperature, max_tokens).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else " " + word
+
+
+def create_llm_client(backend=LLM_BACKEND):
+    if backend == "groq":
+        return GroqClient()
+    if backend == "local":
+        return LocalClient()
+    if backend == "fake":
+        return FakeClient()
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
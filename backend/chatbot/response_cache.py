@@ -0,0 +1,183 @@
+import os
+import re
+import math
+import hashlib
+import threading
+from collections import Counter
+
+from utils.result_cache import MemoryBackend
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE", "1") == "1"
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Cosine similarity at which a differently worded question counts as a
+# hit (e.g. 0.9). 0 = exact normalized match only.
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0"))
+
+# Optional sentence-transformers model for the similarity check;
+# hashed word / character n-grams are used when unset.
+CHAT_EMBEDDING_MODEL = os.getenv("CHAT_EMBEDDING_MODEL")
+
+
+# =========================================================
+# QUESTION NORMALIZATION
+# =========================================================
+
+STOPWORDS = {"a", "an", "the", "is", "are", "what", "whats", "please", "can", "you", "me", "tell", "about"}
+
+
+def normalize_question(text):
+    """
+    "What is Grad-CAM??" and "what is gradcam" map to the same key.
+    """
+    text = text.lower()
+    text = re.sub(r"[-_]", "", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+# =========================================================
+# EMBEDDINGS
+# =========================================================
+
+class HashingEmbedder:
+    """
+    Dependency-free sparse embedding: word and character-trigram counts,
+    stopwords dropped, L2 normalized. Good enough to catch rewordings
+    of the same short FAQ question.
+    """
+
+    def __call__(self, text):
+        words = [w for w in text.split() if w not in STOPWORDS]
+        features = Counter(words)
+        for word in words:
+            padded = f" {word} "
+            features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+
+        norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+        return {k: v / norm for k, v in features.items()}
+
+    @staticmethod
+    def similarity(a, b):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class SentenceEmbedder:
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, text):
+        return self.model.encode(text, normalize_embeddings=True)
+
+    @staticmethod
+    def similarity(a, b):
+        return float(a @ b)
+
+
+# =========================================================
+# RESPONSE CACHE
+# =========================================================
+
+class ResponseCache:
+    """
+    Chatbot replies keyed by normalized question, with TTL.
+
+    With similarity > 0 a miss falls back to the most similar cached
+    question; its reply is reused if the cosine similarity reaches the
+    threshold.
+    """
+
+    def __init__(self, max_entries=CHAT_CACHE_MAX_ENTRIES, ttl=CHAT_CACHE_TTL_SECONDS,
+                 similarity=CHAT_CACHE_SIMILARITY, embedder=None):
+        self.backend = MemoryBackend(max_entries=max_entries, ttl=ttl)
+        self.similarity = similarity
+        self.embedder = embedder
+
+        if similarity and embedder is None:
+            self.embedder = SentenceEmbedder(CHAT_EMBEDDING_MODEL) if CHAT_EMBEDDING_MODEL else HashingEmbedder()
+
+        self._vectors = {}   # key → (normalized question, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(question):
+        return hashlib.sha256(normalize_question(question).encode()).hexdigest()
+
+    def get(self, question):
+        key = self.key(question)
+        reply = self.backend.get(key)
+
+        if reply is None and self.similarity:
+            reply = self._get_similar(normalize_question(question))
+            if reply is not None:
+                with self._lock:
+                    self.similar_hits += 1
+
+        with self._lock:
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return reply
+
+    def _get_similar(self, normalized):
+        query = self.embedder(normalized)
+        best_key, best_score = None, self.similarity
+
+        with self._lock:
+            candidates = list(self._vectors.items())
+
+        for key, (_, vector) in candidates:
+            score = self.embedder.similarity(query, vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+
+        reply = self.backend.get(best_key)
+        if reply is None:
+            # Expired or evicted
+            with self._lock:
+                self._vectors.pop(best_key, None)
+        return reply
+
+    def put(self, question, reply):
+        key = self.key(question)
+        self.backend.put(key, reply)
+
+        if self.similarity:
+            normalized = normalize_question(question)
+            vector = self.embedder(normalized)
+            with self._lock:
+                self._vectors[key] = (normalized, vector)
+                # Keep the index no larger than the backend
+                while len(self._vectors) > self.backend.max_entries:
+                    self._vectors.pop(next(iter(self._vectors)))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.backend),
+            "similarity_threshold": self.similarity,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def create_response_cache(enabled=CHAT_CACHE_ENABLED):
+    return ResponseCache() if enabled else None
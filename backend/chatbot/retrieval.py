@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+from collections import Counter, namedtuple
+
+from chatbot.response_cache import normalize_question, STOPWORDS
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL", "1") == "1"
+DOCS_PATH = os.getenv("RETRIEVAL_DOCS_PATH", os.path.join(BASE_DIR, "data", "project_docs.txt"))
+INDEX_PATH = os.getenv("RETRIEVAL_INDEX_PATH", os.path.join(BASE_DIR, "cache", "retrieval_index.json"))
+
+CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "20"))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+
+# A doc sentence is returned as the answer without calling the LLM only
+# when the question has a recognised shape (see QUESTION_PATTERNS), the
+# sentence leads with the question's subject and contains this share of
+# its terms, and its passage scores at least ANSWER_MIN_SCORE.
+DIRECT_ANSWERS = os.getenv("RETRIEVAL_DIRECT_ANSWERS", "1") == "1"
+ANSWER_THRESHOLD = float(os.getenv("RETRIEVAL_ANSWER_THRESHOLD", "0.8"))
+ANSWER_MIN_SCORE = float(os.getenv("RETRIEVAL_ANSWER_MIN_SCORE", "0.2"))
+
+# Passages below this cosine similarity are not worth adding to the prompt
+CONTEXT_THRESHOLD = float(os.getenv("RETRIEVAL_CONTEXT_THRESHOLD", "0.1"))
+
+INDEX_VERSION = 1
+
+STOP = STOPWORDS | {
+    "of", "to", "and", "or", "in", "on", "for", "with", "by", "it", "its", "this", "that",
+    "do", "does", "how", "why", "which", "who", "be", "i", "my", "your", "system",
+}
+
+
+# =========================================================
+# CHUNKING
+# =========================================================
+
+def split_sentences(text):
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if s.strip()]
+
+
+def chunk_text(text, max_words=CHUNK_WORDS):
+    """
+    Paragraphs split into chunks of whole sentences, up to max_words each.
+    """
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current, words = [], 0
+        for sentence in split_sentences(paragraph):
+            n = len(sentence.split())
+            if current and words + n > max_words:
+                chunks.append(" ".join(current))
+                current, words = [], 0
+            current.append(sentence)
+            words += n
+        if current:
+            chunks.append(" ".join(current))
+    return chunks
+
+
+def stem(word):
+    """
+    Crude suffix stripping so "detects" / "detect" or "images" / "image"
+    match; no NLP dependency needed for a handful of docs.
+    """
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    return [stem(w) for w in normalize_question(text).split() if w not in STOP]
+
+
+# =========================================================
+# TF-IDF INDEX
+# =========================================================
+
+# score: cosine similarity; coverage: share of the query's IDF weight
+# found in the chunk (unknown words count against it)
+Match = namedtuple("Match", ["score", "coverage", "text"])
+
+
+class RetrievalIndex:
+    """
+    TF-IDF index over document chunks with cosine-similarity search.
+    Built once and persisted to INDEX_PATH; rebuilt only when the docs
+    or chunking settings change.
+    """
+
+    def __init__(self, chunks, idf, vectors, build_seconds=0.0, loaded_from_disk=False):
+        self.chunks = chunks
+        self.idf = idf
+        self.vectors = vectors
+        self.build_seconds = build_seconds
+        self.loaded_from_disk = loaded_from_disk
+
+        self.queries = 0
+        self.query_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _vector(counts, idf):
+        vec = {t: (1 + math.log(c)) * idf[t] for t, c in counts.items() if t in idf}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {t: v / norm for t, v in vec.items()}
+
+    @classmethod
+    def build(cls, text, max_words=CHUNK_WORDS):
+        start = time.perf_counter()
+        chunks = chunk_text(text, max_words)
+        counts = [Counter(tokenize(c)) for c in chunks]
+
+        df = Counter(t for c in counts for t in c)
+        n = len(chunks)
+        idf = {t: math.log((1 + n) / (1 + d)) + 1 for t, d in df.items()}
+
+        vectors = [cls._vector(c, idf) for c in counts]
+        return cls(chunks, idf, vectors, build_seconds=time.perf_counter() - start)
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    @staticmethod
+    def fingerprint(text, max_words=CHUNK_WORDS):
+        return hashlib.sha256(f"{INDEX_VERSION}:{max_words}:{text}".encode()).hexdigest()[:16]
+
+    def save(self, path, fingerprint):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "fingerprint": fingerprint,
+                "chunks": self.chunks,
+                "idf": self.idf,
+                "vectors": self.vectors,
+            }, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get("fingerprint") != fingerprint:
+            return None
+        return cls(data["chunks"], data["idf"], data["vectors"], loaded_from_disk=True)
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def search(self, query, k=TOP_K):
+        """
+        [Match] for the k most similar chunks, best first.
+        """
+        start = time.perf_counter()
+
+        terms = set(tokenize(query))
+        unknown_idf = math.log(1 + len(self.chunks)) + 1
+        weights = {t: self.idf.get(t, unknown_idf) for t in terms}
+        total_weight = sum(weights.values()) or 1.0
+
+        q = self._vector(Counter(terms), self.idf)
+        scored = []
+        for chunk, vec in zip(self.chunks, self.vectors):
+            score = sum(v * vec.get(t, 0.0) for t, v in q.items())
+            if score > 0:
+                coverage = sum(w for t, w in weights.items() if t in vec) / total_weight
+                scored.append(Match(score, coverage, chunk))
+        scored.sort(key=lambda m: m.score, reverse=True)
+
+        with self._lock:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start
+        return scored[:k]
+
+    def metrics(self):
+        return {
+            "chunks": len(self.chunks),
+            "build_ms": round(1000 * self.build_seconds, 2),
+            "loaded_from_disk": self.loaded_from_disk,
+            "queries": self.queries,
+            "avg_query_ms": round(1000 * self.query_seconds / self.queries, 3) if self.queries else 0.0,
+        }
+
+
+def load_index(docs_path=DOCS_PATH, index_path=INDEX_PATH, max_words=CHUNK_WORDS):
+    """
+    Persisted index if it matches the current docs, else a fresh build
+    (saved for the next start). None if the docs file is missing.
+    """
+    try:
+        with open(docs_path, encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+
+    fingerprint = RetrievalIndex.fingerprint(text, max_words)
+    start = time.perf_counter()
+
+    index = RetrievalIndex.load(index_path, fingerprint)
+    if index is not None:
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+    index = RetrievalIndex.build(text, max_words)
+    try:
+        index.save(index_path, fingerprint)
+    except OSError as e:
+        print(f"⚠️ Could not persist retrieval index: {e!r}")
+    return index
+
+
+# =========================================================
+# PROMPT HELPERS
+# =========================================================
+
+# Question shapes a doc sentence can answer verbatim, and the subject
+# that sentence must start with. Anything else (yes/no questions,
+# "is pneumonia contagious", open-ended) goes to the LLM, with the
+# passages as context.
+QUESTION_PATTERNS = [
+    # "what is grad-cam", "what are recommendations"
+    re.compile(r"^(?:what|who) (?:is|are) (?:(?:a|an|the) )?(?P<subject>.+)$"),
+    # "what does grad-cam highlight", "how does the system detect pneumonia"
+    re.compile(r"^(?:what|how|why) (?:does|do|can|will) (?:(?:a|an|the|this) )?(?P<subject>\w+) \w+"),
+    re.compile(r"^(?:define|explain) (?:(?:a|an|the) )?(?P<subject>.+)$"),
+]
+
+DETERMINERS = {"a", "an", "the", "this", "these", "that", "our"}
+
+
+def question_subject(question):
+    """
+    Stemmed subject words of a recognised question shape, else None.
+    """
+    q = normalize_question(question)
+    for pattern in QUESTION_PATTERNS:
+        m = pattern.match(q)
+        if m:
+            return [stem(w) for w in m.group("subject").split()]
+    return None
+
+
+def _leads_with(sentence, subject):
+    words = [stem(w) for w in normalize_question(sentence).split()]
+    while words and words[0] in DETERMINERS:
+        words.pop(0)
+    return words[:len(subject)] == subject
+
+
+def direct_answer(question, matches, threshold=ANSWER_THRESHOLD, min_score=ANSWER_MIN_SCORE):
+    """
+    A doc sentence that answers the question on its own, else None.
+
+    Matching the question's terms is not enough ("what is a chest x-ray"
+    shares every term with "This system detects pneumonia using chest
+    X-ray images."), so the sentence must also lead with the subject.
+    """
+    if not DIRECT_ANSWERS:
+        return None
+
+    subject = question_subject(question)
+    if not subject:
+        return None
+
+    terms = set(tokenize(question))
+    for match in matches:
+        if match.score < min_score:
+            break
+        for sentence in split_sentences(match.text):
+            if not _leads_with(sentence, subject):
+                continue
+            found = terms & set(tokenize(sentence))
+            if terms and len(found) / len(terms) >= threshold:
+                return sentence
+    return None
+
+
+def context_block(matches, threshold=CONTEXT_THRESHOLD):
+    passages = [m.text for m in matches if m.score >= threshold]
+    if not passages:
+        return ""
+    return "Project reference (use if relevant):\n" + "\n".join(f"- {p}" for p in passages)
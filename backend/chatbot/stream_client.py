@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+
+from chatbot.llm_client import (
+    LLMClient, LLM_BACKEND, LLM_MODEL, LLM_TEMPERATURE, LLM_MAX_TOKENS,
+    LLM_BASE_URL, LLM_API_KEY,
+)
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+LLM_ASYNC_POOL = os.getenv("LLM_ASYNC_POOL", "1") == "1"
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# Upstream streams in flight at once, across all requests in this process.
+# Every open SSE response holds a WSGI thread for its whole duration, so
+# serve the app with threaded workers (gunicorn -k gthread --threads N)
+# and keep this below N; otherwise a few slow streams take every thread
+# and /diagnose queues behind them. The default suits --threads 4.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+
+# How long a request waits for a free upstream slot before giving up
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "2"))
+
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+# Max silence between two streamed chunks
+LLM_READ_TIMEOUT_SECONDS = float(os.getenv("LLM_READ_TIMEOUT_SECONDS", "20"))
+# Whole completion, first byte to last token
+LLM_STREAM_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_TIMEOUT_SECONDS", "60"))
+
+LLM_POOL_CONNECTIONS = int(os.getenv("LLM_POOL_CONNECTIONS", str(LLM_MAX_CONCURRENCY)))
+
+
+class UpstreamBusy(Exception):
+    """
+    All upstream slots stayed taken for LLM_QUEUE_TIMEOUT_SECONDS.
+    """
+
+
+_DONE = object()
+
+
+# =========================================================
+# ASYNC STREAMING CLIENT
+# =========================================================
+
+class AsyncStreamingClient(LLMClient):
+    """
+    Streams chat completions from an OpenAI-compatible endpoint (Groq,
+    llama.cpp, vLLM, the fake server in chatbot/fake_llm_server.py).
+
+    One asyncio loop in a background thread owns a pooled
+    httpx.AsyncClient; a semaphore caps concurrent upstream streams.
+    stream() bridges tokens back to the calling (WSGI) thread through a
+    queue, so a Flask thread only waits on tokens and a saturated
+    upstream fails fast with UpstreamBusy instead of piling up workers.
+    """
+
+    name = "stream"
+
+    def __init__(self, base_url=LLM_BASE_URL, api_key=LLM_API_KEY, model=LLM_MODEL,
+                 max_concurrency=LLM_MAX_CONCURRENCY, queue_timeout=LLM_QUEUE_TIMEOUT_SECONDS,
+                 stream_timeout=LLM_STREAM_TIMEOUT_SECONDS, name="stream"):
+        super().__init__(model)
+        self.name = name
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.stream_timeout = stream_timeout
+
+        self.in_flight = 0
+        self.rejected = 0
+        self.first_token_seconds = 0.0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-stream", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=LLM_CONNECT_TIMEOUT_SECONDS,
+                    read=LLM_READ_TIMEOUT_SECONDS,
+                    write=LLM_CONNECT_TIMEOUT_SECONDS,
+                    pool=queue_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=LLM_POOL_CONNECTIONS,
+                    max_keepalive_connections=LLM_POOL_CONNECTIONS
+                ),
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+
+        asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    # -------------------------
+    # Async side (runs on the client's loop)
+    # -------------------------
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamBusy(f"{self.max_concurrency} upstream requests already in flight")
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def _stream_tokens(self, messages, temperature, max_tokens, put):
+        await self._acquire()
+        try:
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True,
+            }
+            async with self._http.stream("POST", f"{self.base_url}/chat/completions", json=payload) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        put(delta["content"])
+        finally:
+            self._release()
+
+    async def _run(self, messages, temperature, max_tokens, put):
+        await asyncio.wait_for(
+            self._stream_tokens(messages, temperature, max_tokens, put),
+            self.stream_timeout
+        )
+
+    # -------------------------
+    # Sync side (called from Flask threads)
+    # -------------------------
+    def stream(self, messages, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        """
+        Yields reply tokens as they arrive. Raises UpstreamBusy,
+        asyncio.TimeoutError or httpx errors from the upstream call.
+        Closing the generator (client disconnected) cancels the upstream
+        request and frees its slot.
+        """
+        tokens = queue.Queue()
+        start = time.perf_counter()
+        first = True
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(messages, temperature, max_tokens, tokens.put_nowait), self._loop
+        )
+        future.add_done_callback(lambda _: tokens.put(_DONE))
+
+        try:
+            while True:
+                token = tokens.get()
+                if token is _DONE:
+                    break
+                if first:
+                    self._record_first_token(time.perf_counter() - start)
+                    first = False
+                yield token
+
+            future.result()   # re-raise upstream errors
+        except GeneratorExit:
+            raise
+        except BaseException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            future.cancel()
+            with self._lock:
+                self.calls += 1
+                elapsed = time.perf_counter() - start
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def _record_first_token(self, seconds):
+        with self._lock:
+            self.first_token_seconds += seconds
+
+    def _complete(self, messages, temperature, max_tokens):
+        return "".join(self.stream(messages, temperature, max_tokens)).strip()
+
+    def complete(self, messages, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        # stream() already does the bookkeeping
+        return self._complete(messages, temperature, max_tokens)
+
+    def metrics(self):
+        m = super().metrics()
+        m.update(
+            in_flight=self.in_flight,
+            max_concurrency=self.max_concurrency,
+            rejected=self.rejected,
+            avg_first_token_ms=round(1000 * self.first_token_seconds / self.calls, 2) if self.calls else 0.0,
+        )
+        return m
+
+    def close(self):
+        async def shutdown():
+            await self._http.aclose()
+            await self._loop.shutdown_asyncgens()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def create_stream_client(backend=LLM_BACKEND, enabled=LLM_ASYNC_POOL):
+    """
+    Pooled streaming client for the backend, or None when the backend
+    streams in-process (fake) or the pool is disabled.
+    """
+    if not enabled:
+        return None
+    if backend == "groq":
+        return AsyncStreamingClient(base_url=GROQ_BASE_URL, api_key=os.getenv("GROQ_API_KEY", ""), name="groq")
+    if backend == "local":
+        return AsyncStreamingClient(name="local")
+    if backend == "fake":
+        return None
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
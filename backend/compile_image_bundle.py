@@ -0,0 +1,149 @@
+"""
+One-time "compile bundle" step for the pneumonia image model.
+
+Rebuilds the model from models/pneumonia_image_model_new.pkl and writes a
+self-describing artifact that image_utils loads directly at startup:
+
+    models/image_bundle/model.keras      full model (architecture + weights)
+    models/image_bundle/metadata.json    backbone, input size, threshold,
+                                         last conv layer
+
+Usage (from backend/):
+    python compile_image_bundle.py            # compile + verify + cold start
+    python compile_image_bundle.py --force    # overwrite an existing bundle
+    python compile_image_bundle.py --no-legacy-check   # air-gapped hosts
+
+Verification compares the rebuilt and the reloaded model with the original
+ImageNet-built model on the sample X-rays in the repository root. That
+reference needs the ImageNet checkpoint (Keras cache or a download); with
+--no-legacy-check the reloaded bundle is verified against the pkl-loaded
+model only, and the legacy cold start is not measured.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Both snippets run in a fresh interpreter and time model loading only
+# (TensorFlow import included). "legacy" is the original startup path:
+# ImageNet-initialised backbone + pkl weights. Its ImageNet checkpoint
+# comes from the Keras cache (~/.keras/models) or is downloaded first.
+COLD_START_SNIPPETS = {
+    "legacy": (
+        "import time; t = time.perf_counter(); "
+        "from utils.image_model_loader import load_pkl_model; "
+        "load_pkl_model(weights='imagenet'); "
+        "print(time.perf_counter() - t)"
+    ),
+    "bundle": (
+        "import time; t = time.perf_counter(); "
+        "from utils.image_model_loader import load_bundle; "
+        "load_bundle({bundle_dir!r}); "
+        "print(time.perf_counter() - t)"
+    ),
+}
+
+# Max allowed |prob| difference against the legacy model
+TOLERANCE = 1e-5
+
+
+def cold_start_seconds(kind, bundle_dir):
+    """
+    Model load time in a fresh interpreter.
+    """
+    snippet = COLD_START_SNIPPETS[kind].format(bundle_dir=bundle_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", snippet],
+        capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def sample_batch(size):
+    """
+    The repository's sample X-rays, preprocessed exactly as at serving time.
+    """
+    import numpy as np
+    from benchmarks.fixtures import sample_images
+    from utils.decoded_xray import DecodedXray
+
+    return np.concatenate([DecodedXray(data, draft=False).rgb_tensor(size) for _, data in sample_images()])
+
+
+def max_prob_diff(a, b, x):
+    import numpy as np
+    return float(np.max(np.abs(a(x, training=False).numpy() - b(x, training=False).numpy())))
+
+
+def compile_bundle(bundle_dir, force=False, legacy_check=True):
+    from datetime import datetime
+    from utils import image_model_loader as loader
+
+    if loader.bundle_exists(bundle_dir) and not force:
+        print(f"✅ Bundle already exists: {bundle_dir} (use --force to rebuild)")
+        return
+
+    model, metadata = loader.load_pkl_model()
+    x = sample_batch(metadata["input_size"])
+
+    # Reference: the original construction (ImageNet-initialised backbone),
+    # else the pkl-loaded model itself
+    reference, diff = model, 0.0
+    if legacy_check:
+        reference, _ = loader.load_pkl_model(weights="imagenet")
+        diff = max_prob_diff(model, reference, x)
+        if diff > TOLERANCE:
+            raise SystemExit(f"❌ Rebuilt model differs from the legacy model (max prob diff {diff:.2e})")
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    model.save(os.path.join(bundle_dir, loader.BUNDLE_MODEL_FILE))
+
+    metadata = dict(
+        metadata,
+        source=os.path.basename(loader.PKL_PATH),
+        created=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        tensorflow=__import__("tensorflow").__version__,
+    )
+    with open(os.path.join(bundle_dir, loader.BUNDLE_META_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # The reloaded bundle must match the reference as well
+    reloaded, _ = loader.load_bundle(bundle_dir)
+    bundle_diff = max_prob_diff(reloaded, reference, x)
+    if bundle_diff > TOLERANCE:
+        raise SystemExit(f"❌ Bundle verification failed (max prob diff {bundle_diff:.2e})")
+
+    against = "the legacy model" if legacy_check else "the pkl-loaded model"
+    print(
+        f"✅ Bundle written to {bundle_dir} ({metadata['backbone']}, verified on "
+        f"{len(x)} sample X-rays against {against}, max diff {max(diff, bundle_diff):.1e})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the pneumonia image model bundle")
+    parser.add_argument("--bundle-dir", default=os.path.join("models", "image_bundle"))
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--skip-benchmark", action="store_true")
+    parser.add_argument(
+        "--no-legacy-check", action="store_true",
+        help="verify against the pkl-loaded model; never fetch ImageNet weights"
+    )
+    args = parser.parse_args()
+
+    compile_bundle(args.bundle_dir, args.force, legacy_check=not args.no_legacy_check)
+
+    if not args.skip_benchmark:
+        print("⏱️ Measuring cold start (fresh interpreter each)...")
+        bundled = cold_start_seconds("bundle", args.bundle_dir)
+        if args.no_legacy_check:
+            print(json.dumps({"cold_start_bundle_seconds": round(bundled, 2)}))
+        else:
+            legacy = cold_start_seconds("legacy", args.bundle_dir)
+            print(json.dumps({
+                "cold_start_pkl_seconds": round(legacy, 2),
+                "cold_start_bundle_seconds": round(bundled, 2),
+                "speedup": round(legacy / bundled, 2) if bundled else None,
+            }))
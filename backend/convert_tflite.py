@@ -0,0 +1,160 @@
+"""
+Convert the chest X-ray validator and the pneumonia classifier to TFLite
+(fp16 and int8 post-training quantized) and report accuracy drift.
+
+Usage (from backend/):
+    python convert_tflite.py --calibration-dir data/calibration --holdout-dir data/holdout
+
+--calibration-dir : folder of chest X-rays used as the int8 representative dataset
+--holdout-dir     : folder of X-rays for drift. Images in NORMAL/ and PNEUMONIA/
+                    subfolders are also scored for accuracy against those labels.
+
+Outputs models/tflite/{validator,classifier}_{fp16,int8}.tflite, served when
+IMAGE_RUNTIME=tflite (TFLITE_VARIANT, TFLITE_THREADS).
+"""
+
+import os
+import json
+import argparse
+
+# The conversion always starts from the full Keras models
+os.environ["IMAGE_RUNTIME"] = "tensorflow"
+
+import numpy as np
+import tensorflow as tf
+
+from utils.decoded_xray import DecodedXray
+from utils.tflite_engine import TFLITE_DIR, TFLiteEngine, tflite_path
+from utils import chest_utils, image_utils
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+MODELS = {
+    # name: (keras model, preprocessing)
+    "validator": (chest_utils.model, lambda x: x.grayscale_tensor(chest_utils.IMG_SIZE)),
+    "classifier": (image_utils.model, lambda x: x.rgb_tensor(image_utils.IMG_SIZE)),
+}
+
+
+def list_images(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTS):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def load_tensor(path, preprocess):
+    with open(path, "rb") as f:
+        return preprocess(DecodedXray(f.read()))
+
+
+def convert(name, variant, calibration_paths, limit):
+    model, preprocess = MODELS[name]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+
+    elif variant == "int8":
+        if not calibration_paths:
+            raise SystemExit("❌ int8 conversion needs --calibration-dir with X-ray images")
+
+        def representative_dataset():
+            for path in calibration_paths[:limit]:
+                yield [load_tensor(path, preprocess)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    path = tflite_path(name, variant)
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+    print(f"✅ {name} [{variant}] → {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return path
+
+
+def label_from_path(path):
+    parts = {p.upper() for p in path.split(os.sep)}
+    if "PNEUMONIA" in parts:
+        return "PNEUMONIA"
+    if "NORMAL" in parts:
+        return "NORMAL"
+    return None
+
+
+def drift_report(name, variant, holdout_paths, threads):
+    model, preprocess = MODELS[name]
+    engine = TFLiteEngine(tflite_path(name, variant), threads=threads)
+
+    ref_probs, lite_probs, truth = [], [], []
+    for path in holdout_paths:
+        x = load_tensor(path, preprocess)
+        ref_probs.append(float(model(x, training=False).numpy()[0][0]))
+        lite_probs.append(float(engine.predict(x)[0]))
+        truth.append(label_from_path(path))
+
+    ref_probs = np.array(ref_probs)
+    lite_probs = np.array(lite_probs)
+
+    # Same decision rules as chest_utils / image_utils
+    if name == "validator":
+        ref_labels = ref_probs > chest_utils.THRESHOLD
+        lite_labels = lite_probs > chest_utils.THRESHOLD
+    else:
+        ref_labels = ref_probs >= image_utils.THRESHOLD
+        lite_labels = lite_probs >= image_utils.THRESHOLD
+
+    report = {
+        "model": name,
+        "variant": variant,
+        "size_mb": round(os.path.getsize(engine.path) / 1e6, 2),
+        "images": len(holdout_paths),
+        "label_agreement": round(float(np.mean(ref_labels == lite_labels)), 4),
+        "mean_abs_prob_diff": round(float(np.mean(np.abs(ref_probs - lite_probs))), 5),
+        "max_abs_prob_diff": round(float(np.max(np.abs(ref_probs - lite_probs))), 5),
+    }
+
+    if name == "classifier":
+        labelled = [i for i, t in enumerate(truth) if t is not None]
+        if labelled:
+            y = np.array([truth[i] == "PNEUMONIA" for i in labelled])
+            report["keras_accuracy"] = round(float(np.mean(ref_labels[labelled] == y)), 4)
+            report["tflite_accuracy"] = round(float(np.mean(lite_labels[labelled] == y)), 4)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert image models to TFLite")
+    parser.add_argument("--calibration-dir", default=None)
+    parser.add_argument("--holdout-dir", default=None)
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--variants", nargs="+", default=["fp16", "int8"], choices=["fp16", "int8"])
+    parser.add_argument("--calibration-limit", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--output", default=None, help="Write the drift report as JSON")
+    args = parser.parse_args()
+
+    os.makedirs(TFLITE_DIR, exist_ok=True)
+    calibration = list_images(args.calibration_dir) if args.calibration_dir else []
+    holdout = list_images(args.holdout_dir) if args.holdout_dir else []
+
+    reports = []
+    for name in args.models:
+        for variant in args.variants:
+            convert(name, variant, calibration, args.calibration_limit)
+            if holdout:
+                reports.append(drift_report(name, variant, holdout, args.threads))
+
+    for r in reports:
+        print(json.dumps(r))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"✅ Report written to {args.output}")
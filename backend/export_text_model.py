@@ -0,0 +1,172 @@
+"""
+Export the BioClinicalBERT text model to ONNX and verify every text
+backend against the fp32 model.
+
+Usage (from backend/):
+    python export_text_model.py                 # export (if missing) + verify
+    python export_text_model.py --force-export  # re-export the ONNX graph
+    python export_text_model.py --skip-export --limit 500
+
+For each backend (torch / quantized / onnx) a fresh process loads the
+model and reports resident memory, single-text latency, label agreement
+with fp32 and accuracy on pneumonia_text_multiclass_dataset_new.csv.
+"""
+
+import os
+import csv
+import json
+import time
+import queue
+import argparse
+import multiprocessing as mp
+
+DATASET_PATH = "pneumonia_text_multiclass_dataset_new.csv"
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def load_dataset(limit=None):
+    with open(DATASET_PATH, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if limit:
+        rows = rows[:limit]
+    return [r["text"] for r in rows], [int(r["label"]) for r in rows]
+
+
+def export(force=False):
+    os.environ["TEXT_BACKEND"] = "torch"
+    from utils import text_utils
+    from utils.text_backends import ONNX_PATH, ONNX_META_PATH, export_onnx, save_onnx_metadata
+
+    if not os.path.exists(ONNX_META_PATH) or force:
+        save_onnx_metadata(text_utils.tokenizer, text_utils.NUM_LABELS)
+        print(f"✅ Wrote tokenizer metadata: {ONNX_META_PATH}")
+
+    if os.path.exists(ONNX_PATH) and not force:
+        print(f"✅ ONNX model already exists: {ONNX_PATH}")
+        return
+
+    print("⬇️ Exporting text model to ONNX...")
+    export_onnx(text_utils.model, ONNX_PATH, seq_len=text_utils.MAX_LENGTH)
+    print(f"✅ Exported: {ONNX_PATH} ({os.path.getsize(ONNX_PATH) / 1e6:.1f} MB)")
+
+
+def measure_backend(name, texts, latency_samples, out):
+    # Fresh process per backend so RSS is not polluted by the others
+    os.environ["TEXT_BACKEND"] = name
+    os.environ["TEXT_CACHE_SIZE"] = "0"
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    from utils import text_utils
+    load_s = time.perf_counter() - started
+    loaded = rss_mb()
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        t0 = time.perf_counter()
+        text_utils.predict_text(text)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    latencies.sort()
+
+    t0 = time.perf_counter()
+    label_ids = {v: k for k, v in text_utils.LABELS.items()}
+    labels = [label_ids[label] for label, _ in text_utils.predict_text_batch(texts)]
+    batch_s = time.perf_counter() - t0
+
+    out.put({
+        "backend": name,
+        "load_seconds": round(load_s, 2),
+        "rss_mb": round(loaded, 1),
+        "model_rss_mb": round(loaded - baseline, 1),
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 2),
+        "latency_ms_p95": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 2),
+        "batch_texts_per_sec": round(len(texts) / batch_s, 1),
+        "labels": labels,
+    })
+
+
+def verify(backends, limit=None, latency_samples=200, timeout=3600):
+    texts, truth = load_dataset(limit)
+    ctx = mp.get_context("spawn")
+
+    results = []
+    for name in backends:
+        print(f"⏱️ Measuring backend: {name}")
+        out = ctx.Queue()
+        proc = ctx.Process(target=measure_backend, args=(name, texts, latency_samples, out))
+        proc.start()
+
+        # Poll so a crashed child (import error, OOM kill) fails the run
+        # instead of blocking on the queue forever
+        result = None
+        deadline = time.monotonic() + timeout
+        while result is None and time.monotonic() < deadline:
+            alive = proc.is_alive()
+            try:
+                result = out.get(timeout=1.0)
+            except queue.Empty:
+                if not alive:
+                    break
+
+        proc.join(timeout=30)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join()
+        if result is None or proc.exitcode != 0:
+            raise RuntimeError(
+                f"❌ Backend '{name}' measurement failed (exit code {proc.exitcode})"
+            )
+        results.append(result)
+
+    reference = next((r["labels"] for r in results if r["backend"] == "torch"), None)
+
+    for r in results:
+        labels = r.pop("labels")
+        r["accuracy"] = round(sum(l == t for l, t in zip(labels, truth)) / len(truth), 4)
+        if reference is not None:
+            r["fp32_agreement"] = round(sum(a == b for a, b in zip(labels, reference)) / len(labels), 4)
+
+    return results
+
+
+if __name__ == "__main__":
+    from utils.text_backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Export and verify text model backends")
+    parser.add_argument("--force-export", action="store_true")
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N dataset rows")
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if not args.skip_export and "onnx" in args.backends:
+        ctx = mp.get_context("spawn")
+        proc = ctx.Process(target=export, args=(args.force_export,))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise SystemExit("❌ ONNX export failed")
+
+    report = verify(args.backends, args.limit, args.latency_samples)
+
+    for r in report:
+        print(json.dumps(r))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
@@ -0,0 +1,30 @@
+"""
+Out-of-process model server: one process per node loads every model
+(validator, classifier, text, speech) and serves the web workers over a
+Unix socket, with tensors handed over through shared memory.
+
+Usage (from backend/):
+    IMAGE_BATCHING=1 python model_server.py &
+    MODEL_SERVER=unix gunicorn -w 8 --threads 4 app:app
+
+Workers then import no TensorFlow / torch / Whisper, so resident memory
+no longer grows with the worker count. Concurrent requests from all
+workers meet in the server's micro-batchers.
+
+The socket is created in a 0700 directory (MODEL_SERVER_DIR, default
+$XDG_RUNTIME_DIR/smart-healthai-<uid>). Unless MODEL_SERVER_AUTHKEY is
+set, the server writes a random key to a 0600 `authkey` file beside the
+socket, which workers of the same user read on connect.
+"""
+
+import argparse
+
+from utils.model_server import MODEL_SERVER_SOCKET, serve
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart HealthAI model server")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET)
+    args = parser.parse_args()
+
+    serve(args.socket)
@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+
+from utils.artifact_store import DiskArtifactStore, MemoryArtifactStore
+
+
+def age(store, key, seconds):
+    path = store._path(key)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+@pytest.fixture
+def disk(tmp_path):
+    # sweep_every is huge so only explicit sweep() calls evict
+    return DiskArtifactStore(tmp_path / "artifacts", max_bytes=100, max_age=3600, sweep_every=1e9)
+
+
+def test_disk_sweep_drops_expired_files(disk):
+    disk.put("gradcam/old.png", b"x" * 10)
+    disk.put("gradcam/new.png", b"x" * 10)
+    age(disk, "gradcam/old.png", 7200)
+
+    assert disk.sweep() == 1
+    assert disk.get("gradcam/old.png") is None
+    assert disk.get("gradcam/new.png") == b"x" * 10
+
+
+def test_disk_sweep_evicts_oldest_over_budget(disk):
+    for i, key in enumerate(["gradcam/a.png", "gradcam/b.png", "gradcam/c.png"]):
+        disk.put(key, b"x" * 40)
+        age(disk, key, 30 - i)
+
+    assert disk.sweep() == 1
+    assert not disk.exists("gradcam/a.png")
+    assert disk.exists("gradcam/b.png") and disk.exists("gradcam/c.png")
+
+
+def test_disk_sweep_keeps_report_specs_over_budget(disk):
+    disk.put("report/report_1.json", b"{}")
+    disk.put("report/report_1.pdf", b"x" * 60)
+    disk.put("gradcam/a.png", b"x" * 60)
+    age(disk, "report/report_1.json", 60)
+
+    disk.sweep()
+
+    assert disk.exists("report/report_1.json")
+
+    # Specs still expire with age
+    age(disk, "report/report_1.json", 7200)
+    disk.sweep()
+    assert not disk.exists("report/report_1.json")
+
+
+@pytest.mark.parametrize("key", ["../escape.png", "gradcam/../../escape.png", "/etc/passwd"])
+def test_disk_paths_stay_under_the_root(disk, key):
+    with pytest.raises(ValueError):
+        disk._path(key)
+    assert disk.get(key) is None
+    assert not disk.exists(key)
+
+
+def test_memory_lru_byte_bound():
+    store = MemoryArtifactStore(max_bytes=100)
+    store.put("gradcam/a.png", b"x" * 40)
+    store.put("gradcam/b.png", b"x" * 40)
+    store.get("gradcam/a.png")                  # a is now most recent
+    store.put("gradcam/c.png", b"x" * 40)
+
+    assert store.get("gradcam/b.png") is None
+    assert store.get("gradcam/a.png") is not None
+    assert store.get("gradcam/c.png") is not None
+    assert store._bytes == 80
+
+
+def test_memory_lru_evicts_report_specs_last():
+    store = MemoryArtifactStore(max_bytes=100)
+    store.put("report/report_1.json", b"x" * 10)
+    store.put("gradcam/a.png", b"x" * 50)
+    store.put("gradcam/b.png", b"x" * 50)
+
+    assert store.get("report/report_1.json") is not None
+    assert store.get("gradcam/a.png") is None
@@ -0,0 +1,27 @@
+import numpy as np
+
+from utils.audio import iter_chunks, needs_seekable_input
+
+SR = 1000
+
+
+def test_chunks_are_cut_in_silence():
+    # Tone everywhere except a short pause at 8.5 s
+    audio = np.sin(np.arange(25 * SR) * 0.3).astype(np.float32)
+    audio[int(8.4 * SR):int(8.6 * SR)] = 0.0
+
+    chunks = list(iter_chunks(audio, chunk_seconds=10, sr=SR, cut_window_seconds=3))
+
+    assert abs(len(chunks[0]) / SR - 8.5) < 0.1
+    assert all(len(c) <= 10 * SR for c in chunks)
+    assert sum(len(c) for c in chunks) == len(audio)
+
+
+def test_short_audio_is_one_chunk():
+    audio = np.ones(5 * SR, dtype=np.float32)
+    assert [len(c) for c in iter_chunks(audio, chunk_seconds=10, sr=SR)] == [5 * SR]
+
+
+def test_mp4_containers_need_a_seekable_input():
+    assert needs_seekable_input(b"\x00\x00\x00\x20ftypM4A \x00\x00")
+    assert not needs_seekable_input(b"RIFF\x24\x00\x00\x00WAVEfmt ")
@@ -0,0 +1,119 @@
+import io
+import os
+import time
+import zipfile
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("reportlab")
+from PIL import Image
+
+from utils import batch_diagnosis, decoded_xray
+from utils.decoded_xray import ImageTooLarge
+
+
+def png(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new("L", size, 128).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def archive(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+class Validator:
+    IMG_SIZE = 32
+    THRESHOLD = 0.5
+
+    def score_batch(self, xrays):
+        return [0.9] * len(xrays)
+
+
+class Classifier:
+    IMG_SIZE = 32
+
+    def predict_batch(self, xrays):
+        return [("NORMAL", 0.8)] * len(xrays)
+
+    def generate_gradcam_batch(self, xrays, output):
+        return []
+
+
+class Upload:
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+
+
+class Writer:
+    path = "memory"
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+def test_oversized_zip_members_are_skipped_unread(monkeypatch):
+    monkeypatch.setattr(decoded_xray, "MAX_UPLOAD_BYTES", 10_000)
+    # Compresses to almost nothing but inflates past the limit
+    bomb = b"\0" * 5_000_000
+    zf = archive({"ok.png": png(), "bomb.png": bomb})
+
+    read = []
+    original = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, info: read.append(info) or original(self, info))
+
+    items = list(batch_diagnosis.iter_zip(zf))
+    assert isinstance(dict(items)["bomb.png"], ImageTooLarge)
+    assert [getattr(i, "filename", i) for i in read] == ["ok.png"]
+
+    writer = Writer()
+    summary = batch_diagnosis.diagnose_batch(items, Validator(), Classifier(), writer)
+
+    records = {r["study"]: r for r in writer.records}
+    assert records["bomb.png"]["error"].startswith("skipped:")
+    assert records["ok.png"]["image_prediction"] == "NORMAL"
+    assert summary["errors"] == 1 and summary["images"] == 2
+
+
+def test_decodes_are_released_once_tensors_are_built():
+    kept = []
+
+    class Keeping(Classifier):
+        def predict_batch(self, xrays):
+            kept.extend(xrays)
+            return super().predict_batch(xrays)
+
+    batch_diagnosis.diagnose_batch([("a.png", png((512, 512)))], Validator(), Keeping(), Writer())
+
+    assert kept and kept[0]._image is None
+    assert kept[0].rgb_tensor(Classifier.IMG_SIZE).shape == (1, 32, 32, 3)
+
+
+def test_uploads_are_spooled_for_the_job(tmp_path):
+    path = batch_diagnosis.spool_uploads(
+        None, [Upload("a.png", png()), Upload("b.png", png())], str(tmp_path / "batch_x.upload.zip")
+    )
+
+    assert [name for name, _ in batch_diagnosis.iter_zip(path)] == ["a.png", "b.png"]
+
+
+def test_old_batch_results_are_swept(tmp_path):
+    old, new, other = (tmp_path / n for n in ("batch_old.jsonl", "batch_new.csv", "report.pdf"))
+    for f in (old, new, other):
+        f.write_text("x")
+    stale = time.time() - 7200
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+
+    assert batch_diagnosis.sweep_results(str(tmp_path), ttl=3600) == 1
+    assert not old.exists() and new.exists() and other.exists()
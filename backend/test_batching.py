@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.batching import MicroBatcher, BATCHERS
+
+
+def rows(n):
+    return [np.full((1, 2), i, dtype=np.float32) for i in range(n)]
+
+
+@pytest.fixture
+def make_batcher():
+    names = []
+
+    def make(run_batch, **kwargs):
+        name = f"test-{len(names)}"
+        names.append(name)
+        return MicroBatcher(name, run_batch, **kwargs)
+
+    yield make
+    for name in names:
+        BATCHERS.pop(name, None)
+
+
+def test_concurrent_items_are_coalesced(make_batcher):
+    sizes = []
+
+    def run_batch(batch):
+        sizes.append(len(batch))
+        return [float(row[0]) for row in batch]
+
+    batcher = make_batcher(run_batch, max_batch_size=4, max_wait_ms=1000)
+    futures = [batcher.submit(item) for item in rows(4)]
+
+    assert [f.result(timeout=5) for f in futures] == [0.0, 1.0, 2.0, 3.0]
+    assert sizes == [4]
+
+    metrics = batcher.metrics()
+    assert metrics["batch_size_histogram"] == {4: 1}
+    assert metrics["queue_wait_ms"]["count"] == 4
+    assert metrics["queue_depth"] == 0
+
+
+def test_a_lone_item_runs_after_the_max_wait(make_batcher):
+    batcher = make_batcher(lambda batch: [len(batch)], max_batch_size=8, max_wait_ms=20)
+
+    assert batcher.submit(rows(1)[0]).result(timeout=5) == 1
+    assert batcher.metrics()["queue_wait_ms"]["max"] >= 20
+
+
+def test_errors_reach_every_caller(make_batcher):
+    def run_batch(batch):
+        raise ValueError("model failed")
+
+    batcher = make_batcher(run_batch, max_batch_size=2, max_wait_ms=1000)
+    futures = [batcher.submit(item) for item in rows(2)]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="model failed"):
+            future.result(timeout=5)
+
+
+def test_missing_results_fail_instead_of_hanging(make_batcher):
+    batcher = make_batcher(lambda batch: [0.5], max_batch_size=3, max_wait_ms=1000)
+    futures = [batcher.submit(item) for item in rows(3)]
+
+    assert futures[0].result(timeout=5) == 0.5
+    for future in futures[1:]:
+        with pytest.raises(RuntimeError, match="1 results for 3 items"):
+            future.result(timeout=5)
@@ -0,0 +1,23 @@
+from benchmarks.__main__ import compare
+from benchmarks.fixtures import sample_images, synthetic_audio
+from benchmarks.stats import percentile, summarize
+
+
+def test_percentiles():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert summarize([0.001, 0.002, 0.003])["p50_ms"] == 2.0
+
+
+def test_fixtures():
+    assert len(sample_images()) == 4
+    assert synthetic_audio(seconds=0.1)[:4] == b"RIFF"
+
+
+def test_compare_flags_p50_regressions():
+    baseline = {"stages": {"pdf": {"p50_ms": 10.0}}, "load": {"chatbot": {"p50_ms": 5.0}}}
+    current = {"stages": {"pdf": {"p50_ms": 13.0}}, "load": {"chatbot": {"p50_ms": 5.5}}}
+
+    assert compare(current, baseline, tolerance=0.2) == [("stages", "pdf", 10.0, 13.0)]
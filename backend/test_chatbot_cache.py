@@ -0,0 +1,37 @@
+from chatbot.llm_client import FakeClient
+from chatbot.response_cache import ResponseCache, normalize_question
+
+
+def test_fake_client_is_deterministic():
+    client = FakeClient()
+    messages = [{"role": "user", "content": "what is pneumonia"}]
+
+    assert client.complete(messages) == client.complete(messages)
+    assert client.metrics()["calls"] == 2
+
+
+def test_normalized_questions_share_an_entry():
+    cache = ResponseCache()
+    cache.put("What is Grad-CAM?", "A heatmap.")
+
+    assert normalize_question("what is  gradcam") == normalize_question("What is Grad-CAM?")
+    assert cache.get("what is gradcam") == "A heatmap."
+    assert cache.get("is pneumonia contagious") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_similarity_threshold():
+    cache = ResponseCache(similarity=0.8)
+    cache.put("is pneumonia contagious", "It can be.")
+
+    assert cache.get("is pneumonia contagious at all") == "It can be."
+    assert cache.get("how is pneumonia treated") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=-1)
+    cache.put("what is pneumonia", "A lung infection.")
+
+    assert cache.get("what is pneumonia") is None
@@ -0,0 +1,69 @@
+import os
+import glob
+
+import pytest
+
+# Regression test for the shared chest X-ray validator on the sample
+# images in the repository root. Run from anywhere:
+#   python -m pytest backend/test_chest_validator.py
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BACKEND_DIR)
+SAMPLE_IMAGES = sorted(glob.glob(os.path.join(REPO_ROOT, "sample_img*.jpeg")))
+
+pytest.importorskip("tensorflow")
+
+if not os.path.exists(os.path.join(BACKEND_DIR, "models", "image_model.h5")):
+    pytest.skip("models/image_model.h5 not available", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def validator():
+    # Model paths are relative to backend/
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        from utils import chest_utils
+        yield chest_utils
+    finally:
+        os.chdir(cwd)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_sample_images_present():
+    assert len(SAMPLE_IMAGES) == 4
+
+
+@pytest.mark.parametrize("path", SAMPLE_IMAGES, ids=os.path.basename)
+def test_samples_are_chest_xrays(validator, path):
+    from utils.decoded_xray import DecodedXray
+
+    is_valid, score = validator.is_chest_xray(DecodedXray(read(path)))
+
+    assert is_valid
+    assert score > validator.THRESHOLD
+
+
+def test_batch_matches_single(validator):
+    from utils.decoded_xray import DecodedXray
+
+    xrays = [DecodedXray(read(p)) for p in SAMPLE_IMAGES]
+    batch_scores = validator.score_batch(xrays)
+    single_scores = [validator.score(x) for x in xrays]
+
+    assert batch_scores == pytest.approx(single_scores, abs=1e-5)
+
+
+def test_chest_validator_shares_model(validator):
+    from utils import chest_validator
+
+    assert chest_validator.model is validator.model
+
+    with open(SAMPLE_IMAGES[0], "rb") as f:
+        is_valid, score = chest_validator.validate_chest_xray(f)
+
+    assert is_valid and score > chest_validator.THRESHOLD
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+pytest.importorskip("cv2")
+from PIL import Image
+
+from utils import decoded_xray
+from utils.decoded_xray import DecodedXray, ImageTooLarge
+
+
+def jpeg(size):
+    buffer = io.BytesIO()
+    Image.new("L", size, 128).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_draft_decodes_at_reduced_scale():
+    xray = DecodedXray(jpeg((2000, 1600)), draft=True)
+
+    assert xray.grayscale_tensor(224).shape == (1, 224, 224, 1)
+    assert xray.rgb_tensor(224).shape == (1, 224, 224, 3)
+    # 1/4 scale is the smallest that still covers 224 on both sides
+    assert xray.decoded(224).size == (500, 400)
+
+    # The overlay base asks for the native image and replaces the small one
+    assert xray.bgr_overlay_base(224).shape == (224, 224, 3)
+    assert xray.decoded(224).size == (2000, 1600)
+
+
+def test_full_mode_keeps_native_resolution():
+    xray = DecodedXray(jpeg((2000, 1600)), draft=False)
+    xray.grayscale_tensor(224)
+
+    assert xray.decoded(224).size == (2000, 1600)
+
+
+def test_limits_are_checked_before_decoding(monkeypatch):
+    monkeypatch.setattr(decoded_xray, "MAX_IMAGE_PIXELS", 1000 * 1000)
+    with pytest.raises(ImageTooLarge):
+        DecodedXray.from_file(io.BytesIO(jpeg((1200, 1000))))
+
+    monkeypatch.setattr(decoded_xray, "MAX_UPLOAD_BYTES", 100)
+    with pytest.raises(ImageTooLarge):
+        DecodedXray(jpeg((64, 64))).grayscale_tensor(32)
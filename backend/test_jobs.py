@@ -0,0 +1,78 @@
+import time
+import threading
+
+import pytest
+
+from utils import jobs
+from utils.jobs import JobQueue, MemoryJobStore, SqliteJobStore
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        assert time.monotonic() < deadline, f"job stuck in {job['status']}"
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_job_lifecycle(store):
+    queue = JobQueue(store, workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def work(x, scale=1):
+        started.set()
+        release.wait(5)
+        return {"value": x * scale}
+
+    job_id = queue.submit("demo", work, 2, scale=3)
+    assert started.wait(5)
+    assert queue.get(job_id)["status"] == "running"
+
+    release.set()
+    job = wait_for(queue, job_id)
+    assert job["status"] == "done"
+    assert job["kind"] == "demo"
+    assert job["result"] == {"value": 6}
+    assert job["error"] is None
+
+
+def test_failed_job(store):
+    queue = JobQueue(store, workers=1)
+
+    job = wait_for(queue, queue.submit("demo", lambda: 1 / 0))
+
+    assert job["status"] == "failed"
+    assert "ZeroDivisionError" in job["error"]
+
+
+def test_unknown_job(store):
+    assert JobQueue(store, workers=1).get("nope") is None
+
+
+def test_old_jobs_are_dropped(store, monkeypatch):
+    store.save({"job_id": "old", "status": "done", "updated_at": time.time() - 120})
+    monkeypatch.setattr(jobs, "JOB_RETENTION_SECONDS", 60)
+    store.save({"job_id": "new", "status": "done", "updated_at": time.time()})
+
+    assert store.load("old") is None
+    assert store.load("new")["status"] == "done"
+
+
+def test_sqlite_state_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    accepting = JobQueue(SqliteJobStore(path), workers=1)
+    polling = JobQueue(SqliteJobStore(path), workers=1)
+
+    job_id = accepting.submit("demo", lambda: "ok")
+    wait_for(accepting, job_id)
+
+    assert polling.get(job_id)["result"] == "ok"
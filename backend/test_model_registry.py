@@ -0,0 +1,50 @@
+import pytest
+
+from utils.model_registry import ModelRegistry, ModelNotReady
+
+
+def test_ready_models_always_have_a_load_time():
+    registry = ModelRegistry(mode="lazy")
+    seen = []
+
+    def loader():
+        return "model"
+
+    registry.register("demo", loader)
+    entry = registry._entries["demo"]
+
+    # Record what /ready would report at the moment the state flips
+    class Watched(type(entry)):
+        def __setattr__(self, name, value):
+            if name == "state" and value == "ready":
+                seen.append(self.load_seconds)
+            super().__setattr__(name, value)
+
+    entry.__class__ = Watched
+    assert registry.get("demo") == "model"
+    assert seen and seen[0] is not None
+
+
+def test_unknown_names():
+    registry = ModelRegistry(mode="lazy")
+    registry.register("demo", lambda: None)
+
+    assert registry.unknown(["demo", "nope"]) == ["nope"]
+
+
+def test_lazy_models_are_ready_before_first_use():
+    registry = ModelRegistry(mode="lazy")
+    registry.register("demo", lambda: "model")
+    registry.register("broken", lambda: 1 / 0)
+
+    assert registry.is_ready("demo", "broken")
+
+    registry.get("demo")
+    with pytest.raises(ModelNotReady):
+        registry.get("broken")
+    assert registry.is_ready("demo")
+    assert not registry.is_ready("broken")
+
+    background = ModelRegistry(mode="background")
+    background.register("demo", lambda: "model")
+    assert not background.is_ready("demo")
@@ -0,0 +1,89 @@
+import os
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from utils.model_registry import ModelRegistry, ModelNotReady
+from utils.model_server import ModelServer, ModelServerClient, private_socket_dir
+
+
+@pytest.fixture
+def server_client(tmp_path):
+    address = str(tmp_path / "models.sock")
+    server = ModelServer(address, authkey=b"test", models=ModelRegistry(mode="lazy"))
+
+    def total(batch, scale=1.0):
+        return float(batch.sum() * scale)
+
+    def not_ready():
+        raise ModelNotReady("classifier", "loading")
+
+    server.handlers["total"] = total
+    server.handlers["not_ready"] = not_ready
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = ModelServerClient(address, authkey=b"test", connect_seconds=5)
+    yield client
+    client.segments.close()
+
+
+def test_arrays_go_through_shared_memory(server_client):
+    batch = np.ones((2, 224, 224, 3), dtype=np.float32)
+
+    assert server_client.call("total", {"batch": batch}, scale=0.5) == batch.size * 0.5
+    # The segment is returned to the pool and reused
+    assert len(server_client.segments._idle) == 1
+    server_client.call("total", {"batch": batch[:1]})
+    assert len(server_client.segments._idle) == 1
+
+
+def test_concurrent_calls(server_client):
+    results = []
+
+    def worker(i):
+        batch = np.full((1, 64, 64, 1), i, dtype=np.float32)
+        results.append((i, server_client.call("total", {"batch": batch})))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == [(i, float(i * 64 * 64)) for i in range(8)]
+
+
+def test_errors_are_propagated(server_client):
+    with pytest.raises(ModelNotReady):
+        server_client.call("not_ready")
+
+    with pytest.raises(RuntimeError):
+        server_client.call("total", {"batch": np.zeros(3)}, unknown=1)
+
+
+def test_generated_authkey_is_private(tmp_path):
+    address = str(tmp_path / "run" / "models.sock")
+    server = ModelServer(address, authkey=None, models=ModelRegistry(mode="lazy"))
+    server.handlers["total"] = lambda batch: float(batch.sum())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = ModelServerClient(address, authkey=None, connect_seconds=5)
+    try:
+        assert client.call("total", {"batch": np.ones(4, dtype=np.float32)}) == 4.0
+    finally:
+        client.segments.close()
+
+    assert os.stat(tmp_path / "run").st_mode & 0o777 == 0o700
+    assert os.stat(tmp_path / "run" / "authkey").st_mode & 0o777 == 0o600
+
+
+def test_refuses_shared_socket_directory(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+
+    with pytest.raises(PermissionError):
+        private_socket_dir(str(shared / "models.sock"))
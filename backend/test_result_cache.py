@@ -0,0 +1,85 @@
+import pytest
+
+from utils import decoded_xray, result_cache, tflite_engine
+from utils.result_cache import MemoryBackend, ResultCache, SqliteBackend, model_version
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries=2, ttl=60):
+        if request.param == "memory":
+            return MemoryBackend(max_entries=max_entries, ttl=ttl)
+        return SqliteBackend(str(tmp_path / "results.sqlite3"), max_entries=max_entries, ttl=ttl)
+    return make
+
+
+def test_version_tracks_runtime_and_decode_settings(monkeypatch):
+    monkeypatch.setenv("IMAGE_MODEL_VERSION", "v1")
+    base = model_version()
+
+    monkeypatch.setattr(tflite_engine, "IMAGE_RUNTIME", "tflite")
+    tflite = model_version()
+    monkeypatch.setattr(decoded_xray, "DECODE_MODE", "draft")
+    draft = model_version()
+
+    assert base.startswith("v1-")
+    assert len({base, tflite, draft}) == 3
+
+
+def test_lru_bound(make_backend, clock):
+    backend = make_backend(max_entries=2)
+    backend.put("a", {"v": 1})
+    backend.put("b", {"v": 2})
+    assert backend.get("a") == {"v": 1}     # a is now most recent
+    backend.put("c", {"v": 3})
+
+    assert len(backend) == 2
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": 1}
+    assert backend.get("c") == {"v": 3}
+
+
+def test_ttl_expiry(make_backend, clock):
+    backend = make_backend(ttl=60)
+    backend.put("a", {"v": 1})
+
+    clock.now += 30
+    assert backend.get("a") == {"v": 1}
+    clock.now += 31
+    assert backend.get("a") is None
+
+
+def test_hit_and_miss_counters(make_backend, clock):
+    cache = ResultCache(make_backend(), version="v")
+    assert cache.get("hash") is None
+    cache.put("hash", {"image_prediction": "NORMAL"})
+    assert cache.get("hash") == {"image_prediction": "NORMAL"}
+    assert cache.get("hash") is not None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.6667)
+    assert stats["entries"] == 1
+
+
+def test_disabled_cache_counts_nothing():
+    cache = ResultCache(None, version="v")
+    cache.put("hash", {"v": 1})
+
+    assert cache.get("hash") is None
+    assert cache.stats()["misses"] == 0
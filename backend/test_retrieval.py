@@ -0,0 +1,64 @@
+from chatbot import retrieval
+
+DOCS = """Project Name: Smart HealthAI
+
+This system detects pneumonia using chest X-ray images.
+Grad-CAM highlights lung regions influencing the model's decision.
+
+Recommendations are confidence-based and non-prescriptive.
+"""
+
+
+def test_chunks_keep_whole_sentences():
+    chunks = retrieval.chunk_text(DOCS, max_words=10)
+
+    assert "This system detects pneumonia using chest X-ray images." in chunks
+    assert all(len(c.split()) <= 10 for c in chunks)
+
+
+def test_direct_answer_and_context():
+    index = retrieval.RetrievalIndex.build(DOCS, max_words=10)
+
+    matches = index.search("what does grad-cam highlight")
+    assert retrieval.direct_answer("what does grad-cam highlight", matches).startswith("Grad-CAM highlights")
+
+    matches = index.search("is pneumonia contagious")
+    assert retrieval.direct_answer("is pneumonia contagious", matches) is None
+    assert "detects pneumonia" in retrieval.context_block(matches)
+
+    assert index.metrics()["queries"] == 2
+
+
+def test_direct_answers_on_the_project_docs():
+    with open(retrieval.DOCS_PATH, encoding="utf-8") as f:
+        index = retrieval.RetrievalIndex.build(f.read())
+
+    def answer(question):
+        return retrieval.direct_answer(question, index.search(question))
+
+    assert answer("What is Grad-CAM?").startswith("Grad-CAM highlights lung regions")
+    assert answer("how does the system detect pneumonia").startswith("This system detects pneumonia")
+    assert answer("what are recommendations").startswith("Recommendations are confidence-based")
+
+    # Sharing the question's terms is not answering it
+    assert answer("what is a chest x-ray") is None
+    assert answer("what is pneumonia") is None
+    assert answer("is pneumonia contagious") is None
+    assert answer("does the system give medication advice") is None
+
+
+def test_index_is_persisted(tmp_path):
+    docs = tmp_path / "docs.txt"
+    docs.write_text(DOCS, encoding="utf-8")
+    path = str(tmp_path / "index.json")
+
+    built = retrieval.load_index(str(docs), path)
+    loaded = retrieval.load_index(str(docs), path)
+
+    assert not built.loaded_from_disk
+    assert loaded.loaded_from_disk
+    assert loaded.chunks == built.chunks
+
+    # Changing the docs invalidates the saved index
+    docs.write_text(DOCS + "\nNew paragraph.", encoding="utf-8")
+    assert not retrieval.load_index(str(docs), path).loaded_from_disk
@@ -0,0 +1,65 @@
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from chatbot.fake_llm_server import start_fake_server
+from chatbot.llm_client import FakeClient
+from chatbot.stream_client import AsyncStreamingClient, UpstreamBusy
+
+MESSAGES = [{"role": "user", "content": "what is pneumonia"}]
+
+
+@pytest.fixture
+def fake_server():
+    server, url = start_fake_server(token_delay=0.01)
+    yield server, url
+    server.shutdown()
+
+
+def test_tokens_arrive_in_order(fake_server):
+    _, url = fake_server
+    client = AsyncStreamingClient(base_url=url)
+
+    tokens = list(client.stream(MESSAGES))
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == FakeClient().complete(MESSAGES)
+    assert client.complete(MESSAGES) == "".join(tokens)
+    assert client.metrics()["in_flight"] == 0
+    client.close()
+
+
+def test_upstream_concurrency_is_bounded(fake_server):
+    server, url = fake_server
+    server.first_token_delay = 0.5
+    client = AsyncStreamingClient(base_url=url, max_concurrency=1, queue_timeout=0.1)
+
+    slow = threading.Thread(target=lambda: list(client.stream(MESSAGES)))
+    slow.start()
+    deadline = time.monotonic() + 5
+    while client.in_flight == 0:
+        assert time.monotonic() < deadline, "slow stream never started"
+        time.sleep(0.005)
+
+    with pytest.raises(UpstreamBusy):
+        list(client.stream(MESSAGES))
+
+    slow.join()
+    assert client.metrics()["rejected"] == 1
+    client.close()
+
+
+def test_stream_timeout(fake_server):
+    server, url = fake_server
+    server.first_token_delay = 1.0
+    client = AsyncStreamingClient(base_url=url, stream_timeout=0.2)
+
+    with pytest.raises(Exception):
+        list(client.stream(MESSAGES))
+
+    assert client.metrics()["errors"] == 1
+    assert client.metrics()["in_flight"] == 0
+    client.close()
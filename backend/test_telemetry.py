@@ -0,0 +1,46 @@
+import pytest
+
+from utils import telemetry
+from utils.execution import RequestGraph
+
+
+def test_histogram_exposition():
+    registry = telemetry.MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5.0, stage="a")
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+
+
+def test_stages_nest_under_the_request(monkeypatch):
+    exported = []
+
+    class Collect:
+        def export(self, span):
+            exported.append(span)
+
+    monkeypatch.setattr(telemetry, "exporter", Collect())
+
+    trace = telemetry.RequestTrace("diagnose", "POST", "/diagnose")
+    graph = RequestGraph()
+    graph.submit("text", "predict_text", lambda: "ok").result()
+    with pytest.raises(ValueError):
+        graph.timed("validator", int, "not a number")
+    total = trace.finish(200)
+
+    spans = {s.name: s for s in exported}
+    root = spans["POST diagnose"]
+    assert spans["predict_text"].parent_id == root.span_id
+    assert spans["predict_text"].trace_id == root.trace_id
+    assert spans["validator"].error is not None
+
+    header = trace.server_timing(total)
+    assert header.startswith("predict_text;dur=")
+    assert "validator;dur=" in header and "total;dur=" in header
@@ -0,0 +1,50 @@
+import pytest
+
+from utils import validation_token
+from utils.validation_token import issue_token, verify_token
+
+HASH = "a" * 64
+
+
+def test_round_trip():
+    assert verify_token(issue_token(HASH, 0.87654321), HASH) == 0.876543
+
+
+def test_expired_token(monkeypatch):
+    token = issue_token(HASH, 0.9, ttl=60)
+    now = validation_token.time.time()
+    monkeypatch.setattr(validation_token.time, "time", lambda: now + 61)
+
+    assert verify_token(token, HASH) is None
+
+
+def test_tampered_signature():
+    payload, sig = issue_token(HASH, 0.9).split(".")
+    flipped = ("B" if sig[0] == "A" else "A") + sig[1:]
+
+    assert verify_token(f"{payload}.{flipped}", HASH) is None
+
+
+def test_tampered_payload():
+    forged = issue_token(HASH, 0.99).split(".")[0]
+    sig = issue_token(HASH, 0.1).split(".")[1]
+
+    assert verify_token(f"{forged}.{sig}", HASH) is None
+
+
+def test_other_secret(monkeypatch):
+    token = issue_token(HASH, 0.9)
+    monkeypatch.setattr(validation_token, "TOKEN_SECRET", b"another worker")
+
+    assert verify_token(token, HASH) is None
+
+
+def test_content_hash_mismatch():
+    assert verify_token(issue_token(HASH, 0.9), "b" * 64) is None
+
+
+@pytest.mark.parametrize("token", [
+    None, "", "no-dot", ".", "a.b.c", "!!!.???", "é.é", issue_token(HASH, 0.9) + "x",
+])
+def test_malformed_tokens(token):
+    assert verify_token(token, HASH) is None
@@ -0,0 +1,292 @@
+import os
+import time
+import uuid
+import mimetypes
+import threading
+from collections import OrderedDict
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "disk")   # memory | disk | s3
+
+ARTIFACT_MEMORY_MAX_BYTES = int(os.getenv("ARTIFACT_MEMORY_MAX_BYTES", str(256 * 1024 * 1024)))
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+ARTIFACT_DISK_MAX_BYTES = int(os.getenv("ARTIFACT_DISK_MAX_BYTES", str(2 * 1024 ** 3)))
+ARTIFACT_MAX_AGE_SECONDS = float(os.getenv("ARTIFACT_MAX_AGE_SECONDS", str(24 * 3600)))
+ARTIFACT_SWEEP_SECONDS = float(os.getenv("ARTIFACT_SWEEP_SECONDS", "60"))
+
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "smart-healthai-artifacts")
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT")   # e.g. http://localhost:9000 (MinIO)
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "")
+
+# Artifacts are referenced by URL path, served by /artifacts/<key>
+URL_PREFIX = "artifacts/"
+
+
+def content_type_for(key):
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+def is_report_spec(key):
+    """
+    Report specs ("report/<id>.json") are the only copy of a report's
+    data (the PDF is re-rendered from them), so size-based eviction
+    takes them last.
+    """
+    key = key.replace(os.sep, "/")
+    return key.startswith("report/") and key.endswith(".json")
+
+
+# =========================================================
+# BASE STORE
+# =========================================================
+
+class ArtifactStore:
+    """
+    Stores Grad-CAM overlays and PDF reports.
+
+    Callers work with refs ("artifacts/gradcam/gradcam_<id>.png"), which
+    double as the URL path the frontend fetches. Backends implement
+    _put / _get / _exists / _delete on the bare key.
+    """
+
+    def save(self, kind, ext, data, content_type=None):
+        key = f"{kind}/{kind}_{uuid.uuid4().hex}{ext}"
+        self.put(key, data, content_type)
+        return URL_PREFIX + key
+
+    def put(self, key, data, content_type=None):
+        self._put(key, data, content_type or content_type_for(key))
+
+    def get(self, key):
+        return self._get(key)
+
+    def load(self, ref):
+        return self._get(self.key_for(ref))
+
+    def exists(self, ref):
+        return self._exists(self.key_for(ref))
+
+    def delete(self, ref):
+        self._delete(self.key_for(ref))
+
+    @staticmethod
+    def key_for(ref):
+        ref = ref.replace(os.sep, "/").lstrip("/")
+        return ref[len(URL_PREFIX):] if ref.startswith(URL_PREFIX) else ref
+
+
+# =========================================================
+# IN-MEMORY LRU
+# =========================================================
+
+class MemoryArtifactStore(ArtifactStore):
+    """
+    Hot artifacts in process memory, evicted LRU by total size.
+    """
+
+    def __init__(self, max_bytes=ARTIFACT_MEMORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _put(self, key, data, content_type):
+        with self._lock:
+            if key in self._data:
+                self._bytes -= len(self._data.pop(key))
+            self._data[key] = data
+            self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep):
+        # Oldest first, report specs only once nothing else is left
+        for specs in (False, True):
+            for key in [k for k in self._data if k != keep and is_report_spec(k) == specs]:
+                if self._bytes <= self.max_bytes:
+                    return
+                self._bytes -= len(self._data.pop(key))
+
+    def _get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is not None:
+                self._data.move_to_end(key)
+            return data
+
+    def _exists(self, key):
+        return key in self._data
+
+    def _delete(self, key):
+        with self._lock:
+            data = self._data.pop(key, None)
+            if data is not None:
+                self._bytes -= len(data)
+
+
+# =========================================================
+# LOCAL DISK WITH SIZE / AGE EVICTION
+# =========================================================
+
+class DiskArtifactStore(ArtifactStore):
+    """
+    Files under ARTIFACT_DIR. Every ARTIFACT_SWEEP_SECONDS a sweep
+    deletes files older than max_age and then the oldest files until
+    the directory is under max_bytes, report specs last.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, max_bytes=ARTIFACT_DISK_MAX_BYTES,
+                 max_age=ARTIFACT_MAX_AGE_SECONDS, sweep_every=ARTIFACT_SWEEP_SECONDS):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_every = sweep_every
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid artifact key: {key}")
+        return path
+
+    def _put(self, key, data, content_type):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        if time.time() - self._last_sweep > self.sweep_every:
+            self.sweep()
+
+    def _get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _exists(self, key):
+        try:
+            return os.path.exists(self._path(key))
+        except ValueError:
+            return False
+
+    def _delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def sweep(self):
+        with self._lock:
+            self._last_sweep = now = time.time()
+
+            files = []
+            for dirpath, _, names in os.walk(self.root):
+                for name in names:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+
+            # Expired files first, then oldest first with report specs last
+            files.sort(key=lambda f: (
+                now - f[0] <= self.max_age,
+                is_report_spec(os.path.relpath(f[2], self.root)),
+                f[0],
+            ))
+            total = sum(size for _, size, _ in files)
+            removed = 0
+
+            for mtime, size, path in files:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+            return removed
+
+
+# =========================================================
+# S3-COMPATIBLE (AWS S3 / MinIO)
+# =========================================================
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Any S3-compatible endpoint (set ARTIFACT_S3_ENDPOINT for MinIO).
+    Credentials come from the usual AWS_* environment variables.
+    Retention is left to the bucket's lifecycle rules.
+    """
+
+    def __init__(self, bucket=ARTIFACT_S3_BUCKET, endpoint_url=ARTIFACT_S3_ENDPOINT,
+                 prefix=ARTIFACT_S3_PREFIX, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _put(self, key, data, content_type):
+        self.client.put_object(
+            Bucket=self.bucket, Key=self.prefix + key, Body=data, ContentType=content_type
+        )
+
+    def _get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+        except Exception:
+            return None
+
+    def _exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except Exception:
+            return False
+
+    def _delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+# =========================================================
+# SHARED INSTANCE
+# =========================================================
+
+def create_artifact_store(kind=ARTIFACT_STORE):
+    if kind == "memory":
+        return MemoryArtifactStore()
+    if kind == "disk":
+        return DiskArtifactStore()
+    if kind == "s3":
+        return S3ArtifactStore()
+    raise ValueError(f"Unknown ARTIFACT_STORE: {kind}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_artifact_store()
+    return _store
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import subprocess
+import numpy as np
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+SPEECH_CHUNK_SECONDS = float(os.getenv("SPEECH_CHUNK_SECONDS", "30"))
+
+# Each chunk ends at the quietest 20 ms frame within this many seconds
+# before the hard limit, so words are not split across chunks
+SPEECH_CUT_WINDOW_SECONDS = float(os.getenv("SPEECH_CUT_WINDOW_SECONDS", "3"))
+CUT_FRAME_SECONDS = 0.02
+
+SAMPLE_RATE = 16000
+
+
+# =========================================================
+# IN-MEMORY AUDIO DECODING
+# =========================================================
+# No model imports here: thin web workers (MODEL_SERVER=unix) decode
+# audio themselves and only ship PCM to the model server.
+
+def read_bytes(audio_file):
+    if isinstance(audio_file, (bytes, bytearray)):
+        return bytes(audio_file)
+    data = audio_file.read()
+    if hasattr(audio_file, "seek"):
+        audio_file.seek(0)
+    return data
+
+
+def needs_seekable_input(audio_bytes):
+    """
+    MP4 / M4A / MOV / 3GP (ISO BMFF) files may keep their index (moov
+    atom) at the end, which ffmpeg cannot reach through a pipe.
+    """
+    return audio_bytes[4:8] == b"ftyp"
+
+
+def _run_ffmpeg(source, sr, audio_bytes=None):
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", source,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+        "pipe:1",
+    ]
+    return subprocess.run(cmd, input=audio_bytes, capture_output=True, check=True).stdout
+
+
+def decode_audio(audio_bytes, sr=SAMPLE_RATE):
+    """
+    Decode any ffmpeg-readable audio to mono float32 PCM at `sr` Hz.
+
+    Piped through ffmpeg's stdin/stdout when possible; formats that need
+    seeking (and pipe failures) go through a temp file instead.
+    """
+    try:
+        if needs_seekable_input(audio_bytes):
+            out = _decode_via_file(audio_bytes, sr)
+        else:
+            try:
+                out = _run_ffmpeg("pipe:0", sr, audio_bytes)
+            except subprocess.CalledProcessError:
+                out = _decode_via_file(audio_bytes, sr)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def _decode_via_file(audio_bytes, sr):
+    with tempfile.NamedTemporaryFile(suffix=".audio") as tmp:
+        tmp.write(audio_bytes)
+        tmp.flush()
+        return _run_ffmpeg(tmp.name, sr)
+
+
+# =========================================================
+# CHUNKING (CUT ON SILENCE)
+# =========================================================
+
+def _quietest_point(audio, lo, hi, sr):
+    frame = max(1, int(CUT_FRAME_SECONDS * sr))
+    n = (hi - lo) // frame
+    if n < 2:
+        return hi
+    energy = np.square(audio[lo:lo + n * frame].reshape(n, frame)).mean(axis=1)
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+
+def iter_chunks(audio, chunk_seconds=SPEECH_CHUNK_SECONDS, sr=SAMPLE_RATE,
+                cut_window_seconds=SPEECH_CUT_WINDOW_SECONDS):
+    """
+    Chunks of at most `chunk_seconds`, each cut at the quietest point of
+    its last `cut_window_seconds`.
+    """
+    step = max(1, int(chunk_seconds * sr))
+    window = min(int(cut_window_seconds * sr), step // 2)
+
+    start = 0
+    while len(audio) - start > step:
+        end = start + step
+        cut = _quietest_point(audio, end - window, end, sr) if window > 0 else end
+        yield audio[start:cut]
+        start = cut
+
+    if start < len(audio):
+        yield audio[start:]
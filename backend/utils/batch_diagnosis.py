@@ -0,0 +1,238 @@
+import os
+import csv
+import json
+import time
+import shutil
+import zipfile
+
+from utils import decoded_xray
+from utils.decoded_xray import DecodedXray, ImageTooLarge
+from utils.recommendation import generate_medical_recommendation
+from utils.report_utils import generate_patient_report
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+BATCH_SIZE = int(os.getenv("BATCH_DIAGNOSIS_SIZE", "32"))
+
+# Result files (reports/batch_*.jsonl|csv) older than this are deleted
+BATCH_RESULT_TTL_SECONDS = float(os.getenv("BATCH_RESULT_TTL_SECONDS", str(24 * 3600)))
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+CSV_FIELDS = [
+    "study", "valid", "validator_confidence", "image_prediction",
+    "image_confidence", "recommendation", "gradcam_image", "report_path", "error",
+]
+
+
+# =========================================================
+# INPUT SOURCES (one image in memory at a time)
+# =========================================================
+# Sources yield (name, bytes), or (name, ImageTooLarge) for a member
+# over MAX_UPLOAD_BYTES, which is skipped without being read and
+# reported as that study's error.
+
+def _is_image(name):
+    base = os.path.basename(name)
+    return name.lower().endswith(IMAGE_EXTS) and not base.startswith(".")
+
+
+def _too_large(size):
+    if size > decoded_xray.MAX_UPLOAD_BYTES:
+        return ImageTooLarge(f"Image is {size} bytes; the limit is {decoded_xray.MAX_UPLOAD_BYTES}")
+    return None
+
+
+def iter_zip(fileobj):
+    """
+    Yields (name, bytes) for each image in a zip archive, reading one
+    member at a time so memory does not grow with the archive size.
+    Oversized members are checked against their declared size (zipfile
+    never inflates past it) and skipped before decompression.
+    """
+    with zipfile.ZipFile(fileobj) as zf:
+        for info in zf.infolist():
+            if not info.is_dir() and _is_image(info.filename):
+                yield info.filename, _too_large(info.file_size) or zf.read(info)
+
+
+def iter_directory(path):
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if _is_image(name):
+                full = os.path.join(root, name)
+                error = _too_large(os.path.getsize(full))
+                if error is not None:
+                    yield os.path.relpath(full, path), error
+                    continue
+                with open(full, "rb") as f:
+                    yield os.path.relpath(full, path), f.read()
+
+
+def iter_uploads(files):
+    for f in files:
+        yield f.filename, f.read()
+
+
+def spool_uploads(archive, images, path):
+    """
+    Saves the request's archive (or its individual images, stored into a
+    new zip) to `path`, so a background job can read it after the request
+    has returned. Returns `path`; read it back with iter_zip().
+    """
+    if archive is not None:
+        archive.save(path)
+        return path
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for f in images:
+            with zf.open(f.filename, "w") as member:
+                shutil.copyfileobj(f.stream, member)
+    return path
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# =========================================================
+# RESULT WRITERS
+# =========================================================
+
+class ResultWriter:
+    """
+    Appends one record per study to a .jsonl or .csv file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "w", newline="", encoding="utf-8")
+
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self.format == "csv":
+            self._csv.writerow(record)
+        else:
+            self._f.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._f.close()
+
+
+# =========================================================
+# BATCH PIPELINE
+# =========================================================
+
+def diagnose_batch(items, validator, classifier, writer,
+                   batch_size=BATCH_SIZE, with_reports=False):
+    """
+    Streams (name, bytes) items through the validator and classifier in
+    batches of `batch_size`, runs Grad-CAM only for PNEUMONIA results
+    and writes one record per study. Each image is decoded once and only
+    its model-sized tensors are kept for the rest of its batch.
+
+    validator / classifier are the chest_utils / image_utils modules.
+    Returns a summary with throughput in images/sec.
+    """
+    started = time.perf_counter()
+    counts = {"images": 0, "invalid": 0, "pneumonia": 0, "errors": 0}
+
+    for chunk in _chunks(items, batch_size):
+        records, xrays = [], []
+
+        for name, data in chunk:
+            record = {"study": name}
+            if isinstance(data, ImageTooLarge):
+                record["error"] = f"skipped: {data}"
+                counts["errors"] += 1
+                records.append(record)
+                continue
+            try:
+                xray = DecodedXray(data)
+                # Build every model input now (decode errors surface here),
+                # then drop the native-resolution decode so a chunk only
+                # holds small tensors
+                xray.grayscale_tensor(validator.IMG_SIZE)
+                xray.rgb_tensor(classifier.IMG_SIZE)
+                xray.bgr_overlay_base(classifier.IMG_SIZE)
+                xray.release()
+                xrays.append((record, xray))
+            except Exception as e:
+                record["error"] = f"decode failed: {e}"
+                counts["errors"] += 1
+            records.append(record)
+
+        if xrays:
+            scores = validator.score_batch([x for _, x in xrays])
+            valid = []
+            for (record, xray), score in zip(xrays, scores):
+                record["valid"] = bool(score > validator.THRESHOLD)
+                record["validator_confidence"] = round(float(score), 4)
+                if record["valid"]:
+                    valid.append((record, xray))
+                else:
+                    counts["invalid"] += 1
+
+            predictions = classifier.predict_batch([x for _, x in valid])
+            positives = []
+            for (record, xray), (label, confidence) in zip(valid, predictions):
+                record["image_prediction"] = label
+                record["image_confidence"] = confidence
+                record["recommendation"] = generate_medical_recommendation(label, confidence)
+
+                if label == "PNEUMONIA":
+                    positives.append((record, xray))
+
+            # One batched Grad-CAM pass for all positives in the chunk
+            counts["pneumonia"] += len(positives)
+            paths = classifier.generate_gradcam_batch([x for _, x in positives], output="path")
+            for (record, _), path in zip(positives, paths):
+                record["gradcam_image"] = path
+
+            if with_reports:
+                for record, _ in valid:
+                    record["report_path"] = generate_patient_report(record)
+
+        for record in records:
+            writer.write(record)
+        counts["images"] += len(records)
+
+    elapsed = time.perf_counter() - started
+    return dict(
+        counts,
+        seconds=round(elapsed, 3),
+        images_per_sec=round(counts["images"] / elapsed, 2) if elapsed else 0.0,
+        output=writer.path,
+    )
+
+
+def sweep_results(directory="reports", ttl=BATCH_RESULT_TTL_SECONDS):
+    """
+    Deletes batch result files (and leftover spooled uploads) older than
+    `ttl` seconds. Returns the number of files removed.
+    """
+    cutoff = time.time() - ttl
+    removed = 0
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        path = os.path.join(directory, name)
+        if name.startswith("batch_") and os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
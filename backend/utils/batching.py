@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+BATCHING_ENABLED = os.getenv("IMAGE_BATCHING", "0") == "1"
+MAX_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_MAX_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("IMAGE_BATCH_MAX_WAIT_MS", "5"))
+
+WAIT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 250, 500]
+
+# name → MicroBatcher, for metrics
+BATCHERS = {}
+
+
+# =========================================================
+# DYNAMIC MICRO-BATCHER
+# =========================================================
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-image requests into one batched call.
+
+    Callers submit a (1, H, W, C) array and get a Future back. A worker
+    thread collects pending items until MAX_BATCH_SIZE is reached or the
+    oldest item has waited MAX_WAIT_MS, runs run_batch() once on the
+    stacked tensor and resolves each caller's future with its own result.
+
+    run_batch(batch) must return one result per row of the batch.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = {}
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_count = 0
+        self._wait_sum_ms = 0.0
+        self._wait_max_ms = 0.0
+
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+        BATCHERS[name] = self
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    # -------------------------
+    # Worker
+    # -------------------------
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = pending[0][2] + self.max_wait
+
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            started = time.perf_counter()
+            self._record(len(pending), [started - p[2] for p in pending])
+
+            try:
+                batch = np.concatenate([p[0] for p in pending], axis=0)
+                results = self.run_batch(batch)
+            except Exception as e:
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+
+            results = list(results)
+            for i, (_, future, _) in enumerate(pending):
+                if i < len(results):
+                    future.set_result(results[i])
+                else:
+                    future.set_exception(RuntimeError(
+                        f"Batcher '{self.name}' got {len(results)} results for {len(pending)} items"
+                    ))
+
+    # -------------------------
+    # Metrics
+    # -------------------------
+    def _record(self, batch_size, waits):
+        with self._lock:
+            self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+            for wait in waits:
+                wait_ms = wait * 1000.0
+                idx = next((i for i, b in enumerate(WAIT_BUCKETS_MS) if wait_ms <= b), len(WAIT_BUCKETS_MS))
+                self._wait_buckets[idx] += 1
+                self._wait_count += 1
+                self._wait_sum_ms += wait_ms
+                self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+
+    def metrics(self):
+        with self._lock:
+            labels = [f"<={b}ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {
+                    "count": self._wait_count,
+                    "mean": round(self._wait_sum_ms / self._wait_count, 3) if self._wait_count else 0.0,
+                    "max": round(self._wait_max_ms, 3),
+                    "histogram": dict(zip(labels, self._wait_buckets)),
+                },
+            }
+
+
+def batching_metrics():
+    return {name: b.metrics() for name, b in BATCHERS.items()}
@@ -1,37 +1,98 @@
 import numpy as np
-from PIL import Image
-import io
 import tensorflow as tf
 
-# Load model once
-MODEL_PATH = "models/image_model.h5"
-model = tf.keras.models.load_model(MODEL_PATH)
+from utils.decoded_xray import as_decoded_xray
+from utils.inference_engine import InferenceEngine
+from utils.batching import BATCHING_ENABLED, MicroBatcher
+from utils.tflite_engine import IMAGE_RUNTIME, TFLiteEngine, tflite_path
+
+# =========================================================
+# CHEST X-RAY VALIDATOR SERVICE
+# =========================================================
+# The single shared validator for /validate-image and /diagnose.
+# utils/chest_validator.py re-exports this module; the model is loaded
+# once per process.
+#
+# Score convention (the only one used in this codebase):
+#   score = sigmoid output of models/image_model.h5
+#         = probability that the image IS a chest X-ray
+#   chest X-ray  ⇔  score > THRESHOLD
 
+MODEL_PATH = "models/image_model.h5"
 IMG_SIZE = 224
+THRESHOLD = 0.5   # Adjust only if retraining
 
-def is_chest_xray(file):
+# Compiled single-output forward pass (no predict() overhead),
+# or the converted TFLite model when IMAGE_RUNTIME=tflite
+if IMAGE_RUNTIME == "tflite":
+    model = None
+    engine = TFLiteEngine(tflite_path("validator"))
+else:
+    # Load model once
+    model = tf.keras.models.load_model(MODEL_PATH)
+    model.trainable = False
+    engine = InferenceEngine(model)
+engine.warmup()
+
+# Optional request coalescing under concurrent load (IMAGE_BATCHING=1)
+batcher = MicroBatcher("validator", engine.predict) if BATCHING_ENABLED else None
+
+
+def preprocess_image(image_file):
     """
-    Returns:
-      (True, confidence)  → Chest X-ray
-      (False, confidence) → Non-chest (MRI / CT / other)
+    Preprocess input image exactly as during training:
+    - Convert to GRAYSCALE
+    - Resize to 224x224
+    - Normalize to [0,1]
+    - Shape: (1, 224, 224, 1)
+    """
+    return as_decoded_xray(image_file).grayscale_tensor(IMG_SIZE)
+
+
+def score_batch(images):
+    """
+    Scores many images in one forward pass.
+
+    Accepts uploaded files / DecodedXray objects, or an already
+    preprocessed (N, 224, 224, 1) array. Returns (N,) scores.
     """
+    if isinstance(images, np.ndarray):
+        batch = images
+    else:
+        batch = np.concatenate([preprocess_image(img) for img in images], axis=0)
+
+    return engine.predict(batch)
+
+
+def score_tensor(batch):
+    """
+    (N, 224, 224, 1) preprocessed array → (N,) scores. Single images go
+    through the micro-batcher when enabled.
+    """
+    if batcher is not None and len(batch) == 1:
+        return np.array([batcher(batch)], dtype=np.float32)
+    return engine.predict(batch)
 
-    # Read bytes safely
-    image_bytes = io.BytesIO(file.read())
-    file.seek(0)
 
-    # Preprocess
-    image = Image.open(image_bytes).convert("L")
-    image = image.resize((IMG_SIZE, IMG_SIZE))
+def score(image_file):
+    """
+    Chest X-ray probability for one image (file or DecodedXray).
+    """
+    return float(score_tensor(preprocess_image(image_file))[0])
 
-    img_array = np.array(image, dtype=np.float32) / 255.0
-    img_array = np.expand_dims(img_array, axis=(0, -1))
 
-    # Predict
-    pred = float(model.predict(img_array, verbose=0)[0][0])
+def is_chest_xray(file):
+    """
+    Accepts an uploaded file or a DecodedXray.
+
+    Returns:
+      (True, confidence)  → Chest X-ray
+      (False, confidence) → Non-chest (MRI / CT / other)
+    """
+    pred = score(file)
 
     # 🔴 CONFIDENCE-BASED REJECTION (THIS IS THE KEY)
-    if pred > 0.50:
-      return True, pred       # Chest X-ray
+    if pred > THRESHOLD:
+        return True, pred       # Chest X-ray
     else:
-      return False, pred      # Non-chest
+        return False, pred      # Non-chest
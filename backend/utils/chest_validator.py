@@ -1,50 +1,24 @@
-import tensorflow as tf
-import numpy as np
-from PIL import Image
+from utils import chest_utils
+from utils.chest_utils import (
+    MODEL_PATH,
+    IMG_SIZE,
+    THRESHOLD,
+    model,
+    preprocess_image,
+    score,
+    score_batch,
+)
 
 # ============================
-# Load Chest X-ray Validator
+# Chest X-ray Validator (compatibility wrapper)
 # ============================
+# Kept for existing imports. The model, preprocessing and threshold live
+# in utils/chest_utils.py so only one copy of the network is loaded.
+#
+# NOTE: scores follow the shared convention — HIGHER score means chest
+# X-ray (score > THRESHOLD). The old "lower means chest" rule in this
+# module did not match models/image_model.h5 as used by the app.
 
-MODEL_PATH = "models/image_model.h5"
-
-try:
-    model = tf.keras.models.load_model(MODEL_PATH)
-    model.trainable = False
-except Exception as e:
-    raise RuntimeError(f"❌ Failed to load chest X-ray validator model: {e}")
-
-# ============================
-# Configuration
-# ============================
-
-IMG_SIZE = 224
-THRESHOLD = 0.5   # Adjust only if retraining
-
-# ============================
-# Image Preprocessing
-# ============================
-
-def preprocess_image(image_file):
-    """
-    Preprocess input image exactly as during training:
-    - Convert to GRAYSCALE
-    - Resize to 224x224
-    - Normalize to [0,1]
-    - Shape: (1, 224, 224, 1)
-    """
-    image = Image.open(image_file).convert("L")  # GRAYSCALE
-    image = image.resize((IMG_SIZE, IMG_SIZE))
-
-    img_array = np.array(image, dtype=np.float32) / 255.0
-    img_array = np.expand_dims(img_array, axis=-1)  # channel dim
-    img_array = np.expand_dims(img_array, axis=0)   # batch dim
-
-    return img_array
-
-# ============================
-# Chest X-ray Validation
-# ============================
 
 def validate_chest_xray(image_file):
     """
@@ -54,17 +28,7 @@ def validate_chest_xray(image_file):
     """
 
     try:
-        img = preprocess_image(image_file)
-        prediction = float(model.predict(img, verbose=0)[0][0])
-
-        # IMPORTANT:
-        # Most datasets map:
-        #   chest_xray -> 0
-        #   non_chest  -> 1
-        # So LOWER score means chest X-ray
-        is_chest_xray = prediction < THRESHOLD
-
-        return is_chest_xray, prediction
+        return chest_utils.is_chest_xray(image_file)
 
     except Exception as e:
         print(f"⚠️ Chest validation error: {e}")
@@ -0,0 +1,186 @@
+import io
+import os
+import hashlib
+import numpy as np
+import cv2
+from PIL import Image
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# DECODE_MODE=draft lets libjpeg decode JPEGs in the DCT domain at 1/2,
+# 1/4 or 1/8 scale — the smallest one still covering the model input —
+# instead of decoding a 3000×2500 export only to resize it to 224×224.
+# DECODE_MODE=full (the default) decodes at native resolution, exactly as
+# the training preprocessing did. Draft decoding shifts the model inputs
+# slightly (see `python -m benchmarks --only decode`); enable it only once
+# prediction drift on a labelled sample set is acceptable.
+#
+# Grad-CAM overlays are decoded separately at GRADCAM_DECODE_SIZE
+# (0 = native resolution), so the large decode only happens for the
+# images that actually get an overlay.
+
+DECODE_MODE = os.getenv("DECODE_MODE", "full")
+GRADCAM_DECODE_SIZE = int(os.getenv("GRADCAM_DECODE_SIZE", "0"))
+
+# Checked before any pixel data is decoded
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(40_000_000)))
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+# =========================================================
+# DECODED X-RAY (ONE DECODE PER REQUEST)
+# =========================================================
+
+class DecodedXray:
+    """
+    Holds the raw upload bytes and decodes them at most once.
+
+    Model inputs are derived lazily from the shared decode and cached
+    (the decode itself is reduced-resolution in DECODE_MODE=draft):
+      - grayscale_tensor(size) → (1, size, size, 1) for the chest validator
+      - rgb_tensor(size)       → (1, size, size, 3) for the pneumonia model
+      - bgr_overlay_base(size) → (size, size, 3) uint8 for Grad-CAM overlay
+
+    `features` holds model outputs attached to this image (e.g. last-conv
+    activations) so later stages can reuse them instead of recomputing.
+    """
+
+    def __init__(self, image_bytes, draft=None):
+        self.image_bytes = image_bytes
+        self.features = {}
+        self.draft = DECODE_MODE == "draft" if draft is None else draft
+        self._image = None
+        self._image_size = None     # min side requested for _image; None = native
+        self._hash = None
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, file):
+        """
+        Reads an upload and checks its limits right away, so oversized
+        images are rejected before any stage decodes them.
+        """
+        image_bytes = file.read()
+        file.seek(0)
+        xray = cls(image_bytes)
+        xray.check_limits()
+        return xray
+
+    @property
+    def content_hash(self):
+        """
+        SHA-256 of the raw upload bytes.
+        """
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.image_bytes).hexdigest()
+        return self._hash
+
+    def check_limits(self):
+        """
+        Enforces MAX_UPLOAD_BYTES and MAX_IMAGE_PIXELS using only the
+        image header. Returns the opened (not yet decoded) image.
+        """
+        if len(self.image_bytes) > MAX_UPLOAD_BYTES:
+            raise ImageTooLarge(
+                f"Image is {len(self.image_bytes)} bytes; the limit is {MAX_UPLOAD_BYTES}"
+            )
+
+        try:
+            img = Image.open(io.BytesIO(self.image_bytes))
+        except Image.DecompressionBombError as e:
+            raise ImageTooLarge(str(e)) from e
+
+        width, height = img.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ImageTooLarge(
+                f"Image is {width}x{height} pixels; the limit is {MAX_IMAGE_PIXELS} pixels"
+            )
+        return img
+
+    def decoded(self, min_size=None):
+        """
+        PIL image whose sides are at least `min_size` (or native size if
+        the source is smaller). None → native resolution.
+
+        Only one decode is kept: a later request for a larger one (e.g.
+        Grad-CAM) replaces it.
+        """
+        if not self.draft:
+            min_size = None
+
+        if self._image is not None and (
+            self._image_size is None or (min_size is not None and min_size <= self._image_size)
+        ):
+            return self._image
+
+        img = self.check_limits()
+        if min_size is not None and img.format == "JPEG":
+            img.draft(None, (min_size, min_size))
+        img.load()
+
+        self._image, self._image_size = img, min_size
+        return img
+
+    def release(self):
+        """
+        Drops the decoded image; cached tensors and the raw bytes stay.
+        A later stage that needs pixels again decodes once more.
+        """
+        self._image = self._image_size = None
+
+    @property
+    def image(self):
+        """
+        Native-resolution decode.
+        """
+        return self.decoded(None)
+
+    def _cached(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def grayscale_tensor(self, size):
+        # Same preprocessing as the validator training pipeline
+        def build():
+            img = self.decoded(size).convert("L").resize((size, size))
+            arr = np.array(img, dtype=np.float32) / 255.0
+            return np.expand_dims(arr, axis=(0, -1))
+
+        return self._cached(("gray", size), build)
+
+    def rgb_tensor(self, size):
+        # Matches keras load_img(target_size=...) → nearest-neighbour resize
+        def build():
+            img = self.decoded(size)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img = img.resize((size, size), Image.NEAREST)
+            arr = np.asarray(img, dtype=np.float32) / 255.0
+            return np.expand_dims(arr, axis=0)
+
+        return self._cached(("rgb", size), build)
+
+    def bgr_overlay_base(self, size):
+        def build():
+            source = max(size, GRADCAM_DECODE_SIZE) if GRADCAM_DECODE_SIZE else None
+            rgb = np.asarray(self.decoded(source).convert("RGB"))
+            bgr = np.ascontiguousarray(rgb[:, :, ::-1])
+            return cv2.resize(bgr, (size, size))
+
+        return self._cached(("bgr", size), build)
+
+
+def as_decoded_xray(image):
+    """
+    Accepts a DecodedXray or an uploaded file object.
+    """
+    if isinstance(image, DecodedXray):
+        return image
+    return DecodedXray.from_file(image)
@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import telemetry
+from utils.batching import BATCHING_ENABLED, MAX_BATCH_SIZE
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# One small pool per model family, so concurrent requests cannot pile
+# unbounded TF / torch work onto the CPU. Pair these with the intra-op
+# thread settings (TF_INTRA_OP_THREADS, TEXT_TORCH_THREADS) so that
+# pool size × intra-op threads stays within the available cores.
+
+# With IMAGE_BATCHING=1 the image pool must hold a full batch of waiting
+# requests, otherwise the MicroBatcher can never coalesce more than the
+# pool size; so it defaults to IMAGE_BATCH_MAX_SIZE there. Those workers
+# mostly block on the batcher, which makes one model call per batch.
+IMAGE_POOL_DEFAULT = max(2, MAX_BATCH_SIZE) if BATCHING_ENABLED else 2
+
+POOL_SIZES = {
+    "image": int(os.getenv("IMAGE_POOL_WORKERS", str(IMAGE_POOL_DEFAULT))),
+    "speech": int(os.getenv("SPEECH_POOL_WORKERS", "1")),
+    "text": int(os.getenv("TEXT_POOL_WORKERS", "2")),
+}
+
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "0") == "1"
+
+POOLS = {
+    name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"{name}-pool")
+    for name, size in POOL_SIZES.items()
+}
+
+
+# =========================================================
+# PER-REQUEST EXECUTION GRAPH
+# =========================================================
+
+class RequestGraph:
+    """
+    Runs independent branches of one request on the per-model pools and
+    records how long every stage took (milliseconds). Every stage is
+    also a telemetry span, so it lands in /metrics and Server-Timing.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def timed(self, stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with telemetry.span(stage):
+                return fn(*args, **kwargs)
+        finally:
+            elapsed = round((time.perf_counter() - started) * 1000.0, 2)
+            with self._lock:
+                self.timings[stage] = elapsed
+
+    def submit(self, pool, stage, fn, *args, **kwargs):
+        # Copy the context so the stage stays a child of the request span
+        ctx = contextvars.copy_context()
+        return POOLS[pool].submit(ctx.run, self.timed, stage, fn, *args, **kwargs)
@@ -0,0 +1,223 @@
+import os
+import json
+import math
+import pickle
+import tensorflow as tf
+
+from tensorflow.keras.applications import EfficientNetB0, DenseNet121
+from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout
+from tensorflow.keras.models import Model
+
+# =========================================================
+# PNEUMONIA IMAGE MODEL LOADERS
+# =========================================================
+# Importing this module loads nothing; utils/image_utils.py picks the
+# loader at import, and compile_image_bundle.py calls them directly.
+
+# =========================================================
+# MODEL ARTIFACT LOCATIONS
+# =========================================================
+
+PKL_PATH = "models/pneumonia_image_model_new.pkl"
+
+# Self-describing bundle written by compile_image_bundle.py
+BUNDLE_DIR = os.getenv("IMAGE_BUNDLE_DIR", os.path.join("models", "image_bundle"))
+BUNDLE_MODEL_FILE = "model.keras"
+BUNDLE_META_FILE = "metadata.json"
+
+LAST_CONV_LAYERS = {
+    "EfficientNetB0": "top_conv",
+    "DenseNet121": "conv5_block16_concat",  # DenseNet121 last conv layer
+}
+
+
+# =========================================================
+# BUILD MODEL ARCHITECTURE (MATCH PKL WEIGHTS)
+# =========================================================
+
+# Keras scales EfficientNet inputs by 1/sqrt(stddev) after its
+# Normalization layer, but only when built with weights="imagenet"
+IMAGENET_STDDEV_RGB = [0.229, 0.224, 0.225]
+
+
+def _rewire(obj, old, new):
+    """
+    Replaces references to layer `old` in a functional inbound_nodes config.
+    """
+    if isinstance(obj, list):
+        if len(obj) >= 3 and obj[0] == old and isinstance(obj[1], int):
+            return [new] + [_rewire(o, old, new) for o in obj[1:]]
+        return [_rewire(o, old, new) for o in obj]
+    if isinstance(obj, dict):
+        return {k: _rewire(v, old, new) for k, v in obj.items()}
+    return obj
+
+
+def efficientnet_b0_imagenet_graph(img_size):
+    """
+    EfficientNetB0 (no top) with exactly the graph Keras builds for
+    weights="imagenet", but without downloading the checkpoint.
+
+    weights=None omits the Rescaling(1/sqrt(IMAGENET_STDDEV_RGB)) layer.
+    It has no weights, so set_weights() would still accept the pkl and
+    silently compute something else; it is inserted back here.
+    """
+    base = EfficientNetB0(weights=None, include_top=False,
+                          input_shape=(img_size, img_size, 3))
+    config = base.get_config()
+    layers = config["layers"]
+
+    i, norm = next((i, l) for i, l in enumerate(layers) if l["class_name"] == "Normalization")
+    name = "rescaling_imagenet_stddev"
+    for layer in layers[i + 1:]:
+        layer["inbound_nodes"] = _rewire(layer["inbound_nodes"], norm["name"], name)
+
+    layers.insert(i + 1, {
+        "class_name": "Rescaling",
+        "name": name,
+        "config": {
+            "name": name,
+            "trainable": False,
+            "dtype": "float32",
+            "scale": [1.0 / math.sqrt(s) for s in IMAGENET_STDDEV_RGB],
+            "offset": 0.0,
+        },
+        "inbound_nodes": [[[norm["name"], 0, 0, {}]]],
+    })
+    return Model.from_config(config)
+
+
+def build_model(backbone_name, img_size, weights=None):
+    """
+    The training architecture for the pkl weights. weights="imagenet" is
+    the original (downloading) construction, kept as a reference for
+    compile_image_bundle.py; the default builds the same graph offline,
+    since set_weights() overwrites every weight anyway.
+    """
+    if backbone_name == "EfficientNetB0":
+        if weights == "imagenet":
+            base = EfficientNetB0(weights="imagenet", include_top=False,
+                                  input_shape=(img_size, img_size, 3))
+        else:
+            base = efficientnet_b0_imagenet_graph(img_size)
+
+    elif backbone_name == "DenseNet121":
+        # No weight-dependent layers in DenseNet121
+        base = DenseNet121(weights=weights, include_top=False,
+                           input_shape=(img_size, img_size, 3))
+
+    else:
+        raise ValueError("Unsupported backbone")
+
+    for layer in base.layers:
+        layer.trainable = False
+
+    x = base.output
+    x = GlobalAveragePooling2D()(x)
+    x = Dropout(0.4)(x)
+    x = Dense(128, activation="relu")(x)
+    x = Dropout(0.3)(x)
+    out = Dense(1, activation="sigmoid")(x)
+
+    m = Model(inputs=base.input, outputs=out)
+    return m, LAST_CONV_LAYERS[backbone_name]
+
+
+# =========================================================
+# LOAD IMAGE MODEL FROM PKL (LEGACY, ROBUST)
+# =========================================================
+
+def load_pkl_model(pkl_path=PKL_PATH, weights=None):
+    """
+    Returns (model, metadata) from the legacy pickle bundle.
+    weights="imagenet" reproduces the original startup path.
+    """
+    with open(pkl_path, "rb") as f:
+        bundle = pickle.load(f)
+
+    # Safe defaults
+    img_size = 224
+    threshold = 0.5
+    model_weights = None
+    model = None
+
+    # Detect bundle type
+    if isinstance(bundle, dict):
+        img_size = bundle.get("input_size", img_size)
+        threshold = bundle.get("threshold", threshold)
+
+        if "model_weights" in bundle:
+            model_weights = bundle["model_weights"]
+        elif "weights" in bundle:
+            model_weights = bundle["weights"]
+        elif "model" in bundle and hasattr(bundle["model"], "predict"):
+            model = bundle["model"]
+
+    elif isinstance(bundle, list):
+        model_weights = bundle
+
+    elif hasattr(bundle, "predict"):
+        model = bundle
+
+    else:
+        raise ValueError("Unsupported PKL format for pneumonia image model")
+
+    if model is None:
+        if model_weights is None:
+            raise ValueError("Model weights not found in PKL")
+
+        # ✅ AUTO-DETECT MODEL TYPE BY WEIGHT COUNT
+        weight_len = len(model_weights)
+
+        if weight_len == 316:
+            backbone = "EfficientNetB0"
+        elif weight_len == 608:
+            backbone = "DenseNet121"
+        else:
+            raise ValueError(f"Unknown weight length {weight_len}. Cannot match model architecture.")
+
+        model, last_conv = build_model(backbone, img_size, weights=weights)
+
+        # Load weights
+        model.set_weights(model_weights)
+
+    else:
+        # If PKL already contains a compiled Keras model
+        # Try to select LAST_CONV_LAYER safely
+        backbone, last_conv = "EfficientNetB0", "top_conv"
+        try:
+            model.get_layer(last_conv)
+        except ValueError:
+            # fallback for DenseNet
+            backbone, last_conv = "DenseNet121", "conv5_block16_concat"
+
+    metadata = {
+        "backbone": backbone,
+        "input_size": int(img_size),
+        "threshold": float(threshold),
+        "last_conv_layer": last_conv,
+    }
+    return model, metadata
+
+
+# =========================================================
+# LOAD COMPILED BUNDLE (FAST PATH)
+# =========================================================
+
+def load_bundle(bundle_dir=BUNDLE_DIR):
+    """
+    Returns (model, metadata) from a compiled bundle: no pickle, no
+    architecture guessing and no ImageNet weight fetch.
+    """
+    with open(os.path.join(bundle_dir, BUNDLE_META_FILE)) as f:
+        metadata = json.load(f)
+
+    model = tf.keras.models.load_model(
+        os.path.join(bundle_dir, BUNDLE_MODEL_FILE),
+        compile=False
+    )
+    return model, metadata
+
+
+def bundle_exists(bundle_dir=BUNDLE_DIR):
+    return os.path.exists(os.path.join(bundle_dir, BUNDLE_META_FILE))
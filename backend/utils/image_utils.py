@@ -1,194 +1,186 @@
-import pickle
 import numpy as np
 import tensorflow as tf
 import cv2
-import uuid
-import os
-import io
 
-from tensorflow.keras.applications import EfficientNetB0, DenseNet121
-from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout
-from tensorflow.keras.models import Model
-from tensorflow.keras.preprocessing import image as keras_image
+from utils.decoded_xray import as_decoded_xray
+from utils.inference_engine import InferenceEngine
+from utils.batching import BATCHING_ENABLED, MicroBatcher
+from utils.tflite_engine import IMAGE_RUNTIME, TFLiteEngine, tflite_path
+from utils.artifact_store import get_artifact_store
+from utils.image_model_loader import load_pkl_model, load_bundle, bundle_exists
 
 
 # =========================================================
-# LOAD IMAGE MODEL FROM PKL (ROBUST)
+# LOAD IMAGE MODEL (COMPILED BUNDLE, ELSE LEGACY PKL)
 # =========================================================
 
-PKL_PATH = "models/pneumonia_image_model_new.pkl"
-
-with open(PKL_PATH, "rb") as f:
-    bundle = pickle.load(f)
-
-# Safe defaults
-IMG_SIZE = 224
-THRESHOLD = 0.5
-model_weights = None
-model = None
-
-# Detect bundle type
-if isinstance(bundle, dict):
-    IMG_SIZE = bundle.get("input_size", IMG_SIZE)
-    THRESHOLD = bundle.get("threshold", THRESHOLD)
-
-    if "model_weights" in bundle:
-        model_weights = bundle["model_weights"]
-    elif "weights" in bundle:
-        model_weights = bundle["weights"]
-    elif "model" in bundle and hasattr(bundle["model"], "predict"):
-        model = bundle["model"]
-
-elif isinstance(bundle, list):
-    model_weights = bundle
-
-elif hasattr(bundle, "predict"):
-    model = bundle
-
+if bundle_exists():
+    model, MODEL_METADATA = load_bundle()
 else:
-    raise ValueError("Unsupported PKL format for pneumonia image model")
+    model, MODEL_METADATA = load_pkl_model()
+
+IMG_SIZE = MODEL_METADATA["input_size"]
+THRESHOLD = MODEL_METADATA["threshold"]
+LAST_CONV_LAYER = MODEL_METADATA["last_conv_layer"]
 
 
 # =========================================================
-# BUILD MODEL ARCHITECTURE (MATCH PKL WEIGHTS)
+# COMPILED INFERENCE ENGINE + GRAD-CAM MODEL
 # =========================================================
 
-def build_model(backbone_name, img_size):
-    if backbone_name == "EfficientNetB0":
-        base = EfficientNetB0(weights="imagenet", include_top=False,
-                              input_shape=(img_size, img_size, 3))
-        last_conv = "top_conv"
-
-    elif backbone_name == "DenseNet121":
-        base = DenseNet121(weights="imagenet", include_top=False,
-                           input_shape=(img_size, img_size, 3))
-        last_conv = "conv5_block16_concat"  # DenseNet121 last conv layer
-
-    else:
-        raise ValueError("Unsupported backbone")
-
-    for layer in base.layers:
-        layer.trainable = False
+# One forward pass yields probability + last-conv activations;
+# Grad-CAM then only runs the backward step through the head.
+engine = InferenceEngine(model, conv_layer=LAST_CONV_LAYER)
+engine.warmup()
 
-    x = base.output
-    x = GlobalAveragePooling2D()(x)
-    x = Dropout(0.4)(x)
-    x = Dense(128, activation="relu")(x)
-    x = Dropout(0.3)(x)
-    out = Dense(1, activation="sigmoid")(x)
+grad_model = engine.conv_model
 
-    m = Model(inputs=base.input, outputs=out)
-    return m, last_conv
+# IMAGE_RUNTIME=tflite serves predictions from the converted model;
+# Grad-CAM keeps using the full Keras model above.
+tflite_engine = None
+if IMAGE_RUNTIME == "tflite":
+    tflite_engine = TFLiteEngine(tflite_path("classifier"))
+    tflite_engine.warmup()
 
 
-if model is None:
-    if model_weights is None:
-        raise ValueError("Model weights not found in PKL")
+def _run_classifier_batch(batch):
+    if tflite_engine is not None:
+        return [(None, p) for p in tflite_engine.predict(batch)]
 
-    # ✅ AUTO-DETECT MODEL TYPE BY WEIGHT COUNT
-    weight_len = len(model_weights)
+    conv, probs = engine.predict_with_activations(batch)
+    return [(conv[i:i + 1], probs[i]) for i in range(len(probs))]
 
-    if weight_len == 316:
-        model, LAST_CONV_LAYER = build_model("EfficientNetB0", IMG_SIZE)
 
-    elif weight_len == 608:
-        model, LAST_CONV_LAYER = build_model("DenseNet121", IMG_SIZE)
+# Optional request coalescing under concurrent load (IMAGE_BATCHING=1)
+batcher = MicroBatcher("classifier", _run_classifier_batch) if BATCHING_ENABLED else None
 
-    else:
-        raise ValueError(f"Unknown weight length {weight_len}. Cannot match model architecture.")
 
-    # Load weights
-    model.set_weights(model_weights)
-
-else:
-    # If PKL already contains a compiled Keras model
-    # Try to select LAST_CONV_LAYER safely
-    LAST_CONV_LAYER = "top_conv"
-    try:
-        model.get_layer(LAST_CONV_LAYER)
-    except:
-        # fallback for DenseNet
-        LAST_CONV_LAYER = "conv5_block16_concat"
+def classify_tensor(batch):
+    """
+    (N, IMG_SIZE, IMG_SIZE, 3) preprocessed array → [(conv or None, prob)].
+    Single images go through the micro-batcher when enabled.
+    """
+    if batcher is not None and len(batch) == 1:
+        return [batcher(batch)]
+    return _run_classifier_batch(batch)
 
 
 # =========================================================
-# GRAD-CAM MODEL
+# IMAGE PREDICTION FUNCTION
 # =========================================================
 
-grad_model = tf.keras.models.Model(
-    inputs=model.inputs,
-    outputs=[model.get_layer(LAST_CONV_LAYER).output, model.output]
-)
+def _to_label(prob):
+    prob = float(prob)
+    label = "PNEUMONIA" if prob >= THRESHOLD else "NORMAL"
 
+    confidence = prob if label == "PNEUMONIA" else 1 - prob
+    return label, round(confidence, 4)
 
-# =========================================================
-# IMAGE PREDICTION FUNCTION
-# =========================================================
 
 def predict_image(image_file):
     """
     Predict NORMAL / PNEUMONIA from uploaded Chest X-ray
+    (file object or DecodedXray)
     """
 
-    image_bytes = image_file.read()
-    image_file.seek(0)
+    decoded = as_decoded_xray(image_file)
+    conv, prob = classify_tensor(decoded.rgb_tensor(IMG_SIZE))[0]
 
-    img = keras_image.load_img(
-        io.BytesIO(image_bytes),
-        target_size=(IMG_SIZE, IMG_SIZE)
-    )
+    if conv is not None:
+        decoded.features["classifier_conv"] = conv
 
-    arr = keras_image.img_to_array(img) / 255.0
-    arr = np.expand_dims(arr, axis=0)
+    return _to_label(prob)
 
-    prob = float(model.predict(arr, verbose=0)[0][0])
-    label = "PNEUMONIA" if prob >= THRESHOLD else "NORMAL"
 
-    confidence = prob if label == "PNEUMONIA" else 1 - prob
-    return label, round(confidence, 4)
+def predict_batch(images):
+    """
+    Predict NORMAL / PNEUMONIA for many X-rays in one forward pass
+    (file objects or DecodedXray). Returns [(label, confidence), ...].
+    """
+    decoded = [as_decoded_xray(img) for img in images]
+    if not decoded:
+        return []
+
+    arr = np.concatenate([d.rgb_tensor(IMG_SIZE) for d in decoded], axis=0)
+
+    results = []
+    for d, (conv, prob) in zip(decoded, _run_classifier_batch(arr)):
+        if conv is not None:
+            d.features["classifier_conv"] = conv
+        results.append(_to_label(prob))
+    return results
 
 
 # =========================================================
-# GRAD-CAM GENERATION FUNCTION
+# GRAD-CAM GENERATION FUNCTIONS
 # =========================================================
 
-def generate_gradcam(image_file):
+# OpenCV's JET colormap as a (256, 3) BGR lookup table for tf.gather
+JET_LUT = tf.constant(
+    cv2.applyColorMap(np.arange(256, dtype=np.uint8)[:, None], cv2.COLORMAP_JET)[:, 0, :]
+)
+
+
+def _encode_png(overlay):
+    return cv2.imencode(".png", overlay)[1].tobytes()
+
+
+def gradcam_overlays(arr, base, conv=None):
     """
-    Generate and save Grad-CAM heatmap
+    Tensor-level Grad-CAM: preprocessed (N, IMG_SIZE, IMG_SIZE, 3) batch
+    and (N, IMG_SIZE, IMG_SIZE, 3) BGR bases → uint8 BGR overlays.
+    conv reuses activations from the forward pass when available.
     """
+    heatmaps = engine.gradcam_heatmaps(conv=conv, batch=arr, as_numpy=False)
 
-    image_bytes = image_file.read()
-    image_file.seek(0)
+    heatmaps = tf.image.resize(heatmaps[..., None], (IMG_SIZE, IMG_SIZE))[..., 0]
+    idx = tf.cast(tf.clip_by_value(heatmaps, 0.0, 1.0) * 255.0, tf.int32)
+    colored = tf.cast(tf.gather(JET_LUT, idx), tf.float32)
 
-    img = keras_image.load_img(
-        io.BytesIO(image_bytes),
-        target_size=(IMG_SIZE, IMG_SIZE)
-    )
+    base = tf.constant(base, tf.float32)
+    return tf.cast(
+        tf.clip_by_value(tf.round(0.6 * base + 0.4 * colored), 0.0, 255.0), tf.uint8
+    ).numpy()
 
-    arr = keras_image.img_to_array(img) / 255.0
-    arr = np.expand_dims(arr, axis=0)
 
-    with tf.GradientTape() as tape:
-        conv_outputs, predictions = grad_model(arr)
-        loss = predictions[:, 0]
+def generate_gradcam_batch(images, output="array"):
+    """
+    Grad-CAM overlays for many X-rays (file objects or DecodedXray).
 
-    grads = tape.gradient(loss, conv_outputs)
-    pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
+    Gradients and pooled weights for all N images come from one tape;
+    heatmap resizing, colouring and blending are batched tensor ops.
 
-    heatmap = tf.reduce_sum(conv_outputs[0] * pooled_grads, axis=-1)
-    heatmap = np.maximum(heatmap, 0)
-    heatmap /= np.max(heatmap) + 1e-8
+    output:
+      "array" → list of (IMG_SIZE, IMG_SIZE, 3) BGR uint8 arrays
+      "png"   → list of PNG-encoded bytes
+      "path"  → list of artifact refs, PNGs saved to the artifact store
+    """
+    decoded = [as_decoded_xray(img) for img in images]
+    if not decoded:
+        return []
 
-    img_cv = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
-    img_cv = cv2.resize(img_cv, (IMG_SIZE, IMG_SIZE))
+    arr = np.concatenate([d.rgb_tensor(IMG_SIZE) for d in decoded], axis=0)
 
-    heatmap = cv2.resize(heatmap, (IMG_SIZE, IMG_SIZE))
-    heatmap = cv2.applyColorMap(np.uint8(255 * heatmap), cv2.COLORMAP_JET)
+    # Reuse activations from predict_image() / predict_batch() when all are available
+    convs = [d.features.get("classifier_conv") for d in decoded]
+    conv = tf.concat(convs, axis=0) if all(c is not None for c in convs) else None
 
-    overlay = cv2.addWeighted(img_cv, 0.6, heatmap, 0.4, 0)
+    base = np.stack([d.bgr_overlay_base(IMG_SIZE) for d in decoded])
+    overlays = gradcam_overlays(arr, base, conv)
 
-    filename = f"gradcam_{uuid.uuid4().hex}.png"
-    save_path = os.path.join("static", "gradcam", filename)
+    if output == "array":
+        return list(overlays)
+    if output == "png":
+        return [_encode_png(o) for o in overlays]
+    if output == "path":
+        store = get_artifact_store()
+        return [store.save("gradcam", ".png", _encode_png(o), "image/png") for o in overlays]
+    raise ValueError(f"Unknown Grad-CAM output: {output}")
 
-    cv2.imwrite(save_path, overlay)
-    return save_path
+
+def generate_gradcam(image_file):
+    """
+    Generate and save Grad-CAM heatmap
+    (file object or DecodedXray)
+    """
+    return generate_gradcam_batch([image_file], output="path")[0]
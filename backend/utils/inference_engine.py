@@ -0,0 +1,163 @@
+import os
+import numpy as np
+import tensorflow as tf
+
+
+# =========================================================
+# THREADING
+# =========================================================
+# Keep TF from claiming every core when it shares the node with torch
+# (text / speech models). 0 = TensorFlow default.
+
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "0"))
+
+try:
+    if TF_INTRA_OP_THREADS:
+        tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+    if TF_INTER_OP_THREADS:
+        tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+except RuntimeError:
+    # Only allowed before the TF runtime is initialised
+    pass
+
+
+# =========================================================
+# COMPILED INFERENCE ENGINE
+# =========================================================
+
+class InferenceEngine:
+    """
+    Wraps a Keras model in tf.function callables with a fixed input
+    signature, so warm calls skip the Model.predict() / tf.data setup.
+
+    If conv_layer is given, one forward pass returns both the sigmoid
+    probability and the last-conv activations. Grad-CAM then only runs
+    the small classifier head under the tape (backward step), instead of
+    a second pass through the whole backbone.
+    """
+
+    def __init__(self, model, conv_layer=None, input_shape=None):
+        self.model = model
+        self.conv_layer = conv_layer
+        self.input_shape = tuple(input_shape or model.input_shape[1:])
+
+        spec = tf.TensorSpec(shape=(None, *self.input_shape), dtype=tf.float32)
+
+        self.conv_model = None
+        self.head_layers = None
+
+        if conv_layer:
+            self.conv_model = tf.keras.models.Model(
+                inputs=model.inputs,
+                outputs=[model.get_layer(conv_layer).output, model.output]
+            )
+            self._forward = tf.function(self._conv_forward, input_signature=[spec])
+            self.head_layers = self._sequential_tail(model, conv_layer)
+
+            conv_shape = tuple(self.conv_model.outputs[0].shape[1:])
+            conv_spec = tf.TensorSpec(shape=(None, *conv_shape), dtype=tf.float32)
+
+            if self.head_layers is not None:
+                self._heatmaps = tf.function(self._head_heatmaps, input_signature=[conv_spec])
+            self._full_heatmaps = tf.function(self._tape_heatmaps, input_signature=[spec])
+        else:
+            self._forward = tf.function(self._plain_forward, input_signature=[spec])
+
+    # -------------------------
+    # Graph builders
+    # -------------------------
+    @staticmethod
+    def _sequential_tail(model, conv_layer):
+        """
+        Layers after conv_layer, if they form a simple chain
+        (true for the EfficientNetB0 / DenseNet121 heads used here).
+        """
+        names = [layer.name for layer in model.layers]
+        tail = model.layers[names.index(conv_layer) + 1:]
+
+        prev = model.get_layer(conv_layer)
+        for layer in tail:
+            if len(layer._inbound_nodes) != 1 or layer.input is not prev.output:
+                return None
+            prev = layer
+        return tail
+
+    def _plain_forward(self, x):
+        return self.model(x, training=False)[:, 0]
+
+    def _conv_forward(self, x):
+        conv, prob = self.conv_model(x, training=False)
+        return conv, prob[:, 0]
+
+    def _head(self, conv):
+        x = conv
+        for layer in self.head_layers:
+            x = layer(x, training=False)
+        return x[:, 0]
+
+    @staticmethod
+    def _normalise(conv, grads):
+        weights = tf.reduce_mean(grads, axis=(1, 2))
+        heatmap = tf.reduce_sum(conv * weights[:, None, None, :], axis=-1)
+        heatmap = tf.nn.relu(heatmap)
+        return heatmap / (tf.reduce_max(heatmap, axis=(1, 2), keepdims=True) + 1e-8)
+
+    def _head_heatmaps(self, conv):
+        with tf.GradientTape() as tape:
+            tape.watch(conv)
+            prob = self._head(conv)
+        return self._normalise(conv, tape.gradient(prob, conv))
+
+    def _tape_heatmaps(self, x):
+        with tf.GradientTape() as tape:
+            conv, prob = self.conv_model(x, training=False)
+            loss = prob[:, 0]
+        return self._normalise(conv, tape.gradient(loss, conv))
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def predict(self, batch):
+        """
+        (N, H, W, C) float32 → (N,) probabilities
+        """
+        out = self._forward(tf.convert_to_tensor(batch, dtype=tf.float32))
+        if self.conv_layer:
+            out = out[1]
+        return out.numpy()
+
+    def predict_with_activations(self, batch):
+        """
+        (N, H, W, C) float32 → (conv activations tensor, (N,) probabilities)
+        """
+        conv, prob = self._forward(tf.convert_to_tensor(batch, dtype=tf.float32))
+        return conv, prob.numpy()
+
+    def gradcam_heatmaps(self, conv=None, batch=None, as_numpy=True):
+        """
+        Normalised Grad-CAM heatmaps (N, h, w) in [0, 1].
+
+        Pass the activations from predict_with_activations() to run only
+        the backward step; pass the input batch to do a full forward pass.
+        as_numpy=False keeps the result as a tensor for further TF ops.
+        """
+        if conv is not None and self.head_layers is not None:
+            heatmaps = self._heatmaps(conv)
+        elif batch is None:
+            raise ValueError("Grad-CAM needs the input batch when the head is not sequential")
+        else:
+            heatmaps = self._full_heatmaps(tf.convert_to_tensor(batch, dtype=tf.float32))
+
+        return heatmaps.numpy() if as_numpy else heatmaps
+
+    def warmup(self):
+        """
+        Trace the graphs once so the first request does not pay for it.
+        """
+        dummy = np.zeros((1, *self.input_shape), dtype=np.float32)
+        if self.conv_layer:
+            conv, _ = self.predict_with_activations(dummy)
+            self.gradcam_heatmaps(conv=conv, batch=dummy)
+        else:
+            self.predict(dummy)
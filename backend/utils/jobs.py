@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STORE = os.getenv("JOB_STORE", "memory")   # memory | sqlite
+JOB_SQLITE_PATH = os.getenv("JOB_STORE_PATH", os.path.join("cache", "jobs.sqlite3"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+
+# =========================================================
+# JOB STATE STORES
+# =========================================================
+# Jobs run on a thread pool in the worker that accepted the request.
+# The state store decides who can see them: "memory" for a single
+# process, "sqlite" (shared file) when several gunicorn workers may
+# receive the /jobs/<id> poll. Only the state is shared: there is no
+# cross-process dispatch, so a job still runs (and is lost with) the
+# worker that accepted it, and is never picked up by another one.
+
+class MemoryJobStore:
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+            cutoff = time.time() - JOB_RETENTION_SECONDS
+            for job_id in [k for k, v in self._jobs.items() if v["updated_at"] < cutoff]:
+                del self._jobs[job_id]
+
+    def load(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class SqliteJobStore:
+    def __init__(self, path=JOB_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, job):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, data, updated_at) VALUES (?, ?, ?)",
+                (job["job_id"], json.dumps(job), job["updated_at"])
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE updated_at < ?",
+                (time.time() - JOB_RETENTION_SECONDS,)
+            )
+
+    def load(self, job_id):
+        row = self._conn().execute(
+            "SELECT data FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+# =========================================================
+# JOB QUEUE
+# =========================================================
+
+class JobQueue:
+    """
+    Background worker pool for slow, non-critical work (Grad-CAM
+    overlays). submit() returns a job id immediately; callers poll
+    get(job_id) for status and result.
+    """
+
+    def __init__(self, store, workers=JOB_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def _update(self, job, **fields):
+        job.update(fields, updated_at=time.time())
+        self.store.save(job)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        self._update(job)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job["job_id"]
+
+    def _run(self, job, fn, args, kwargs):
+        self._update(job, status="running")
+        try:
+            self._update(job, status="done", result=fn(*args, **kwargs))
+        except Exception as e:
+            print(f"❌ Job {job['job_id']} ({job['kind']}) failed: {e!r}")
+            self._update(job, status="failed", error=repr(e))
+
+    def get(self, job_id):
+        return self.store.load(job_id)
+
+
+def create_job_queue(store=JOB_STORE):
+    if store == "memory":
+        return JobQueue(MemoryJobStore())
+    if store == "sqlite":
+        return JobQueue(SqliteJobStore())
+    raise ValueError(f"Unknown JOB_STORE: {store}")
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background")   # background | lazy
+MODEL_WAIT_SECONDS = float(os.getenv("MODEL_WAIT_SECONDS", "30"))
+
+
+class ModelNotReady(RuntimeError):
+    def __init__(self, name, state):
+        super().__init__(f"Model '{name}' is not ready (state: {state})")
+        self.name = name
+        self.state = state
+
+
+# =========================================================
+# MODEL REGISTRY
+# =========================================================
+
+class _Entry:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = "pending"      # pending | loading | ready | failed
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Loads model modules concurrently in background threads (default) or
+    lazily on first use, so endpoints can serve as soon as the models
+    they depend on are ready.
+
+    A loader is either a callable or a module path; importing the module
+    is what loads its model (e.g. "utils.chest_utils").
+    """
+
+    def __init__(self, mode=MODEL_LOADING, wait_seconds=MODEL_WAIT_SECONDS):
+        self.mode = mode
+        self.wait_seconds = wait_seconds
+        self._entries = {}
+        self._executor = None
+
+    def register(self, name, loader):
+        if isinstance(loader, str):
+            module_path = loader
+            loader = lambda: importlib.import_module(module_path)
+        self._entries[name] = _Entry(name, loader)
+
+    def start(self):
+        """
+        Background mode: start loading every registered model now.
+        """
+        if self.mode != "background" or self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self._entries)),
+            thread_name_prefix="model-loader"
+        )
+        for entry in self._entries.values():
+            self._executor.submit(self._load, entry)
+
+    def _load(self, entry):
+        with entry.lock:
+            if entry.state in ("ready", "failed", "loading"):
+                return
+            entry.state = "loading"
+
+        # load_seconds is set before the state flips, so /ready never
+        # shows a ready (or failed) model without its load time
+        started = time.perf_counter()
+        try:
+            value = entry.loader()
+        except Exception as e:
+            entry.error = repr(e)
+            entry.load_seconds = round(time.perf_counter() - started, 3)
+            entry.state = "failed"
+            print(f"❌ Model '{entry.name}' failed to load: {e!r}")
+        else:
+            entry.value = value
+            entry.load_seconds = round(time.perf_counter() - started, 3)
+            entry.state = "ready"
+            print(f"✅ Model '{entry.name}' loaded in {entry.load_seconds:.2f}s")
+        finally:
+            entry.done.set()
+
+    def get(self, name, timeout=None):
+        """
+        Returns the loaded model/module, loading it inline in lazy mode.
+        Raises ModelNotReady if it is still loading after `timeout`
+        seconds (MODEL_WAIT_SECONDS by default) or failed to load.
+        """
+        entry = self._entries[name]
+
+        if entry.state == "pending" and self.mode != "background":
+            self._load(entry)
+
+        entry.done.wait(self.wait_seconds if timeout is None else timeout)
+
+        if entry.state != "ready":
+            raise ModelNotReady(name, entry.state)
+        return entry.value
+
+    def unknown(self, names):
+        return [n for n in names if n not in self._entries]
+
+    def is_ready(self, *names):
+        """
+        In lazy mode a model that has not been asked for yet counts as
+        ready: it loads inline on first get(), so only loading or failed
+        models hold /ready back.
+        """
+        names = names or tuple(self._entries)
+        ok = ("ready", "pending") if self.mode == "lazy" else ("ready",)
+        return all(self._entries[n].state in ok for n in names)
+
+    def status(self):
+        return {
+            name: {
+                "state": e.state,
+                "load_seconds": e.load_seconds,
+                **({"error": e.error} if e.error else {}),
+            }
+            for name, e in self._entries.items()
+        }
@@ -0,0 +1,535 @@
+import os
+import time
+import stat
+import atexit
+import secrets
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from utils.decoded_xray import as_decoded_xray
+from utils.model_registry import ModelRegistry, ModelNotReady
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# MODEL_SERVER=unix: one `python model_server.py` process per node owns
+# every model; gunicorn workers stay thin (no TF / torch / Whisper) and
+# send preprocessed tensors through shared memory.
+
+MODEL_SERVER = os.getenv("MODEL_SERVER", "off")   # off | unix
+
+# multiprocessing.connection unpickles every message, so whoever can reach
+# the socket with the authkey can run code in the server. The socket lives
+# in a 0700 directory owned by this user, and without MODEL_SERVER_AUTHKEY
+# the server generates a random key into a 0600 file next to it.
+_RUNTIME_DIR = os.getenv("XDG_RUNTIME_DIR") or "/tmp"
+MODEL_SERVER_DIR = os.getenv(
+    "MODEL_SERVER_DIR", os.path.join(_RUNTIME_DIR, f"smart-healthai-{os.getuid()}")
+)
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", os.path.join(MODEL_SERVER_DIR, "models.sock"))
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "").encode() or None
+AUTHKEY_FILE_NAME = "authkey"
+
+# How long a worker waits for the server socket to appear at startup
+MODEL_SERVER_CONNECT_SECONDS = float(os.getenv("MODEL_SERVER_CONNECT_SECONDS", "120"))
+
+# Idle connections / shared-memory segments kept per worker
+MODEL_SERVER_POOL_SIZE = int(os.getenv("MODEL_SERVER_POOL_SIZE", "8"))
+
+# Classifier activations kept for Grad-CAM, keyed by image hash
+CONV_CACHE_SIZE = int(os.getenv("MODEL_SERVER_CONV_CACHE", "64"))
+
+SEGMENT_MIN_BYTES = 1 << 20
+
+# Segments created by this process (client and server can share one in tests)
+_OWNED_SEGMENTS = set()
+
+
+# =========================================================
+# SOCKET DIRECTORY / AUTHKEY
+# =========================================================
+
+def _check_private(path, mode):
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(
+            f"{path} must be owned by uid {os.getuid()} with mode {mode:o} "
+            f"(found uid {info.st_uid}, mode {stat.S_IMODE(info.st_mode):o})"
+        )
+
+
+def private_socket_dir(address):
+    """Create (0700) or verify the directory holding the socket."""
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private(directory, 0o700)
+    return directory
+
+
+def authkey_path(address):
+    return os.path.join(os.path.dirname(os.path.abspath(address)), AUTHKEY_FILE_NAME)
+
+
+def write_authkey(address):
+    """Generate a random authkey into a fresh 0600 file beside the socket."""
+    path = authkey_path(address)
+    key = secrets.token_bytes(32)
+    tmp = f"{path}.{os.getpid()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp, path)
+    return key
+
+
+def read_authkey(address):
+    path = authkey_path(address)
+    _check_private(path, 0o600)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# =========================================================
+# SHARED-MEMORY TENSOR HAND-OFF
+# =========================================================
+# Arrays are copied once into a pooled segment; only (name, layout) is
+# pickled over the socket. The server maps the same pages read-only.
+
+def _layout(arrays):
+    """
+    [(offset, shape, dtype)] for arrays packed back to back (64-byte
+    aligned), plus the total size.
+    """
+    layout, offset = [], 0
+    for a in arrays:
+        layout.append((offset, a.shape, a.dtype.str))
+        offset += (a.nbytes + 63) // 64 * 64
+    return layout, offset
+
+
+def attach_arrays(name, layout):
+    """
+    Server side: maps a client's segment and returns (shm, arrays).
+    Close shm once the arrays are no longer used.
+    """
+    shm = SharedMemory(name=name)
+    # The client owns (and unlinks) the segment; keep this process's
+    # resource tracker from unlinking it too at exit.
+    if name not in _OWNED_SEGMENTS:
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+    arrays = [
+        np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        for offset, shape, dtype in layout
+    ]
+    return shm, arrays
+
+
+class SegmentPool:
+    """
+    Reusable shared-memory segments, so a request does not pay for
+    creating and unlinking a segment every time.
+    """
+
+    def __init__(self, max_idle=MODEL_SERVER_POOL_SIZE):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def acquire(self, nbytes):
+        with self._lock:
+            fits = [s for s in self._idle if s.size >= nbytes]
+            if fits:
+                shm = min(fits, key=lambda s: s.size)
+                self._idle.remove(shm)
+                return shm
+
+        size = max(SEGMENT_MIN_BYTES, 1 << (max(nbytes, 1) - 1).bit_length())
+        shm = SharedMemory(create=True, size=size)
+        _OWNED_SEGMENTS.add(shm.name)
+        return shm
+
+    def release(self, shm):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(shm)
+                return
+        self._destroy(shm)
+
+    @staticmethod
+    def _destroy(shm):
+        _OWNED_SEGMENTS.discard(shm.name)
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for shm in idle:
+            self._destroy(shm)
+
+
+# =========================================================
+# SERVER
+# =========================================================
+
+class ModelServer:
+    """
+    Owns the validator, classifier, text and speech models and serves
+    them over a Unix socket. Each worker connection gets a thread, so
+    concurrent single-image calls meet in the existing micro-batchers
+    (set IMAGE_BATCHING=1 on the server to coalesce them).
+    """
+
+    def __init__(self, address=MODEL_SERVER_SOCKET, authkey=MODEL_SERVER_AUTHKEY, models=None):
+        self.address = address
+        self.authkey = authkey  # None: generate one into the key file
+
+        if models is None:
+            models = ModelRegistry(mode="background")
+            models.register("validator", "utils.chest_utils")
+            models.register("classifier", "utils.image_utils")
+            models.register("text", "utils.text_utils")
+            models.register("speech", "utils.speech_utils")
+        self.models = models
+
+        self._convs = OrderedDict()
+        self._convs_lock = threading.Lock()
+
+        self.handlers = {
+            "status": self._status,
+            "meta": self._meta,
+            "validator.score": self._validator_score,
+            "classifier.predict": self._classifier_predict,
+            "classifier.gradcam": self._classifier_gradcam,
+            "text.predict": self._text_predict,
+            "speech.transcribe": self._speech_transcribe,
+        }
+
+    # -------------------------
+    # Handlers
+    # -------------------------
+    def _status(self):
+        return self.models.status()
+
+    def _meta(self, name):
+        module = self.models.get(name)
+        return {"IMG_SIZE": module.IMG_SIZE, "THRESHOLD": module.THRESHOLD}
+
+    def _validator_score(self, batch):
+        return [float(s) for s in self.models.get("validator").score_tensor(batch)]
+
+    def _remember_conv(self, key, conv):
+        with self._convs_lock:
+            self._convs[key] = conv
+            self._convs.move_to_end(key)
+            while len(self._convs) > CONV_CACHE_SIZE:
+                self._convs.popitem(last=False)
+
+    def _classifier_predict(self, batch, keys):
+        classifier = self.models.get("classifier")
+        results = []
+        for key, (conv, prob) in zip(keys, classifier.classify_tensor(batch)):
+            if conv is not None:
+                self._remember_conv(key, conv)
+            results.append(classifier._to_label(prob))
+        return results
+
+    def _classifier_gradcam(self, batch, base, keys):
+        classifier = self.models.get("classifier")
+
+        with self._convs_lock:
+            convs = [self._convs.get(k) for k in keys]
+        conv = None
+        if all(c is not None for c in convs):
+            import tensorflow as tf
+            conv = tf.concat(convs, axis=0)
+
+        overlays = classifier.gradcam_overlays(batch, base, conv)
+        return [classifier._encode_png(o) for o in overlays]
+
+    def _text_predict(self, texts):
+        return self.models.get("text").predict_text_batch(texts)
+
+    def _speech_transcribe(self, audio):
+        return self.models.get("speech").transcribe(audio)
+
+    # -------------------------
+    # Transport
+    # -------------------------
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, segment, layout, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                shm = None
+                try:
+                    if segment is not None:
+                        shm, arrays = attach_arrays(segment, layout)
+                        names = kwargs.pop("_arrays")
+                        kwargs.update(zip(names, arrays))
+                    reply = ("ok", self.handlers[op](**kwargs))
+                except ModelNotReady as e:
+                    reply = ("not_ready", (e.name, e.state))
+                except Exception as e:
+                    reply = ("error", repr(e))
+                finally:
+                    # Drop array views before unmapping
+                    kwargs = arrays = None
+                    if shm is not None:
+                        try:
+                            shm.close()
+                        except BufferError:
+                            # A model kept a view; unmapped when it is freed
+                            pass
+
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def serve_forever(self):
+        private_socket_dir(self.address)
+        if self.authkey is None:
+            self.authkey = write_authkey(self.address)
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+        self.models.start()
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            print(f"✅ Model server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"⚠️ Model server rejected a connection: {e!r}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+# =========================================================
+# CLIENT (WEB WORKERS)
+# =========================================================
+
+class ModelServerClient:
+    """
+    Pooled connections to the model server. call() ships numpy arrays
+    through shared memory and everything else through the socket.
+    """
+
+    def __init__(self, address=MODEL_SERVER_SOCKET, authkey=MODEL_SERVER_AUTHKEY,
+                 connect_seconds=MODEL_SERVER_CONNECT_SECONDS, pool_size=MODEL_SERVER_POOL_SIZE):
+        self.address = address
+        self.authkey = authkey  # None: read the server's key file
+        self.connect_seconds = connect_seconds
+        self.pool_size = pool_size
+        self.segments = SegmentPool(pool_size)
+        self._conns = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        deadline = time.monotonic() + self.connect_seconds
+        while True:
+            try:
+                authkey = self.authkey or read_authkey(self.address)
+                return Client(self.address, family="AF_UNIX", authkey=authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+    def _acquire_conn(self):
+        with self._lock:
+            if self._conns:
+                return self._conns.pop()
+        return self._connect()
+
+    def _release_conn(self, conn):
+        with self._lock:
+            if len(self._conns) < self.pool_size:
+                self._conns.append(conn)
+                return
+        conn.close()
+
+    def call(self, op, arrays=None, **kwargs):
+        """
+        arrays: {kwarg name: ndarray} passed via shared memory.
+        """
+        shm, segment, layout = None, None, None
+        if arrays:
+            names = list(arrays)
+            values = [np.ascontiguousarray(arrays[n]) for n in names]
+            layout, nbytes = _layout(values)
+
+            shm = self.segments.acquire(nbytes)
+            for (offset, shape, dtype), a in zip(layout, values):
+                np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)[...] = a
+            segment = shm.name
+            kwargs["_arrays"] = names
+
+        conn = self._acquire_conn()
+        try:
+            conn.send((op, segment, layout, kwargs))
+            status, result = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        else:
+            self._release_conn(conn)
+        finally:
+            if shm is not None:
+                self.segments.release(shm)
+
+        if status == "not_ready":
+            raise ModelNotReady(*result)
+        if status == "error":
+            raise RuntimeError(f"Model server {op} failed: {result}")
+        return result
+
+    def wait_ready(self, name):
+        """
+        Blocks until the server has loaded `name` (used as the worker's
+        registry loader, so /ready mirrors the server).
+        """
+        deadline = time.monotonic() + self.connect_seconds
+        while True:
+            state = self.call("status").get(name, {}).get("state")
+            if state == "ready":
+                return
+            if state == "failed":
+                raise RuntimeError(f"Model server failed to load '{name}'")
+            if time.monotonic() > deadline:
+                raise ModelNotReady(name, state)
+            time.sleep(0.5)
+
+
+# =========================================================
+# MODULE-LIKE PROXIES
+# =========================================================
+# Drop-in replacements for the chest_utils / image_utils / text_utils /
+# speech_utils functions app.py and batch_diagnosis use. Preprocessing
+# (decode, resize, ffmpeg) runs in the worker; only inference is remote.
+
+class RemoteValidator:
+    def __init__(self, client):
+        self.client = client
+        client.wait_ready("validator")
+        meta = client.call("meta", name="validator")
+        self.IMG_SIZE = meta["IMG_SIZE"]
+        self.THRESHOLD = meta["THRESHOLD"]
+
+    def preprocess_image(self, image_file):
+        return as_decoded_xray(image_file).grayscale_tensor(self.IMG_SIZE)
+
+    def score_batch(self, images):
+        if isinstance(images, np.ndarray):
+            batch = images
+        else:
+            batch = np.concatenate([self.preprocess_image(img) for img in images], axis=0)
+        return np.array(self.client.call("validator.score", {"batch": batch}), dtype=np.float32)
+
+    def score(self, image_file):
+        return float(self.score_batch([image_file])[0])
+
+    def is_chest_xray(self, file):
+        pred = self.score(file)
+        return pred > self.THRESHOLD, pred
+
+
+class RemoteClassifier:
+    def __init__(self, client):
+        self.client = client
+        client.wait_ready("classifier")
+        meta = client.call("meta", name="classifier")
+        self.IMG_SIZE = meta["IMG_SIZE"]
+        self.THRESHOLD = meta["THRESHOLD"]
+
+    def predict_batch(self, images):
+        decoded = [as_decoded_xray(img) for img in images]
+        if not decoded:
+            return []
+
+        batch = np.concatenate([d.rgb_tensor(self.IMG_SIZE) for d in decoded], axis=0)
+        results = self.client.call(
+            "classifier.predict", {"batch": batch}, keys=[d.content_hash for d in decoded]
+        )
+        return [tuple(r) for r in results]
+
+    def predict_image(self, image_file):
+        return self.predict_batch([image_file])[0]
+
+    def generate_gradcam_batch(self, images, output="png"):
+        decoded = [as_decoded_xray(img) for img in images]
+        if not decoded:
+            return []
+
+        batch = np.concatenate([d.rgb_tensor(self.IMG_SIZE) for d in decoded], axis=0)
+        base = np.stack([d.bgr_overlay_base(self.IMG_SIZE) for d in decoded])
+        pngs = self.client.call(
+            "classifier.gradcam", {"batch": batch, "base": base},
+            keys=[d.content_hash for d in decoded]
+        )
+
+        if output == "png":
+            return pngs
+        if output == "path":
+            from utils.artifact_store import get_artifact_store
+            store = get_artifact_store()
+            return [store.save("gradcam", ".png", png, "image/png") for png in pngs]
+        if output == "array":
+            import cv2
+            return [cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR) for png in pngs]
+        raise ValueError(f"Unknown Grad-CAM output: {output}")
+
+    def generate_gradcam(self, image_file):
+        return self.generate_gradcam_batch([image_file], output="path")[0]
+
+
+class RemoteText:
+    def __init__(self, client):
+        self.client = client
+        client.wait_ready("text")
+
+    def predict_text_batch(self, texts):
+        return [(label, probs) for label, probs in self.client.call("text.predict", texts=list(texts))]
+
+    def predict_text(self, text):
+        return self.predict_text_batch([text])[0][0]
+
+
+class RemoteSpeech:
+    def __init__(self, client):
+        self.client = client
+        client.wait_ready("speech")
+
+    def transcribe_stream(self, audio_file):
+        from utils.audio import decode_audio, iter_chunks, read_bytes
+
+        audio = decode_audio(read_bytes(audio_file))
+        for chunk in iter_chunks(audio):
+            text = self.client.call("speech.transcribe", {"audio": chunk})
+            if text:
+                yield text
+
+    def speech_to_text(self, audio_file):
+        return " ".join(self.transcribe_stream(audio_file))
+
+
+def serve(address=MODEL_SERVER_SOCKET):
+    ModelServer(address).serve_forever()
@@ -0,0 +1,37 @@
+# -------------------------
+# Multimodal Recommendation
+# -------------------------
+def generate_medical_recommendation(
+    image_prediction,
+    image_confidence,
+    text_prediction=None
+):
+    if image_prediction == "NORMAL" and text_prediction and text_prediction != "NORMAL":
+        return (
+            "The chest X-ray does not show radiological evidence of pneumonia; "
+            "however, the reported symptoms suggest a possible respiratory condition. "
+            "Clinical consultation is recommended."
+        )
+
+    if image_prediction == "NORMAL":
+        return (
+            "No radiological evidence of pneumonia detected. "
+            "Routine clinical observation is recommended."
+        )
+
+    if image_confidence >= 0.80:
+        return (
+            "High likelihood of pneumonia detected. "
+            "Physician consultation is strongly recommended."
+        )
+
+    if image_confidence >= 0.60:
+        return (
+            "Moderate likelihood of pneumonia detected. "
+            "Clinical correlation and follow-up assessment may be considered."
+        )
+
+    return (
+        "Low confidence indication of pneumonia. "
+        "Monitoring and clinical assessment are advised."
+    )
@@ -1,51 +1,100 @@
-import os
+import io
+import re
+import json
 import uuid
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from PIL import Image
+from reportlab.lib.utils import ImageReader, simpleSplit
 
+from utils.artifact_store import get_artifact_store
+from utils import telemetry
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+
+TITLE = "Smart HealthAI - Diagnosis Report"
+DISCLAIMER = [
+    "Disclaimer: This report is generated by an AI model and is for informational purposes only.",
+    "Always consult a certified doctor for clinical diagnosis and treatment.",
+]
+
+REPORT_ID_RE = re.compile(r"^report_[0-9a-f]{32}$")
+
+
+# =========================================================
+# STATIC PAGE TEMPLATE (RENDERED ONCE)
+# =========================================================
+# Title and disclaimer never change, so they are drawn once into a
+# one-page PDF at import and placed on every report as a form XObject.
+# Without pdfrw, the template is drawn into a per-document form instead.
+
+def _draw_template(c):
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(50, PAGE_HEIGHT - 50, TITLE)
+
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawString(50, 60, DISCLAIMER[0])
+    c.drawString(50, 45, DISCLAIMER[1])
+
+
+def _render_template_pdf():
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    _draw_template(c)
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+try:
+    from pdfrw import PdfReader
+    from pdfrw.buildxobj import pagexobj
+    from pdfrw.toreportlab import makerl
+
+    TEMPLATE_XOBJ = pagexobj(PdfReader(io.BytesIO(_render_template_pdf())).pages[0])
+except ImportError:
+    TEMPLATE_XOBJ = None
 
-def split_text(text, max_chars=90):
-    words = text.split()
-    lines = []
-    current = ""
-    for w in words:
-        if len(current) + len(w) + 1 <= max_chars:
-            current += (" " if current else "") + w
-        else:
-            lines.append(current)
-            current = w
-    if current:
-        lines.append(current)
-    return lines
 
+def _apply_template(c):
+    if TEMPLATE_XOBJ is not None:
+        c.doForm(makerl(c, TEMPLATE_XOBJ))
+    else:
+        c.beginForm("report_template")
+        _draw_template(c)
+        c.endForm()
+        c.doForm("report_template")
 
-def generate_patient_report(response_data):
+
+# =========================================================
+# REPORT RENDERING
+# =========================================================
+
+def wrap_text(text, font="Helvetica", size=12, max_width=480):
     """
-    Generates PDF report for diagnosis result and returns path.
-    Includes Grad-CAM image inside the PDF (if available).
+    Wraps text to max_width points using the font's real glyph widths.
     """
+    return simpleSplit(text, font, size, max_width)
 
-    os.makedirs("reports", exist_ok=True)
 
-    filename = f"report_{uuid.uuid4().hex}.pdf"
-    report_path = os.path.join("reports", filename)
+def render_patient_report(response_data, gradcam_png=None, generated_on=None):
+    """
+    Renders the PDF report for a diagnosis result and returns its bytes.
+    Includes the Grad-CAM overlay (PNG bytes) inside the PDF if given.
+    """
 
-    c = canvas.Canvas(report_path, pagesize=letter)
-    width, height = letter
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    _apply_template(c)
 
     # -------------------------
     # Header
     # -------------------------
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(50, height - 50, "Smart HealthAI - Diagnosis Report")
-
+    generated_on = generated_on or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     c.setFont("Helvetica", 11)
-    c.drawString(50, height - 80, f"Generated On: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    c.drawString(50, PAGE_HEIGHT - 80, f"Generated On: {generated_on}")
 
-    y = height - 130
+    y = PAGE_HEIGHT - 130
     line_gap = 20
 
     def write_line(label, value):
@@ -74,31 +123,24 @@ def generate_patient_report(response_data):
         y -= line_gap
 
         c.setFont("Helvetica", 12)
-        rec = response_data.get("recommendation")
-        for line in split_text(rec, max_chars=90):
+        for line in wrap_text(response_data["recommendation"], max_width=PAGE_WIDTH - 120):
             c.drawString(60, y, line)
             y -= line_gap
 
     # -------------------------
     # Grad-CAM Image Embed
     # -------------------------
-    gradcam_path = response_data.get("gradcam_image")
-
-    if gradcam_path:
-        # Ensure correct file path
-        # gradcam_path comes like: "static/gradcam/gradcam_xxx.png"
-        abs_gradcam_path = os.path.join(os.getcwd(), gradcam_path.replace("/", os.sep))
-
+    if gradcam_png is not None or response_data.get("gradcam_image"):
         y -= 20
         c.setFont("Helvetica-Bold", 12)
         c.drawString(50, y, "Grad-CAM Explainability:")
         y -= 20
 
-        if os.path.exists(abs_gradcam_path):
+        if gradcam_png:
             try:
-                # Resize image to fit PDF
-                img = Image.open(abs_gradcam_path)
-                img_width, img_height = img.size
+                # Scaled by the PDF itself; no pixel resampling
+                img = ImageReader(io.BytesIO(gradcam_png))
+                img_width, img_height = img.getSize()
 
                 # Maximum image area in pdf
                 max_w = 400
@@ -108,34 +150,115 @@ def generate_patient_report(response_data):
                 new_w = img_width * scale
                 new_h = img_height * scale
 
-                # Draw image
-                c.drawImage(
-                    ImageReader(img),
-                    70, y - new_h,
-                    width=new_w,
-                    height=new_h
-                )
-
-                y = y - new_h - 20
+                c.drawImage(img, 70, y - new_h, width=new_w, height=new_h)
 
             except Exception as e:
                 c.setFont("Helvetica", 11)
                 c.drawString(60, y, f"⚠️ Could not embed Grad-CAM image: {str(e)}")
-                y -= 20
         else:
             c.setFont("Helvetica", 11)
             c.drawString(60, y, "⚠️ Grad-CAM image not found to embed in report.")
-            y -= 20
-
-    # -------------------------
-    # Footer Disclaimer
-    # -------------------------
-    y -= 40
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawString(50, y, "Disclaimer: This report is generated by an AI model and is for informational purposes only.")
-    y -= 15
-    c.drawString(50, y, "Always consult a certified doctor for clinical diagnosis and treatment.")
 
     c.save()
 
-    return report_path
+    return buffer.getvalue()
+
+
+def generate_patient_report(response_data, gradcam_png=None):
+    """
+    Generates PDF report for diagnosis result right away, saves it to the
+    artifact store and returns its ref ("artifacts/report/report_xxx.pdf").
+
+    Pass the Grad-CAM PNG bytes directly when available; otherwise the
+    overlay referenced by response_data["gradcam_image"] is loaded from
+    the store.
+    """
+    store = get_artifact_store()
+
+    if gradcam_png is None and response_data.get("gradcam_image"):
+        gradcam_png = store.load(response_data["gradcam_image"])
+
+    with telemetry.span("generate_patient_report"):
+        pdf = render_patient_report(response_data, gradcam_png)
+    return store.save("report", ".pdf", pdf, "application/pdf")
+
+
+# =========================================================
+# ON-DEMAND REPORTS
+# =========================================================
+# /diagnose only records what the report needs (a small JSON spec); the
+# PDF is rendered the first time /reports/<report_id>.pdf is requested
+# and then cached in the artifact store.
+
+def _spec_key(report_id):
+    return f"report/{report_id}.json"
+
+
+def _pdf_key(report_id):
+    return f"report/{report_id}.pdf"
+
+
+def report_id_from_path(report_path):
+    report_id = report_path.rstrip("/").rsplit("/", 1)[-1]
+    if report_id.endswith(".pdf"):
+        report_id = report_id[:-4]
+    return report_id if REPORT_ID_RE.match(report_id) else None
+
+
+def create_report(response_data, **extra):
+    """
+    Records a report spec and returns its download path
+    ("reports/report_xxx.pdf"). Nothing is rendered yet.
+    """
+    report_id = f"report_{uuid.uuid4().hex}"
+    spec = dict(
+        response_data,
+        generated_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        **extra
+    )
+    get_artifact_store().put(_spec_key(report_id), json.dumps(spec).encode(), "application/json")
+    return f"reports/{report_id}.pdf"
+
+
+def load_report_spec(report_id):
+    data = get_artifact_store().get(_spec_key(report_id))
+    return json.loads(data) if data is not None else None
+
+
+def update_report(report_path, **fields):
+    """
+    Adds late fields (e.g. gradcam_image from a background job) to a
+    report spec and drops any PDF rendered without them.
+    """
+    report_id = report_id_from_path(report_path)
+    spec = load_report_spec(report_id) if report_id else None
+    if spec is None:
+        return
+
+    spec.update(fields)
+    store = get_artifact_store()
+    store.put(_spec_key(report_id), json.dumps(spec).encode(), "application/json")
+    store.delete(_pdf_key(report_id))
+
+
+def get_report_pdf(report_id):
+    """
+    PDF bytes for a report id, rendered on first request. None if the
+    report is unknown or expired.
+    """
+    store = get_artifact_store()
+
+    pdf = store.get(_pdf_key(report_id))
+    if pdf is not None:
+        return pdf
+
+    spec = load_report_spec(report_id)
+    if spec is None:
+        return None
+
+    gradcam_png = store.load(spec["gradcam_image"]) if spec.get("gradcam_image") else None
+    with telemetry.span("generate_patient_report"):
+        pdf = render_patient_report(spec, gradcam_png, generated_on=spec.get("generated_on"))
+
+    store.put(_pdf_key(report_id), pdf, "application/pdf")
+    return pdf
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils import decoded_xray, tflite_engine
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")   # memory | sqlite | off
+CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+CACHE_SQLITE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join("cache", "results.sqlite3"))
+
+MODEL_FILES = [
+    "models/image_model.h5",
+    "models/pneumonia_image_model_new.pkl",
+]
+
+
+def runtime_settings():
+    """
+    Settings that change the cached outputs for the same bytes and models,
+    as the image pipeline actually reads them.
+    """
+    return {
+        "IMAGE_RUNTIME": tflite_engine.IMAGE_RUNTIME,
+        "TFLITE_VARIANT": tflite_engine.TFLITE_VARIANT,
+        "DECODE_MODE": decoded_xray.DECODE_MODE,
+        "GRADCAM_DECODE_SIZE": decoded_xray.GRADCAM_DECODE_SIZE,
+    }
+
+
+def _model_files():
+    files = list(MODEL_FILES)
+    files.append(os.path.join(os.getenv("IMAGE_BUNDLE_DIR", os.path.join("models", "image_bundle")), "metadata.json"))
+    if tflite_engine.IMAGE_RUNTIME == "tflite":
+        files += [
+            tflite_engine.tflite_path(name, tflite_engine.TFLITE_VARIANT)
+            for name in ("validator", "classifier")
+        ]
+    return files
+
+
+def model_version():
+    """
+    Fingerprint of the runtime / decode settings plus IMAGE_MODEL_VERSION
+    if set, else the model files (name, size, mtime). Swapping a model or
+    a worker's configuration never serves another configuration's
+    entries (the sqlite backend is shared between workers).
+    """
+    h = hashlib.sha256()
+    for name, value in runtime_settings().items():
+        h.update(f"{name}={value};".encode())
+
+    explicit = os.getenv("IMAGE_MODEL_VERSION")
+    if explicit:
+        return f"{explicit}-{h.hexdigest()[:8]}"
+
+    for path in dict.fromkeys(_model_files()):
+        if os.path.exists(path):
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{int(st.st_mtime)}".encode())
+    return h.hexdigest()[:16]
+
+
+# =========================================================
+# BACKENDS
+# =========================================================
+
+class MemoryBackend:
+    """
+    In-process LRU with a size bound and TTL.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.time() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteBackend:
+    """
+    On-disk LRU shared by all gunicorn workers on a node.
+    """
+
+    def __init__(self, path=CACHE_SQLITE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT value, stored_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# =========================================================
+# RESULT CACHE
+# =========================================================
+
+class ResultCache:
+    """
+    Content-addressed cache of image-branch results
+    (validator score, prediction, Grad-CAM path).
+    """
+
+    def __init__(self, backend, version=None):
+        self.backend = backend
+        self.version = version or model_version()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, content_hash):
+        return f"{self.version}:{content_hash}"
+
+    def get(self, content_hash):
+        if self.backend is None:
+            return None
+
+        value = self.backend.get(self.key(content_hash))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, content_hash, value):
+        if self.backend is not None:
+            self.backend.put(self.key(content_hash), value)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "model_version": self.version,
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def create_result_cache(backend=CACHE_BACKEND):
+    if backend == "memory":
+        return ResultCache(MemoryBackend())
+    if backend == "sqlite":
+        return ResultCache(SqliteBackend())
+    if backend == "off":
+        return ResultCache(None)
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {backend}")
@@ -1,10 +1,81 @@
-import whisper
-import tempfile
+import os
+import threading
+
+from utils.audio import decode_audio, iter_chunks, read_bytes
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "whisper")      # whisper | faster-whisper
+SPEECH_MODEL = os.getenv("SPEECH_MODEL", "base")             # tiny | base | small ...
+SPEECH_COMPUTE_TYPE = os.getenv("SPEECH_COMPUTE_TYPE", "int8")  # faster-whisper only
+
+
+# =========================================================
+# TRANSCRIPTION BACKENDS
+# =========================================================
+
+class WhisperBackend:
+    def __init__(self, model_name=SPEECH_MODEL):
+        import whisper
+        self.model = whisper.load_model(model_name)
+
+    def transcribe(self, audio):
+        return self.model.transcribe(audio, fp16=False)["text"].strip()
+
+
+class FasterWhisperBackend:
+    """
+    CTranslate2-based Whisper (int8 on CPU by default).
+    """
+
+    def __init__(self, model_name=SPEECH_MODEL, compute_type=SPEECH_COMPUTE_TYPE):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type)
+
+    def transcribe(self, audio):
+        segments, _ = self.model.transcribe(audio, beam_size=1)
+        return " ".join(seg.text.strip() for seg in segments).strip()
+
+
+def create_speech_backend(name=SPEECH_BACKEND):
+    if name == "whisper":
+        return WhisperBackend()
+    if name == "faster-whisper":
+        return FasterWhisperBackend()
+    raise ValueError(f"Unknown SPEECH_BACKEND: {name}")
+
+
+speech_backend = create_speech_backend()
+
+# Neither Whisper backend is thread-safe. /diagnose runs speech on the
+# one-worker speech pool, but /transcribe/stream, jobs and the model
+# server call in from their own threads, so every chunk takes this lock.
+_transcribe_lock = threading.Lock()
+
+
+def transcribe(audio):
+    with _transcribe_lock:
+        return speech_backend.transcribe(audio)
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+
+def transcribe_stream(audio_file):
+    """
+    Yields the transcript of each fixed-length chunk as soon as it is
+    ready. Accepts an uploaded file object or raw bytes.
+    """
+    audio = decode_audio(read_bytes(audio_file))
+
+    for chunk in iter_chunks(audio):
+        text = transcribe(chunk)
+        if text:
+            yield text
 
-speech_model = whisper.load_model("base")
 
 def speech_to_text(audio_file):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        audio_file.save(tmp.name)
-        result = speech_model.transcribe(tmp.name)
-    return result["text"]
+    return " ".join(transcribe_stream(audio_file))
@@ -0,0 +1,421 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import bisect
+import resource
+import threading
+import contextvars
+import urllib.request
+from functools import wraps
+from contextlib import contextmanager
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+TRACING = os.getenv("TRACING", "off")                       # off | log | otlp
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "-")           # "-" = stdout
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces")
+SERVICE_NAME = os.getenv("SERVICE_NAME", "smart-healthai-backend")
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# =========================================================
+# PROMETHEUS METRICS (TEXT EXPOSITION FORMAT)
+# =========================================================
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labels, key, v) for key, v in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = [(k, list(s)) for k, s in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                out.append((f"{self.name}_bucket", self.labels + ("le",), key + (repr(bound),), cumulative))
+            out.append((f"{self.name}_bucket", self.labels + ("le",), key + ("+Inf",), series[-1]))
+            out.append((f"{self.name}_sum", self.labels, key, series[-2]))
+            out.append((f"{self.name}_count", self.labels, key, series[-1]))
+        return out
+
+
+class Gauge:
+    """
+    Read at scrape time: fn() returns a number or {label values: number}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn, labels=()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labels = tuple(labels)
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [
+                (self.name, self.labels, k if isinstance(k, tuple) else (k,), v)
+                for k, v in value.items() if v is not None
+            ]
+        return [(self.name, (), (), value)]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, labels=()):
+        return self._add(Gauge(name, help, fn, labels))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, label_names, label_values, value in m.samples():
+                lines.append(f"{name}{_label_str(label_names, label_values)} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "healthai_stage_seconds", "Latency of one pipeline stage", ["stage"]
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "healthai_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "healthai_http_request_seconds", "HTTP request latency (until the response is returned)", ["endpoint"]
+)
+REQUESTS = REGISTRY.counter(
+    "healthai_http_requests_total", "HTTP requests by endpoint and status", ["endpoint", "status"]
+)
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+REGISTRY.gauge("healthai_process_resident_memory_bytes", "Resident set size", _rss_bytes)
+REGISTRY.gauge("healthai_process_peak_resident_memory_bytes", "Peak resident set size", _peak_rss_bytes)
+
+
+# =========================================================
+# SPANS (OPENTELEMETRY-STYLE)
+# =========================================================
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Span:
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class LogExporter:
+    """
+    One JSON line per finished span (stdout or TRACE_LOG_PATH).
+    """
+
+    def __init__(self, path=TRACE_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict())
+        with self._lock:
+            if self.path == "-":
+                print(line, flush=True)
+            else:
+                with open(self.path, "a") as f:
+                    f.write(line + "\n")
+
+
+class OtlpExporter:
+    """
+    Batches spans and POSTs them as OTLP/HTTP JSON to a local collector
+    from a background thread. Spans are dropped if the collector is down.
+    """
+
+    def __init__(self, endpoint=OTLP_ENDPOINT, max_batch=256, interval=2.0):
+        self.endpoint = endpoint
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=10000)
+        threading.Thread(target=self._loop, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    def _send(self, spans):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "utils.telemetry"},
+                    "spans": [s.to_otlp() for s in spans],
+                }],
+            }]
+        }
+        req = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            urllib.request.urlopen(req, timeout=5).close()
+        except Exception as e:
+            print(f"⚠️ Trace export failed ({len(spans)} spans): {e!r}")
+
+
+def create_exporter(kind=TRACING):
+    if kind == "off":
+        return None
+    if kind == "log":
+        return LogExporter()
+    if kind == "otlp":
+        return OtlpExporter()
+    raise ValueError(f"Unknown TRACING: {kind}")
+
+
+exporter = create_exporter()
+
+
+@contextmanager
+def span(name, record_stage=True, **attributes):
+    """
+    Times a block as pipeline stage `name`: observes the stage
+    histogram, adds it to the current request's Server-Timing, and
+    emits a span (child of the current one) when tracing is on.
+    """
+    parent = _current_span.get()
+    s = Span(name, parent, attributes)
+    token = _current_span.set(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.error = repr(e)
+        if record_stage:
+            STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        s.end_ns = s.start_ns + int(elapsed * 1e9)
+        _current_span.reset(token)
+
+        if record_stage:
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings[name] = round(elapsed * 1000.0, 2)
+
+        if exporter is not None:
+            exporter.export(s)
+
+
+def traced(name, fn):
+    """
+    fn wrapped in span(name); for work handed to other threads/jobs.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# =========================================================
+# PER-REQUEST TRACE (FLASK HOOKS)
+# =========================================================
+
+class RequestTrace:
+    """
+    Root span of one HTTP request. Stages run inside it (including on
+    pool threads that copy the context) add to its Server-Timing.
+    """
+
+    def __init__(self, endpoint, method, path):
+        self.endpoint = endpoint or "unknown"
+        self.timings = {}
+        self.started = time.perf_counter()
+        self.span = Span(f"{method} {self.endpoint}", attributes={"http.method": method, "http.target": path})
+        self._tokens = (_current_span.set(self.span), _request_timings.set(self.timings))
+
+    def finish(self, status):
+        elapsed = time.perf_counter() - self.started
+        self.span.end_ns = self.span.start_ns + int(elapsed * 1e9)
+        self.span.attributes["http.status_code"] = status
+        if status >= 500:
+            self.span.error = f"HTTP {status}"
+
+        REQUEST_SECONDS.observe(elapsed, endpoint=self.endpoint)
+        REQUESTS.inc(endpoint=self.endpoint, status=str(status))
+
+        for var, token in zip((_current_span, _request_timings), self._tokens):
+            try:
+                var.reset(token)
+            except ValueError:
+                pass
+
+        if exporter is not None:
+            exporter.export(self.span)
+        return elapsed
+
+    def server_timing(self, total_seconds):
+        parts = [f"{stage};dur={ms}" for stage, ms in self.timings.items()]
+        parts.append(f"total;dur={round(total_seconds * 1000.0, 2)}")
+        return ", ".join(parts)
@@ -0,0 +1,137 @@
+import os
+import pickle
+import numpy as np
+import torch
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+TEXT_BACKEND = os.getenv("TEXT_BACKEND", "torch")   # torch | quantized | onnx
+ONNX_PATH = os.getenv("TEXT_ONNX_PATH", "models/text_model.onnx")
+# Tokenizer + label count written next to the ONNX graph, so the onnx
+# backend does not have to unpickle the bundle's fp32 state dict
+ONNX_META_PATH = os.getenv("TEXT_ONNX_META_PATH", "models/text_model_meta.pkl")
+ONNX_THREADS = int(os.getenv("TEXT_ONNX_THREADS", "0"))   # 0 = onnxruntime default
+
+BACKENDS = ("torch", "quantized", "onnx")
+
+
+# =========================================================
+# BACKENDS
+# =========================================================
+# Every backend takes numpy input_ids / attention_mask of shape
+# (batch, seq_len) and returns numpy logits (batch, num_labels).
+
+class TorchBackend:
+    """
+    Eager PyTorch (fp32, or dynamic-int8 when given a quantized model).
+    """
+
+    def __init__(self, model, name="torch"):
+        self.model = model
+        self.name = name
+
+    def __call__(self, input_ids, attention_mask):
+        with torch.inference_mode():
+            logits = self.model(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask)
+            ).logits
+        return logits.numpy()
+
+
+class OnnxBackend:
+    """
+    Exported ONNX graph on onnxruntime's CPU provider.
+    """
+
+    name = "onnx"
+
+    def __init__(self, path=ONNX_PATH, threads=ONNX_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "❌ TEXT_BACKEND=onnx needs onnxruntime (pip install onnxruntime)."
+            ) from e
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"❌ ONNX text model not found at {path}. Run export_text_model.py first."
+            )
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+
+    def __call__(self, input_ids, attention_mask):
+        return self.session.run(
+            ["logits"],
+            {"input_ids": input_ids, "attention_mask": attention_mask}
+        )[0]
+
+
+# =========================================================
+# BUILDERS
+# =========================================================
+
+def quantize_dynamic(model):
+    """
+    int8 dynamic quantization of every nn.Linear (weights int8,
+    activations quantized on the fly).
+    """
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model, path=ONNX_PATH, seq_len=128):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    dummy_ids = torch.ones((1, seq_len), dtype=torch.long)
+    dummy_mask = torch.ones((1, seq_len), dtype=torch.long)
+
+    torch.onnx.export(
+        model,
+        (dummy_ids, dummy_mask),
+        path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    return path
+
+
+def save_onnx_metadata(tokenizer, num_labels, path=ONNX_META_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump({"tokenizer": tokenizer, "num_labels": num_labels}, f)
+    return path
+
+
+def create_backend(name, load_fp32_model):
+    """
+    load_fp32_model is only called for the torch-based backends; the
+    ONNX backend never builds the fp32 model. (Whether the fp32 state
+    dict is read from disk at all is up to the caller — see text_utils.)
+    """
+    if name == "torch":
+        return TorchBackend(load_fp32_model())
+    if name == "quantized":
+        return TorchBackend(quantize_dynamic(load_fp32_model()), name="quantized")
+    if name == "onnx":
+        return OnnxBackend()
+    raise ValueError(f"Unknown TEXT_BACKEND: {name} (expected one of {BACKENDS})")
+
+
+def softmax(logits):
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
@@ -1,14 +1,43 @@
+import os
 import pickle
 import torch
 from transformers import AutoModelForSequenceClassification
 
+from utils.result_cache import MemoryBackend
+from utils.text_backends import TEXT_BACKEND, ONNX_META_PATH, create_backend, softmax
+
+# -------------------------
+# Runtime Configuration
+# -------------------------
+MAX_LENGTH = 128
+TEXT_BATCH_SIZE = int(os.getenv("TEXT_BATCH_SIZE", "16"))
+TEXT_CACHE_SIZE = int(os.getenv("TEXT_CACHE_SIZE", "2048"))
+
+if os.getenv("TEXT_TORCH_THREADS"):
+    torch.set_num_threads(int(os.getenv("TEXT_TORCH_THREADS")))
+
+if os.getenv("TEXT_TORCH_INTEROP_THREADS"):
+    try:
+        torch.set_interop_threads(int(os.getenv("TEXT_TORCH_INTEROP_THREADS")))
+    except RuntimeError:
+        # Only allowed before any inter-op parallel work has started
+        pass
+
 # -------------------------
 # Load Pickle Bundle
 # -------------------------
 PKL_PATH = "models/pneumonia_text_model_new.pkl"
 BASE_MODEL_PATH = "models/text_base_model"  # LOCAL ONLY
 
-with open(PKL_PATH, "rb") as f:
+# The onnx backend only needs the tokenizer and label count; read them
+# from the small sidecar written by export_text_model.py so the fp32
+# state dict in the full bundle is never unpickled.
+if TEXT_BACKEND == "onnx" and os.path.exists(ONNX_META_PATH):
+    bundle_path = ONNX_META_PATH
+else:
+    bundle_path = PKL_PATH
+
+with open(bundle_path, "rb") as f:
     bundle = pickle.load(f)
 
 tokenizer = bundle["tokenizer"]
@@ -17,14 +46,23 @@ NUM_LABELS = bundle["num_labels"]
 # -------------------------
 # Load Model OFFLINE
 # -------------------------
-model = AutoModelForSequenceClassification.from_pretrained(
-    BASE_MODEL_PATH,
-    num_labels=NUM_LABELS,
-    local_files_only=True
-)
+def load_fp32_model():
+    m = AutoModelForSequenceClassification.from_pretrained(
+        BASE_MODEL_PATH,
+        num_labels=NUM_LABELS,
+        local_files_only=True
+    )
+    m.load_state_dict(bundle["model_state_dict"])
+    m.eval()
+    return m
+
 
-model.load_state_dict(bundle["model_state_dict"])
-model.eval()
+# torch (fp32 eager) | quantized (dynamic int8) | onnx (onnxruntime CPU)
+text_backend = create_backend(TEXT_BACKEND, load_fp32_model)
+model = getattr(text_backend, "model", None)
+
+# The fp32 state dict is no longer needed once the backend is built
+bundle.pop("model_state_dict", None)
 
 # -------------------------
 # Label Mapping
@@ -36,22 +74,86 @@ LABELS = {
 }
 
 # -------------------------
-# Prediction Function
+# Tokenization / Label Caches
 # -------------------------
-def predict_text(text: str) -> str:
-    if not text or not text.strip():
-        return "NORMAL"
+# Canned symptom phrases repeat heavily, so both the token ids and the
+# final prediction are cached per normalised string.
+token_cache = MemoryBackend(max_entries=TEXT_CACHE_SIZE, ttl=float("inf"))
+label_cache = MemoryBackend(max_entries=TEXT_CACHE_SIZE, ttl=float("inf"))
+
+
+def _normalize(text):
+    return " ".join(text.split())
+
+
+def _token_ids(text):
+    ids = token_cache.get(text)
+    if ids is None:
+        ids = tokenizer(text, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+        token_cache.put(text, ids)
+    return ids
+
 
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
+def _run_model(batch_ids):
+    inputs = tokenizer.pad(
+        {"input_ids": batch_ids},
         padding=True,
-        max_length=128
+        return_tensors="np"
     )
 
-    with torch.no_grad():
-        outputs = model(**inputs)
+    logits = text_backend(
+        inputs["input_ids"].astype("int64"),
+        inputs["attention_mask"].astype("int64")
+    )
+    return softmax(logits).tolist()
+
+
+# -------------------------
+# Batch Prediction
+# -------------------------
+def predict_text_batch(texts):
+    """
+    Classify many clinical texts at once.
+
+    Inputs are grouped by token length so each batch pads to a similar
+    length. Returns one (label, probabilities) tuple per input, where
+    probabilities maps every label to its softmax score.
+    """
+    results = [None] * len(texts)
+    pending = {}
+
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            results[i] = ("NORMAL", {})
+            continue
+
+        key = _normalize(text)
+        cached = label_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+
+    if pending:
+        keys = sorted(pending, key=lambda k: len(_token_ids(k)))
 
-    pred = torch.argmax(outputs.logits, dim=1).item()
-    return LABELS[pred]
+        for start in range(0, len(keys), TEXT_BATCH_SIZE):
+            chunk = keys[start:start + TEXT_BATCH_SIZE]
+            probs = _run_model([_token_ids(k) for k in chunk])
+
+            for key, p in zip(chunk, probs):
+                pred = max(range(len(p)), key=p.__getitem__)
+                result = (LABELS[pred], {LABELS[j]: round(v, 4) for j, v in enumerate(p)})
+                label_cache.put(key, result)
+                for i in pending[key]:
+                    results[i] = result
+
+    return results
+
+
+# -------------------------
+# Prediction Function
+# -------------------------
+def predict_text(text: str) -> str:
+    label, _ = predict_text_batch([text])[0]
+    return label
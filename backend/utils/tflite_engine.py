@@ -0,0 +1,90 @@
+import os
+import threading
+import numpy as np
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+IMAGE_RUNTIME = os.getenv("IMAGE_RUNTIME", "tensorflow")   # tensorflow | tflite
+TFLITE_VARIANT = os.getenv("TFLITE_VARIANT", "int8")       # fp16 | int8
+TFLITE_THREADS = int(os.getenv("TFLITE_THREADS", "2"))
+TFLITE_DIR = os.getenv("TFLITE_DIR", os.path.join("models", "tflite"))
+
+
+def tflite_path(model_name, variant=TFLITE_VARIANT):
+    """
+    model_name: "validator" | "classifier"
+    """
+    return os.path.join(TFLITE_DIR, f"{model_name}_{variant}.tflite")
+
+
+# =========================================================
+# TFLITE ENGINE
+# =========================================================
+
+class TFLiteEngine:
+    """
+    Serves a converted model through the TFLite interpreter.
+
+    Same predict() contract as InferenceEngine: (N, H, W, C) float32 →
+    (N,) probabilities. Quantized input/output tensors are handled with
+    the scale / zero point stored in the model.
+    """
+
+    def __init__(self, path, threads=TFLITE_THREADS):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"❌ TFLite model not found at {path}. Run convert_tflite.py first."
+            )
+
+        # Imported here so the configuration above can be read without
+        # TensorFlow (utils/result_cache keys on it)
+        import tensorflow as tf
+
+        self.path = path
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._input["shape"][1:])
+        self._batch = int(self._input["shape"][0])
+
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch.astype(np.float32)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, out):
+        if self._output["dtype"] == np.float32:
+            return out
+        scale, zero_point = self._output["quantization"]
+        return (out.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        batch = np.asarray(batch)
+
+        with self._lock:
+            if batch.shape[0] != self._batch:
+                self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch = batch.shape[0]
+
+            self.interpreter.set_tensor(self._input["index"], self._quantize(batch))
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+
+        return self._dequantize(out)[:, 0]
+
+    def warmup(self):
+        self.predict(np.zeros((1, *self.input_shape), dtype=np.float32))
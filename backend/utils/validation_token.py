@@ -0,0 +1,70 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+
+# Set VALIDATION_TOKEN_SECRET when running several workers/pods so that
+# tokens issued by one are accepted by the others.
+TOKEN_SECRET = (os.getenv("VALIDATION_TOKEN_SECRET") or secrets.token_hex(32)).encode()
+TOKEN_TTL_SECONDS = int(os.getenv("VALIDATION_TOKEN_TTL_SECONDS", "300"))
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(TOKEN_SECRET, payload, hashlib.sha256).digest()
+
+
+# =========================================================
+# VALIDATION TOKEN
+# =========================================================
+
+def issue_token(content_hash, score, ttl=TOKEN_TTL_SECONDS):
+    """
+    Short-lived signed token proving the image with this content hash
+    passed the chest X-ray validator with this score.
+    """
+    payload = json.dumps(
+        {"h": content_hash, "s": round(float(score), 6), "exp": int(time.time()) + ttl},
+        separators=(",", ":")
+    ).encode()
+    return f"{_b64(payload)}.{_b64(_sign(payload))}"
+
+
+def verify_token(token, content_hash):
+    """
+    Returns the validator score if the token is authentic, unexpired and
+    bound to content_hash; otherwise None.
+    """
+    if not token:
+        return None
+
+    try:
+        payload_b64, sig_b64 = token.split(".", 1)
+        payload = _unb64(payload_b64)
+        if not hmac.compare_digest(_sign(payload), _unb64(sig_b64)):
+            return None
+        claims = json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+
+    if claims.get("exp", 0) < time.time():
+        return None
+    if not hmac.compare_digest(str(claims.get("h", "")), content_hash):
+        return None
+
+    return float(claims["s"])
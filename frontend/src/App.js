@@ -44,26 +44,51 @@ function App() {
     setChatInput("");
     setChatLoading(true);
 
+    // Reply streams in token by token (SSE over a POST response)
+    const setBotText = (text) =>
+      setChatMessages((prev) => [...prev.slice(0, -1), { role: "bot", text }]);
+
+    setChatMessages((prev) => [...prev, { role: "bot", text: "" }]);
+
     try {
-      const res = await fetch("http://127.0.0.1:5000/chatbot", {
+      const res = await fetch("http://127.0.0.1:5000/chatbot/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: userText })
       });
 
-      const data = await res.json();
-
-      setChatMessages((prev) => [
-        ...prev,
-        { role: "bot", text: data.reply || "No response received." }
-      ]);
+      if (!res.ok || !res.body || !(res.headers.get("Content-Type") || "").includes("text/event-stream")) {
+        const data = await res.json();
+        setBotText(data.reply || "No response received.");
+      } else {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let text = "";
+
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split("\n\n");
+          buffer = events.pop();
+
+          for (const event of events) {
+            const line = event.split("\n").find((l) => l.startsWith("data:"));
+            if (!line) continue;
+            const data = JSON.parse(line.slice(5));
+
+            if (data.token) text += data.token;
+            if (data.reply) text = data.reply;
+            if (data.error) text = `⚠️ ${data.error}`;
+            setBotText(text || "No response received.");
+          }
+        }
+      }
     } catch (err) {
       console.error("Chatbot error:", err);
-
-      setChatMessages((prev) => [
-        ...prev,
-        { role: "bot", text: "⚠️ Chatbot service unavailable. Please try again." }
-      ]);
+      setBotText("⚠️ Chatbot service unavailable. Please try again.");
     }
 
     setChatLoading(false);
@@ -163,6 +188,28 @@ function App() {
     if (fileInputRef.current) fileInputRef.current.value = "";
   };
 
+  /* =============================
+     BACKGROUND ARTIFACTS (Grad-CAM + report)
+  ============================= */
+  const pollArtifacts = async (jobId) => {
+    for (let attempt = 0; attempt < 120; attempt++) {
+      const res = await fetch(`http://127.0.0.1:5000/jobs/${jobId}`);
+      if (!res.ok) return;
+
+      const job = await res.json();
+      if (job.status === "done") {
+        // Only merge into the submission that started this job
+        setResult((prev) =>
+          prev && prev.job_id === jobId ? { ...prev, ...job.result } : prev
+        );
+        return;
+      }
+      if (job.status === "failed") return;
+
+      await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+  };
+
   /* =============================
      SUBMIT
   ============================= */
@@ -200,6 +247,10 @@ function App() {
 
       const formData = new FormData();
       formData.append("image", image);
+      // ✅ Lets the backend skip re-validating the same image
+      if (validateData.validation_token) {
+        formData.append("validation_token", validateData.validation_token);
+      }
       if (audioBlob) formData.append("audio", audioBlob);
       if (text) formData.append("text", text);
 
@@ -214,6 +265,13 @@ function App() {
       const data = await res.json();
       setResult(data);
 
+      // ✅ Grad-CAM and report arrive after the label
+      if (data.job_id) {
+        pollArtifacts(data.job_id).catch((err) =>
+          console.error("Report job error:", err)
+        );
+      }
+
       if (data.transcription) {
         setTranscription(data.transcription);
       }